@@ -0,0 +1,36 @@
+# Define a node of the abstract syntax tree built by the Parser.
+#
+# Every node has a kind, the token it came from (for error positions), its child
+# nodes and a value:
+#   Program   children: Function...
+#   Function  value: name          children: Params, Block
+#   Params    children: Name...
+#   Block     children: statements
+#   Declare   value: variable      children: expression          ('MANLO x = ...;')
+#   Assign    value: variable      children: expression          ('x = ...;')
+#   Call      value: function      children: arguments
+#   Return    children: expression
+#   If        children: Compare, Block[, Block]
+#   While     children: Compare, Block
+#   For       children: Declare, Compare, Assign, Block
+#   Compare   value: operator      children: left, right
+#   BinOp     value: operator      children: left, right
+#   Name      value: variable
+#   Number    value: int (the raw text if it is not a decimal literal)
+#   String    value: str
+#   Null      (a lone punctuation token used as an expression)
+class Node:
+    __slots__ = ('kind', 'token', 'children', 'value')
+
+    # 'span' (the first and last token index of the construct) is accepted so that Node
+    # can be Parser.make_node; a Node finds its position through its token instead
+    def __init__(self, kind, token=None, children=(), value=None, span=None):
+        self.kind = kind  # Kind of node, see the table above
+        self.token = token  # Token the node was built from, if any
+        self.children = list(children)  # Child nodes in source order
+        self.value = value  # Name, operator or literal value
+
+    def __repr__(self):
+        inner = ', '.join(repr(child) for child in self.children)
+        value = '' if self.value is None else f" {self.value!r}"
+        return f"{self.kind}{value}({inner})" if self.children else f"{self.kind}{value}"
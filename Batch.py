@@ -0,0 +1,146 @@
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from FastLexer import FastLexer
+from Lexer import Lexer
+from Parser import Parser, SyntaxError
+from SemanticAnalyzer import SemanticAnalyzer
+
+# Lexer engines by command-line name (YAH.py --lexer); both produce the same token stream
+LEXERS = {
+    'fast': FastLexer,
+    'classic': Lexer,
+}
+
+# File extensions picked up when a directory is given
+EXTENSIONS = ('.yah',)
+
+# Aggregate exit codes: every file valid, some file invalid, some file could not be checked
+EXIT_VALID, EXIT_INVALID, EXIT_ERROR = 0, 1, 2
+
+
+# Method to expand files, directories (searched recursively) and glob patterns into
+# a sorted list of files without duplicates; returns (files, patterns that matched nothing)
+def collect(paths):
+    files, missing = set(), []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.update(
+                    os.path.join(root, name) for name in names if name.lower().endswith(EXTENSIONS)
+                )
+        elif os.path.isfile(path):
+            files.add(path)
+        else:
+            matches = [match for match in glob.glob(path, recursive=True) if os.path.isfile(match)]
+            if not matches:
+                missing.append(path)
+            files.update(matches)
+    return sorted(files), missing
+
+
+# Method to make the JSON-ready record of one file; every line has the same keys
+def new_record(path, status='valid', error=None):
+    return {'file': path, 'status': status, 'error': error, 'line': None, 'column': None,
+            'tokens': None, 'functions': None, 'semantic': None, 'timings': {}}
+
+
+# Method to mark a record invalid because of error 'e', with its position when known
+def fail(record, e):
+    record['status'] = 'invalid'
+    record['error'] = e.args[0]
+    position = getattr(e.token, 'position', None)
+    if position is not None:
+        record['line'], record['column'] = position
+
+
+# Method to lex, validate and analyze one file; returns its record.
+# Module level so worker processes can run it.
+def check_file(path, lexer='fast'):
+    record = new_record(path)
+    timings = record['timings']
+    started = time.perf_counter()
+    try:
+        with open(path, encoding='utf-8') as file:
+            text = file.read()
+        timings['read_ms'] = round((time.perf_counter() - started) * 1000, 3)
+
+        started = time.perf_counter()
+        tokens = LEXERS[lexer](text).tokenize_store()
+        timings['lex_ms'] = round((time.perf_counter() - started) * 1000, 3)
+        record['tokens'] = len(tokens)
+
+        started = time.perf_counter()
+        try:
+            parser = Parser(tokens)  # Function detection and the main check
+            record['functions'] = len(parser.funcs)
+            program = parser.parse()
+        except SyntaxError as e:
+            program = None
+            fail(record, e)
+        timings['parse_ms'] = round((time.perf_counter() - started) * 1000, 3)
+
+        if program is not None:
+            # Names are resolved only in files whose syntax is valid
+            started = time.perf_counter()
+            errors = SemanticAnalyzer(program, parser.funcs).analyze()
+            timings['semantic_ms'] = round((time.perf_counter() - started) * 1000, 3)
+            record['semantic'] = [{'error': e.args[0], 'line': None, 'column': None} for e in errors]
+            for e, entry in zip(errors, record['semantic']):
+                position = getattr(e.token, 'position', None)
+                if position is not None:
+                    entry['line'], entry['column'] = position
+            if errors:
+                fail(record, errors[0])
+    except (OSError, UnicodeDecodeError) as e:
+        record['status'] = 'error'
+        record['error'] = f"{type(e).__name__}: {e}"
+    except Exception as e:  # A crash of the lexer or parser must not stop the batch
+        record['status'] = 'error'
+        record['error'] = f"Internal {type(e).__name__}: {e}"
+    return record
+
+
+# Define the Batch class: checks many files in one process (or a worker pool) and
+# writes one JSON line per file
+class Batch:
+    def __init__(self, paths, lexer='fast', jobs=1, output=None):
+        self.paths = paths  # Files, directories and glob patterns
+        self.lexer = lexer  # Lexer engine name
+        self.jobs = jobs  # Number of worker processes; 1 checks files in this process
+        self.output = output or sys.stdout  # Stream the JSON lines go to
+        self.counts = {'valid': 0, 'invalid': 0, 'error': 0}
+
+    # Main method: check every file and return the aggregate exit code
+    def run(self):
+        files, missing = collect(self.paths)
+        for path in missing:
+            self.write(new_record(path, 'error', "No such file, directory or match"))
+        if self.jobs > 1 and len(files) > 1:
+            with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+                chunksize = max(1, len(files) // (self.jobs * 8))
+                for record in executor.map(check_file, files, [self.lexer] * len(files), chunksize=chunksize):
+                    self.write(record)
+        else:
+            for path in files:
+                self.write(check_file(path, self.lexer))
+        if not files and not missing:
+            self.write(new_record(None, 'error', "No files to check"))
+        return self.exit_code()
+
+    # Method to write one record as a JSON line and count its status
+    def write(self, record):
+        self.counts[record['status']] += 1
+        self.output.write(json.dumps(record) + '\n')
+        self.output.flush()
+
+    # Exit code for CI: errors outrank invalid files, which outrank success
+    def exit_code(self):
+        if self.counts['error']:
+            return EXIT_ERROR
+        if self.counts['invalid']:
+            return EXIT_INVALID
+        return EXIT_VALID
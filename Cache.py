@@ -0,0 +1,189 @@
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from globals import LEXER_VERSION, GRAMMAR_VERSION
+from Parser import SyntaxError
+from SemanticAnalyzer import SemanticError
+from TokenStore import TokenStore
+
+# Name of the cache directory created next to the source files, like __pycache__
+CACHE_DIRECTORY = '__yahcache__'
+# Extension of the cache entries
+SUFFIX = '.yahc'
+# Default size limit of one cache directory; the least recently used entries go first
+MAX_BYTES = 64 << 20
+
+# Layout of a cache entry. Every section starts on an 8-byte boundary so it can be
+# used in place through a memoryview over the memory-mapped file:
+#   header | kinds (B) | starts (q) | ends (q) | refs (L) | value offsets (q) |
+#   value text (UTF-8) | function locations (q) | function name refs (q) | error message |
+#   semantic error tokens (q) | semantic error messages (UTF-8, NUL-separated)
+MAGIC = b'YAHC'
+FORMAT_VERSION = 2
+HEADER = struct.Struct('=4sBBBBqqqqqqqq')  # magic, format, refs item size, byte order, valid,
+                                          # tokens, values, value bytes, functions, error token, error bytes,
+                                          # semantic errors, semantic error bytes
+REFS_TYPECODE = 'L'  # TokenStore.refs
+
+
+# Method to round a section length up to the next multiple of 8
+def pad(length):
+    return (length + 7) & ~7
+
+
+# Define the cached result of lexing and checking one source
+class CacheEntry:
+    def __init__(self, tokens, funcs, error, buffer=None, semantic=()):
+        self.tokens = tokens  # TokenStore, over the mapped file when it was loaded
+        self.funcs = funcs  # Functions as Parser.detect_funcs lists them
+        self.error = error  # SyntaxError of the check, or None if the source is valid
+        self.semantic = semantic  # SemanticErrors found in a valid source, in source order
+        self.buffer = buffer  # The mmap the columns point into, kept open with the entry
+
+
+# Define the CompileCache class: a content-addressed directory of token streams,
+# function tables and validation outcomes. The key is the hash of the source plus the
+# lexer and grammar versions, so an entry is only ever reused for the same input.
+class CompileCache:
+    def __init__(self, directory, max_bytes=MAX_BYTES):
+        self.directory = directory  # Directory holding the entries
+        self.max_bytes = max_bytes  # Size limit enforced after every store
+
+    # Method to get the cache that belongs next to the source file at 'path'
+    @classmethod
+    def beside(cls, path, max_bytes=MAX_BYTES):
+        return cls(os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIRECTORY), max_bytes)
+
+    # Method to compute the key of a source; 'lexer' names the engine, so an entry is only
+    # reused with the engine that made it
+    def key(self, source_code, lexer='fast'):
+        digest = hashlib.sha256(source_code.encode('utf-8', 'surrogatepass'))
+        digest.update(f"\0{lexer}\0{LEXER_VERSION}\0{GRAMMAR_VERSION}".encode())
+        return digest.hexdigest()
+
+    # Method to get the path of the entry for 'key'
+    def path(self, key):
+        return os.path.join(self.directory, key + SUFFIX)
+
+    # Method to load the entry for 'key'; None when it is missing or unreadable
+    def load(self, key, source_code):
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as file:
+                buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            entry = self.decode(buffer, source_code)
+        except (OSError, ValueError, struct.error, UnicodeDecodeError):
+            return None
+        try:
+            os.utime(path)  # Mark the entry as recently used
+        except OSError:
+            pass
+        return entry
+
+    # Method to decode a mapped entry; raises ValueError if it was not written by this build
+    def decode(self, buffer, source_code):
+        (magic, version, refs_size, big_endian, valid, count, value_count, value_bytes,
+         func_count, error_token, error_bytes, semantic_count, semantic_bytes) = HEADER.unpack_from(buffer)
+        if (magic, version, refs_size, big_endian) != (
+            MAGIC, FORMAT_VERSION, array(REFS_TYPECODE).itemsize, sys.byteorder == 'big'
+        ):
+            raise ValueError("Cache entry written by another build")
+        view = memoryview(buffer)
+        offset = HEADER.size
+
+        # Method to take the next section of 'length' bytes
+        def section(length):
+            nonlocal offset
+            start, offset = offset, offset + pad(length)
+            if offset > len(view):
+                raise ValueError("Truncated cache entry")
+            return view[start:start + length]
+
+        kinds = section(count)
+        starts = section(8 * count).cast('q')
+        ends = section(8 * count).cast('q')
+        refs = section(refs_size * count).cast(REFS_TYPECODE)
+        value_offsets = section(8 * (value_count + 1)).cast('q')
+        text = bytes(section(value_bytes))
+        values = [
+            text[value_offsets[index]:value_offsets[index + 1]].decode('utf-8', 'surrogatepass')
+            for index in range(value_count)
+        ]
+        func_locs = section(8 * func_count).cast('q')
+        func_refs = section(8 * func_count).cast('q')
+        message = bytes(section(error_bytes)).decode('utf-8', 'surrogatepass')
+        semantic_tokens = section(8 * semantic_count).cast('q')
+        semantic_messages = bytes(section(semantic_bytes)).decode('utf-8', 'surrogatepass').split('\0')
+
+        tokens = TokenStore.from_columns(source_code, kinds, starts, ends, refs, values)
+        funcs = [{'loc': loc, 'name': values[ref]} for loc, ref in zip(func_locs, func_refs)]
+        error = None
+        if not valid:
+            error = SyntaxError(message, tokens[error_token] if error_token >= 0 else None)
+        semantic = [
+            SemanticError(text, tokens[token] if token >= 0 else None)
+            for token, text in zip(semantic_tokens, semantic_messages)
+        ]
+        return CacheEntry(tokens, funcs, error, buffer, semantic)
+
+    # Method to store the outcome of checking a source; failures to write are ignored,
+    # as a cache that cannot be written only makes the next run slower
+    def store(self, key, tokens, funcs, error=None, semantic=()):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            handle, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(handle, 'wb') as file:
+                file.write(self.encode(tokens, funcs, error, semantic))
+            os.replace(temporary, self.path(key))  # Readers never see a partial entry
+        except OSError:
+            return
+        self.evict()
+
+    # Method to serialize an entry into the layout described at the top of this file
+    def encode(self, tokens, funcs, error, semantic=()):
+        encoded = [value.encode('utf-8', 'surrogatepass') for value in tokens.values]
+        value_offsets = array('q', [0])
+        for value in encoded:
+            value_offsets.append(value_offsets[-1] + len(value))
+        refs = array(REFS_TYPECODE, tokens.refs)
+        error_token = getattr(getattr(error, 'token', None), 'index', -1)
+        message = b'' if error is None else error.args[0].encode('utf-8', 'surrogatepass')
+        semantic_tokens = array('q', [getattr(e.token, 'index', -1) for e in semantic])
+        semantic_messages = '\0'.join(e.args[0] for e in semantic).encode('utf-8', 'surrogatepass')
+        sections = [
+            bytes(tokens.kinds), array('q', tokens.starts).tobytes(), array('q', tokens.ends).tobytes(),
+            refs.tobytes(), value_offsets.tobytes(), b''.join(encoded),
+            array('q', [fun['loc'] for fun in funcs]).tobytes(),
+            array('q', [tokens.value_ids[fun['name']] for fun in funcs]).tobytes(),
+            message, semantic_tokens.tobytes(), semantic_messages,
+        ]
+        header = HEADER.pack(
+            MAGIC, FORMAT_VERSION, refs.itemsize, sys.byteorder == 'big', error is None,
+            len(tokens), len(encoded), int(value_offsets[-1]), len(funcs), error_token, len(message),
+            len(semantic), len(semantic_messages),
+        )
+        return header + b''.join(section + b'\0' * (pad(len(section)) - len(section)) for section in sections)
+
+    # Method to delete the least recently used entries until the directory fits max_bytes
+    def evict(self):
+        try:
+            entries = []
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(SUFFIX):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError:
+            return
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
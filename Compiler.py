@@ -0,0 +1,264 @@
+from array import array
+from globals import (
+    BUILTINS, LOAD_LOCAL, LOAD_CONST, STORE_LOCAL, ADD, SUB, MUL, DIV,
+    JUMP_IF_LT, JUMP_IF_LE, JUMP_IF_GT, JUMP_IF_GE, JUMP_IF_EQ, JUMP_IF_NE,
+    JUMP, CALL, CALL_BUILTIN, POP, RETURN, VLOOP,
+)
+from Parser import SyntaxError
+
+# Comparison operators and the jump taken when the comparison does NOT hold,
+# so a condition compiles to a single instruction that skips its block
+NEGATED_JUMPS = {
+    '<': JUMP_IF_GE, '<=': JUMP_IF_GT, '>': JUMP_IF_LE,
+    '>=': JUMP_IF_LT, '==': JUMP_IF_NE, '!=': JUMP_IF_EQ,
+}
+ARITHMETIC = {'+': ADD, '-': SUB, '*': MUL, '/': DIV}
+
+
+# Define a custom exception for errors found while compiling (unknown names, arity)
+class CompileError(SyntaxError):
+    """Custom exception for compile errors."""
+
+
+# Define a compiled function: flat bytecode plus the tables it refers to
+class Function:
+    def __init__(self, name, params):
+        self.name = name  # Function name
+        self.params = params  # Number of parameters (the first local slots)
+        self.locals = params  # Number of local slots
+        self.code = array('l')  # Flat (opcode, argument) pairs
+        self.consts = []  # Constant values referenced by LOAD_CONST
+        self.tokens = []  # Source token of each instruction, for error messages
+
+    # Method to append one instruction; returns its offset in the code array
+    def emit(self, opcode, arg=0, token=None):
+        self.code.append(opcode)
+        self.code.append(arg)
+        self.tokens.append(token)
+        return len(self.code) - 2
+
+    # Method to point the jump at offset 'offset' to 'target'
+    def patch(self, offset, target):
+        self.code[offset + 1] = target
+
+    # Offset of the next instruction to be emitted; jump targets are code offsets
+    def here(self):
+        return len(self.code)
+
+
+# Define the Compiler class to turn a Program node into a list of Functions,
+# resolving every variable to a local slot at compile time. Nested blocks and
+# expressions are compiled without recursion: a statement schedules the blocks it
+# holds, and what it emits after them, as steps on a stack that compile_function runs
+# in source order, so any nesting depth the LLParser accepts compiles.
+class Compiler:
+    def __init__(self, program, vectorize=False):
+        self.program = program  # Program node built by Parser.parse
+        self.vectorize = vectorize  # Plan counted 'for' loops to run as one VLOOP step
+        # Function name -> (index, parameter count), so calls resolve to an index
+        self.signatures = {
+            fun.value: (index, len(fun.children[0].children))
+            for index, fun in enumerate(program.children)
+        }
+
+    # Main method: compile every function in source order
+    def compile(self):
+        return [self.compile_function(fun) for fun in self.program.children]
+
+    # Method to compile one Function node
+    def compile_function(self, node):
+        params, body = node.children
+        self.function = Function(node.value, len(params.children))
+        self.scopes = [{}]  # Innermost scope last: name -> slot
+        self.const_ids = {}
+        self.pending = []  # Steps still to run, as (method, arguments...), the next one last
+        for param in params.children:
+            if param.value in self.scopes[-1]:
+                raise CompileError(f"Duplicate parameter '{param.value}'", param.token)
+            self.scopes[-1][param.value] = len(self.scopes[-1])
+        self.compile_block(body)
+        self.run()
+        # Falling off the end returns null
+        self.function.emit(LOAD_CONST, self.constant(None))
+        self.function.emit(RETURN)
+        return self.function
+
+    # Method to schedule 'steps' to run next, in the order given
+    def schedule(self, *steps):
+        self.pending.extend(reversed(steps))
+
+    # Method to run the scheduled steps until none is left; a step may schedule more
+    def run(self):
+        pending = self.pending
+        while pending:
+            method, *arguments = pending.pop()
+            method(*arguments)
+
+    # Method to compile a Block node in a scope of its own: its statements are scheduled,
+    # then the end of the scope
+    def compile_block(self, node):
+        self.scopes.append({})
+        steps = [(getattr(self, 'compile_' + statement.kind), statement) for statement in node.children]
+        self.schedule(*steps, (self.scopes.pop,))
+
+    # A Block can also stand as a statement (the optimizer leaves one for a decided 'if')
+    def compile_Block(self, node):
+        self.compile_block(node)
+
+    # Method to get the constant-table index of 'value'
+    def constant(self, value):
+        key = (type(value), value)  # Keep 1 and "1" apart
+        if key not in self.const_ids:
+            self.const_ids[key] = len(self.function.consts)
+            self.function.consts.append(value)
+        return self.const_ids[key]
+
+    # Method to resolve a variable name to its slot, innermost scope first
+    def resolve(self, name, token):
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        raise CompileError(f"Undefined variable '{name}'", token)
+
+    # Method to compile 'MANLO x = value;': the value is compiled before x exists
+    def compile_Declare(self, node):
+        self.compile_expression(node.children[0])
+        slot = self.function.locals
+        self.function.locals += 1
+        self.scopes[-1][node.value] = slot
+        self.function.emit(STORE_LOCAL, slot, node.token)
+
+    # Method to compile 'x = value;'
+    def compile_Assign(self, node):
+        self.compile_expression(node.children[0])
+        self.function.emit(STORE_LOCAL, self.resolve(node.value, node.token), node.token)
+
+    # Method to compile a call statement; the returned value is discarded
+    def compile_Call(self, node):
+        for arg in node.children:
+            self.compile_expression(arg)
+        if node.value in self.signatures:
+            index, params = self.signatures[node.value]
+            if params != len(node.children):
+                raise CompileError(
+                    f"Function '{node.value}' takes {params} argument(s), got {len(node.children)}", node.token
+                )
+            self.function.emit(CALL, index, node.token)
+        elif node.value in BUILTINS:
+            self.function.emit(CALL_BUILTIN, self.constant((node.value, len(node.children))), node.token)
+        else:
+            raise CompileError(f"Undefined function '{node.value}'", node.token)
+        self.function.emit(POP)
+
+    # Method to compile 'return value;'
+    def compile_Return(self, node):
+        self.compile_expression(node.children[0])
+        self.function.emit(RETURN, 0, node.token)
+
+    # Method to compile a condition as a jump taken when it is false; returns the jump
+    def compile_condition(self, node):
+        left, right = node.children
+        self.compile_expression(left)
+        self.compile_expression(right)
+        return self.function.emit(NEGATED_JUMPS[node.value], 0, node.token)
+
+    # Method to point the jump at offset 'offset' to the next instruction
+    def land(self, offset):
+        self.function.patch(offset, self.function.here())
+
+    # Method to compile 'if (...) {...} else {...}'
+    def compile_If(self, node):
+        skip_then = self.compile_condition(node.children[0])
+        if len(node.children) == 3:
+            self.schedule((self.compile_block, node.children[1]), (self.compile_else, skip_then, node.children[2]))
+        else:
+            self.schedule((self.compile_block, node.children[1]), (self.land, skip_then))
+
+    # Method to compile the 'else' block of an 'if' once its 'then' block is compiled
+    def compile_else(self, skip_then, block):
+        skip_else = self.function.emit(JUMP)
+        self.land(skip_then)
+        self.schedule((self.compile_block, block), (self.land, skip_else))
+
+    # Method to compile 'while (...) {...}'
+    def compile_While(self, node):
+        top = self.function.here()
+        exit_jump = self.compile_condition(node.children[0])
+        self.schedule((self.compile_block, node.children[1]), (self.close_loop, top, exit_jump))
+
+    # Method to end a loop once its body is compiled: jump back to the condition at
+    # 'top', whose exit jump lands after the loop
+    def close_loop(self, top, exit_jump):
+        self.function.emit(JUMP, top)
+        self.land(exit_jump)
+
+    # Method to compile 'for (MANLO i = ...; cond; i = ...;) {...}'; i lives in the loop's scope.
+    # When vectorizing, a VLOOP before the loop runs it in one step if it is a counted
+    # straight-line loop; other loops get a JUMP to the next instruction in its place.
+    def compile_For(self, node):
+        init, condition, update, body = node.children
+        self.scopes.append({})
+        self.compile_Declare(init)
+        vector = self.function.emit(VLOOP, 0, node.token) if self.vectorize else None
+        top = self.function.here()
+        exit_jump = self.compile_condition(condition)
+        body_start = self.function.here()
+        self.schedule((self.compile_block, body), (self.finish_For, update, vector, top, exit_jump, body_start))
+
+    # Method to compile the update of a 'for' loop once its body is compiled, close the
+    # loop and its scope, and plan the VLOOP of a vectorized loop
+    def finish_For(self, update, vector, top, exit_jump, body_start):
+        update_start = self.function.here()
+        self.compile_Assign(update)
+        self.close_loop(top, exit_jump)
+        self.scopes.pop()
+        if vector is not None:
+            from VectorLoop import VectorLoop  # Only --vectorize needs it (and maybe NumPy)
+            plan = VectorLoop.build(self.function, top, exit_jump, body_start, update_start, self.function.here())
+            if plan is None:
+                self.function.code[vector] = JUMP
+                self.function.patch(vector, top)
+            else:
+                self.function.consts.append(plan)
+                self.function.patch(vector, len(self.function.consts) - 1)
+
+    # Method to compile an expression leaving its value on the stack, without recursion.
+    # BinOps chain to the left, so the left spine is walked down to its first operand;
+    # going back up, each BinOp compiles its right operand and emits its operator. A
+    # BinOp whose right operand is a BinOp too waits on the stack as a 1-tuple.
+    def compile_expression(self, node):
+        operations = []  # BinOps whose left operand is being compiled, innermost last
+        while True:
+            while node.kind == 'BinOp':
+                operations.append(node)
+                node = node.children[0]
+            self.compile_operand(node)
+            while operations:
+                operation = operations.pop()
+                if operation.__class__ is tuple:  # Both operands are compiled
+                    operation = operation[0]
+                elif operation.children[1].kind == 'BinOp':
+                    operations.append((operation,))
+                    node = operation.children[1]
+                    break
+                else:
+                    self.compile_operand(operation.children[1])
+                self.function.emit(ARITHMETIC[operation.value], 0, operation.token)
+            else:
+                return
+
+    # Method to compile an expression that is not a BinOp
+    def compile_operand(self, node):
+        kind = node.kind
+        if kind == 'Name':
+            self.function.emit(LOAD_LOCAL, self.resolve(node.value, node.token), node.token)
+        elif kind == 'Number':
+            if not isinstance(node.value, int):
+                raise CompileError(f"Invalid number literal '{node.value}'", node.token)
+            self.function.emit(LOAD_CONST, self.constant(node.value))
+        elif kind == 'String':
+            self.function.emit(LOAD_CONST, self.constant(node.value))
+        elif kind == 'Null':
+            self.function.emit(LOAD_CONST, self.constant(None))
+        else:
+            raise CompileError(f"Unexpected {kind} in expression", node.token)
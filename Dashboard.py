@@ -1,16 +1,51 @@
 from Parser import Parser
 
+# Lines framing the function list
+FUNCTIONS_HEADER = "================ Functions ===================="
+RULE = "==============================================="
+
 class Dashboard:
-    def __init__(self, _parser: Parser, source_code: str):
+    def __init__(self, _parser: Parser, source_code: str = None, profiler=None):  # Anything with .funcs, e.g. a CacheEntry
         self.parser = _parser
+        self.profiler = profiler  # Enabled Profiler whose measurements are shown, if any
 
-        print("================Source Code====================")
-        print(source_code)
-        print("================ Functions ====================")
+        # The source is not echoed when it was streamed instead of read into memory
+        if source_code is not None:
+            print("================Source Code====================")
+            print(source_code)
+        print(FUNCTIONS_HEADER)
         self.print_funcs()
-        print("===============================================")
+        print(RULE)
+        if profiler is not None and profiler.enabled:
+            self.print_profile()
 
         
     def print_funcs(self):
         for _, fun in enumerate(self.parser.funcs):
-            print(f"{fun['name']}();")
\ No newline at end of file
+            self.print_func(fun['name'])
+
+    # Method to print one line of the function list; a StreamParser calls it for every
+    # function it reaches, as it keeps no list to print afterwards
+    @staticmethod
+    def print_func(name):
+        print(f"{name}();")
+
+    # Method to print the phase timings, counters and the per-function cost table
+    def print_profile(self, count=10):
+        profiler = self.profiler
+        print("================ Profile ======================")
+        for name, seconds in profiler.phases.items():
+            print(f"{name:<24}{seconds * 1000:>12.3f} ms")
+        print("---------------- Counters ---------------------")
+        for name, value in sorted(profiler.counters.items()):
+            print(f"{name:<24}{value:>12}")
+        for name, value in sorted(profiler.token_types.items()):
+            print(f"{name + ' tokens':<24}{value:>12}")
+        if profiler.functions:
+            print(f"---------------- Slowest functions ({len(profiler.functions)} parsed) ---")
+            print(f"{'function':<24}{'line':>8}{'tokens':>10}{'ms':>12}{'tokens/ms':>12}")
+            for fun in profiler.slowest(count):
+                ms = fun['seconds'] * 1000
+                rate = f"{fun['tokens'] / ms:.0f}" if ms else '-'
+                print(f"{fun['name']:<24}{fun['line']:>8}{fun['tokens']:>10}{ms:>12.3f}{rate:>12}")
+        print("===============================================")
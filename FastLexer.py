@@ -0,0 +1,113 @@
+# Import the necessary constants from the 'globals' module
+import re
+from globals import KEYWORDS, OPERATORS, PUNCTUATION, TOKEN_TYPES
+from TokenStore import TokenStore
+
+# ASCII character classes derived from the same str predicates the classic Lexer uses,
+# so both engines agree on every 7-bit character
+ASCII = [chr(code) for code in range(128)]
+ASCII_SPACE = ''.join(c for c in ASCII if c.isspace())
+ASCII_DIGIT = ''.join(c for c in ASCII if c.isdigit())
+ASCII_ALPHA = ''.join(c for c in ASCII if c.isalpha()) + '_'
+ASCII_ALNUM = ''.join(c for c in ASCII if c.isalnum()) + '_'
+
+
+# Build a regex class body from a string of characters
+def char_class(chars):
+    return ''.join(re.escape(c) for c in chars)
+
+
+# Build the master pattern from the language tables: one named group per token class.
+# Operators are tried longest first so '==', '!=', '>=' and '<=' win over their prefixes.
+# Numbers and identifiers that run into a non-ASCII character fail the possessive match
+# and fall through to OTHER, where the classic str predicates finish the run.
+def build_pattern():
+    operators = '|'.join(re.escape(op) for op in sorted(OPERATORS, key=len, reverse=True))
+    return re.compile(
+        f"[{char_class(ASCII_SPACE)}]*(?:"
+        f"(?P<NUMBER>[{char_class(ASCII_DIGIT)}]++(?![^\x00-\x7f]))"
+        f"|(?P<IDENTIFIER>[{char_class(ASCII_ALPHA)}][{char_class(ASCII_ALNUM)}]*+(?![^\x00-\x7f]))"
+        f"|\"(?P<STRING>[^\"]*)\"?"
+        f"|(?P<OPERATOR>{operators})"
+        f"|(?P<PUNCTUATION>[{char_class(PUNCTUATION)}])"
+        f"|(?P<OTHER>.))",
+        re.DOTALL,
+    )
+
+
+# Define the FastLexer class: a drop-in replacement for Lexer that scans whole runs
+# of characters with one compiled pattern instead of advancing one character at a time
+class FastLexer:
+    PATTERN = build_pattern()  # Master pattern shared by every instance
+
+    # Initialize the FastLexer with the source code, mirroring the Lexer interface
+    def __init__(self, source_code):
+        self.source_code = source_code  # The source code to be tokenized
+        self.tokens = []  # A list to hold the generated tokens
+
+    # Main method to tokenize the source code into tokens
+    def tokenize(self):
+        self.tokens = list(self.scan(self.source_code))
+        return self.tokens
+
+    # Method to tokenize the source code into a compact TokenStore with source positions
+    def tokenize_store(self):
+        store = TokenStore(self.source_code)
+        store.extend(self.spans(self.source_code))
+        return store
+
+    # Generator yielding the tokens of 'text' as dicts, like Lexer.tokenize
+    def scan(self, text):
+        for token_type, value, _, _ in self.spans(text):
+            yield {'type': token_type, 'value': value}
+
+    # Generator yielding (type, value, start, end) for each token of 'text' in order,
+    # one regex match per token
+    def spans(self, text):
+        keyword, identifier = TOKEN_TYPES['KEYWORD'], TOKEN_TYPES['IDENTIFIER']
+        skip_until = 0  # End of the last run finished outside the fast path
+        for m in self.PATTERN.finditer(text):
+            kind = m.lastgroup
+            if skip_until:
+                if m.start() < skip_until:  # Already consumed by read_other
+                    continue
+                skip_until = 0
+            if kind == 'IDENTIFIER':
+                value = m.group(kind)
+                yield keyword if value in KEYWORDS else identifier, value, m.start(kind), m.end()
+            elif kind == 'STRING':
+                yield kind, m.group(kind), m.start(kind) - 1, m.end()  # Span includes the quotes
+            elif kind == 'OTHER':
+                start = m.start(kind)
+                token_type, skip_until = self.read_other(text, start)
+                if token_type is not None:
+                    yield token_type, text[start:skip_until], start, skip_until
+            else:
+                yield kind, m.group(kind), m.start(kind), m.end()
+
+    # Identifiers continue with letters, digits (in the str.isalnum sense) and underscores
+    @staticmethod
+    def is_identifier_char(char):
+        return char.isalnum() or char == '_'
+
+    # Method to extend a run past the ASCII fast path using the classic predicates
+    @staticmethod
+    def extend(text, pos, predicate):
+        length = len(text)
+        while pos < length and predicate(text[pos]):
+            pos += 1
+        return pos
+
+    # Method to lex a character outside the ASCII tables exactly like Lexer.tokenize would.
+    # Returns the token type (None for skipped whitespace) and the end of the token.
+    def read_other(self, text, pos):
+        char = text[pos]
+        if char.isspace():  # Non-ASCII whitespace is skipped
+            return None, pos + 1
+        if char.isdigit():  # Digit run containing non-ASCII digits
+            return TOKEN_TYPES['NUMBER'], self.extend(text, pos, str.isdigit)
+        if char.isalpha() or char == '_':  # Identifier containing non-ASCII letters
+            end = self.extend(text, pos, self.is_identifier_char)
+            return TOKEN_TYPES['KEYWORD'] if text[pos:end] in KEYWORDS else TOKEN_TYPES['IDENTIFIER'], end
+        # Anything else is an unknown character
+        return TOKEN_TYPES['UNKNOWN'], pos + 1
@@ -0,0 +1,392 @@
+import hashlib
+from bisect import bisect_right
+from collections import Counter, OrderedDict
+from itertools import accumulate
+from FastLexer import FastLexer
+from Parser import Parser, SyntaxError
+from globals import TOKEN_CODES
+
+# Values per block of a PrefixSums
+BLOCK = 256
+
+
+# Define a Parser that validates the single function at the start of a unit's tokens
+class UnitParser(Parser):
+    def __init__(self, tokens):
+        self.tokens = tokens  # Tokens of one unit, ending with a sentinel when it is not the last
+        self.kinds, self.refs, self.values = tokens.kinds, tokens.refs, tokens.values  # Token columns
+        self.current_pos = 0  # The unit starts with its 'function' keyword
+        self.funcs = []
+
+
+# Define a token of a unit whose position is reported relative to the whole file
+class ShiftedToken:
+    __slots__ = ('token', 'position')
+
+    def __init__(self, token, position):
+        self.token = token  # Token view in the unit's TokenStore
+        self.position = position  # (line, column) in the whole file
+
+    def __getitem__(self, key):
+        return self.token[key]
+
+    def __repr__(self):
+        return repr(self.token)
+
+
+# Define one unit of source: the text from a 'function' keyword up to the next one
+# (the first unit also holds whatever precedes the first function)
+class Unit:
+    __slots__ = ('text', 'digest', 'tokens', 'name', 'newlines', 'results')
+
+    def __init__(self, text, tokens):
+        self.text = text  # Source of the unit
+        self.digest = hashlib.blake2b(text.encode(), digest_size=16).digest()  # Content hash
+        self.tokens = tokens  # TokenStore of the unit, offsets relative to the unit
+        self.newlines = text.count('\n')  # Used to map unit positions to file lines
+        self.results = {}  # is_last -> exception raised by parsing the unit, or None
+        # Name of the declared function, None for a leading unit without one,
+        # IndexError when nothing follows its 'function' keyword
+        if not self.declares_function():
+            self.name = None
+        elif len(tokens) > 1:
+            self.name = tokens.value_at(1)
+        else:
+            self.name = IndexError("token index out of range")
+
+    # True if the unit starts with the 'function' keyword
+    def declares_function(self):
+        tokens = self.tokens
+        return len(tokens) > 0 and tokens.kinds[0] == TOKEN_CODES['KEYWORD'] and tokens.value_at(0) == 'function'
+
+
+# Define prefix sums over a list of non-negative integers that can be spliced: the
+# values are grouped by index in blocks of BLOCK with the sum of every block, so a
+# prefix sum, a search or a point update costs O(n / BLOCK + BLOCK) additions done by
+# sum() and accumulate(), and a splice that changes the count of values only sums the
+# blocks from the splice on again. ParseState keeps the lengths and newline counts of
+# its units in two of them.
+class PrefixSums:
+    def __init__(self, values):
+        self.values = list(values)
+        self.sums = []  # Sum of every block
+        self.resum(0)
+
+    # Method to recompute the block sums from the block holding 'index' on
+    def resum(self, index):
+        values, block = self.values, index // BLOCK
+        del self.sums[block:]
+        self.sums.extend(sum(values[start:start + BLOCK]) for start in range(block * BLOCK, len(values), BLOCK))
+
+    # Method to get the sum of the first 'count' values
+    def prefix(self, count):
+        block = count // BLOCK
+        return sum(self.sums[:block]) + sum(self.values[block * BLOCK:count])
+
+    # Method to get the largest count of leading values whose sum is at most 'total'
+    def search(self, total):
+        ends = list(accumulate(self.sums))
+        block = bisect_right(ends, total)  # Whole blocks that fit
+        if block:
+            total -= ends[block - 1]
+        start = block * BLOCK
+        return start + bisect_right(list(accumulate(self.values[start:start + BLOCK])), total)
+
+    # Method to replace values[first:last + 1] with 'values'
+    def replace(self, first, last, values):
+        if len(values) == last + 1 - first:
+            for index, value in enumerate(values, first):
+                self.sums[index // BLOCK] += value - self.values[index]
+                self.values[index] = value
+        else:  # Every following value moves to another index
+            self.values[first:last + 1] = values
+            self.resum(first)
+
+
+# Define the result of (re)parsing a file: its units plus the first error, in the
+# same order Parser reports them (duplicate names, missing main, function bodies).
+# An edit updates the state in place (replace) without going over every unit in
+# Python: unit offsets and line numbers come from PrefixSums, and the cross-unit checks
+# from the declarations of every name and the units whose parse failed, which are
+# found in the unit list by identity (list.index, a scan in C).
+class ParseState:
+    def __init__(self, units):
+        self.units = units  # Units in source order
+        self.lengths = PrefixSums(len(unit.text) for unit in units)  # Text length per unit
+        self.newlines = PrefixSums(unit.newlines for unit in units)  # Newlines per unit
+        self.declarers = {}  # Function name -> Counter of the units declaring it (unit -> occurrences)
+        self.duplicated = set()  # Names declared more than once
+        self.failing = Counter()  # Units whose parse failed -> occurrences, the last position excluded
+        for index in range(len(units)):
+            self.count(index, 1)
+        self.error = self.first_error()  # Exception Parser would raise, or None
+
+    # Full source text
+    @property
+    def text(self):
+        return ''.join(unit.text for unit in self.units)
+
+    # Length of the source text
+    @property
+    def length(self):
+        return self.lengths.prefix(len(self.units))
+
+    # Offset of every unit in the source text
+    @property
+    def starts(self):
+        return [0, *accumulate(len(unit.text) for unit in self.units)][:-1]
+
+    # Method to get the offset of units[index] in the source text
+    def start_of(self, index):
+        return self.lengths.prefix(index)
+
+    # Method to get the index of the unit holding the source offset 'offset'
+    def locate(self, offset):
+        return min(self.lengths.search(offset), len(self.units) - 1)
+
+    # Functions as Parser.detect_funcs lists them, with 'loc' as a token index in the file
+    @property
+    def funcs(self):
+        funcs, loc = [], 0
+        for index, unit in enumerate(self.units):
+            name = self.name_of(index)
+            if name is not None and not isinstance(name, Exception):
+                funcs.append({'loc': loc, 'name': name})
+            loc += len(unit.tokens)
+        return funcs
+
+    # Name of the function declared by units[index]; a bare 'function' takes the
+    # next unit's 'function' keyword as its name, as Parser.detect_funcs does
+    def name_of(self, index):
+        name = self.units[index].name
+        if isinstance(name, Exception) and index + 1 < len(self.units):
+            return 'function'
+        return name
+
+    # Method to add (sign 1) or remove (sign -1) what units[index] contributes to the
+    # cross-unit checks: its name, and its parse error unless it is the last unit
+    def count(self, index, sign):
+        unit, name = self.units[index], self.name_of(index)
+        if name is not None and not isinstance(name, Exception):
+            declarers = self.declarers.setdefault(name, Counter())
+            declarers[unit] += sign
+            if not declarers[unit]:
+                del declarers[unit]
+            total = sum(declarers.values())
+            if not total:
+                del self.declarers[name]
+            if total > 1:
+                self.duplicated.add(name)
+            else:
+                self.duplicated.discard(name)
+        if index != len(self.units) - 1 and unit.results.get(False) is not None:
+            self.failing[unit] += sign
+            if not self.failing[unit]:
+                del self.failing[unit]
+
+    # Method to replace units[first:last + 1] with 'pieces', whose parse results for
+    # their new positions are known, and update the checks
+    def replace(self, first, last, pieces):
+        units = self.units
+        for index in range(first, last + 1):
+            self.count(index, -1)
+        self.lengths.replace(first, last, [len(piece.text) for piece in pieces])
+        self.newlines.replace(first, last, [piece.newlines for piece in pieces])
+        units[first:last + 1] = pieces
+        for index in range(first, first + len(pieces)):
+            self.count(index, 1)
+        self.error = self.first_error()
+
+    # Method to find every index of a unit in the unit list
+    def occurrences(self, unit):
+        found, index = [], -1
+        while True:
+            try:
+                index = self.units.index(unit, index + 1)  # Units compare by identity
+            except ValueError:
+                return found
+            found.append(index)
+
+    # Method to find the indexes of the units declaring 'name', in source order
+    def positions(self, name):
+        return sorted(
+            index for unit in self.declarers[name] for index in self.occurrences(unit) if self.name_of(index) == name
+        )
+
+    # Method to find the error the full Parser would raise first
+    def first_error(self):
+        units = self.units
+        last = len(units) - 1
+        # The first bare 'function' (only the last unit can be one) or duplicate name
+        index, error = len(units), None
+        if isinstance(units[last].name, Exception):
+            index, error = last, SyntaxError("Expected function name", self.shift(last, units[last].tokens[0]))
+        for name in self.duplicated:
+            second = self.positions(name)[1]
+            if second < index:
+                index, error = second, SyntaxError(
+                    f"Duplicate function name '{name}' detected.", self.shift(second, units[second].tokens[0])
+                )
+        if error is not None:
+            return error
+        if 'main' not in self.declarers:
+            return SyntaxError("No Main Function detected")
+        index = last if units[last].results.get(True) is not None else len(units)
+        for unit in self.failing:
+            index = min(index, units.index(unit))
+        if index < len(units):
+            return self.convert(index, units[index].results[index == last])
+        return None
+
+    # Method to list every error instead of the first one: a bare 'function', duplicate
+    # names and the first error of every function body in source order, then a missing
+    # main. As in recovery mode, a duplicate function is skipped and running out of
+    # tokens is reported as "Unexpected end of input" at the last token.
+    def errors(self):
+        units = self.units
+        last = len(units) - 1
+        candidates = {last}  # Indexes of the units that may have an error
+        for unit in self.failing:
+            candidates.update(self.occurrences(unit))
+        firsts = {}  # Duplicated name -> index of its first declaration
+        for name in self.duplicated:
+            positions = self.positions(name)
+            candidates.update(positions)
+            firsts[name] = positions[0]
+        errors = []
+        for index in sorted(candidates):
+            unit, name = units[index], self.name_of(index)
+            if isinstance(name, Exception):
+                errors.append(SyntaxError("Expected function name", self.shift(index, unit.tokens[0])))
+            elif firsts.get(name, index) != index:
+                errors.append(SyntaxError(
+                    f"Duplicate function name '{name}' detected.", self.shift(index, unit.tokens[0])
+                ))
+            elif unit.results.get(index == last) is not None:
+                errors.append(self.convert(index, unit.results[index == last]))
+        if 'main' not in self.declarers:
+            errors.append(SyntaxError("No Main Function detected"))
+        return errors
+
+    # Method to position the SyntaxError of units[index] in the whole file
+    def convert(self, index, error):
+        token = error.token
+        return SyntaxError(error.args[0], self.shift(index, token) if token is not None else None)
+
+    # Method to wrap a unit token so that it reports its position in the whole file
+    def shift(self, index, token):
+        position = token.store.line_col(token.start) if token.start >= 0 else None
+        if position is None:
+            return token
+        line, column = position
+        lines_before = self.newlines.prefix(index)
+        if line == 1:  # Same line as the unit start: add the unit's own column
+            for previous in range(index - 1, -1, -1):
+                text = self.units[previous].text
+                newline = text.rfind('\n')
+                column += len(text) - newline - 1
+                if newline != -1:
+                    break
+        return ShiftedToken(token, (lines_before + line, column))
+
+
+# Define the IncrementalParser class: keeps the lex and parse results of every unit,
+# keyed by content hash, so an edit only re-lexes and re-parses the units it touches
+class IncrementalParser:
+    def __init__(self, cache_size=4096):
+        self.cache = OrderedDict()  # digest -> Unit, least recently used first
+        self.cache_size = cache_size  # Maximum number of cached units
+        self.lexed = 0  # Units lexed so far (cache misses)
+        self.parsed = 0  # Unit parses run so far
+
+    # Method to parse a whole file from scratch
+    def parse(self, text):
+        return self.build(self.split(text))
+
+    # Method to apply the edit 'replace text[start:end] with new_text' to 'state', in
+    # place; returns the state
+    def reparse(self, state, start, end, new_text):
+        units = state.units
+        first, last = state.locate(start), state.locate(end)
+        if first > 0 and start == state.start_of(first):
+            first -= 1  # The inserted text may join the previous unit's last token
+        while True:
+            region_start = state.start_of(first)
+            old = ''.join(unit.text for unit in units[first:last + 1])
+            region = old[:start - region_start] + new_text + old[end - region_start:]
+            pieces = self.split(region)
+            if first > 0 and not pieces[0].declares_function():
+                first -= 1  # The region no longer starts a function: it belongs to the previous unit
+            elif last + 1 < len(units) and not self.ends_cleanly(pieces[-1]):
+                last += 1  # The region's last token could run into the next unit
+            else:
+                break
+        at_end = last == len(units) - 1
+        for index, piece in enumerate(pieces, 1):
+            self.validate(piece, at_end and index == len(pieces))
+        state.replace(first, last, pieces)
+        return state
+
+    # Method to split text into units at every 'function' keyword
+    def split(self, text):
+        store = FastLexer(text).tokenize_store()
+        function_ref = store.value_ids.get('function')
+        keyword = TOKEN_CODES['KEYWORD']
+        cuts = [
+            store.starts[index] for index, (kind, ref) in enumerate(zip(store.kinds, store.refs))
+            if ref == function_ref and kind == keyword
+        ]
+        if not cuts or cuts[0] != 0:
+            cuts.insert(0, 0)
+        cuts.append(len(text))
+        return [self.unit(text[lo:hi]) for lo, hi in zip(cuts, cuts[1:]) if hi > lo or len(cuts) == 2]
+
+    # Method to get the Unit for a piece of text, from the cache when it was seen before
+    def unit(self, text):
+        digest = hashlib.blake2b(text.encode(), digest_size=16).digest()
+        unit = self.cache.get(digest)
+        if unit is not None and unit.text == text:
+            self.cache.move_to_end(digest)
+            return unit
+        self.lexed += 1
+        unit = Unit(text, FastLexer(text).tokenize_store())
+        self.cache[digest] = unit
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return unit
+
+    # True if the unit's last token cannot continue into a following 'function'
+    def ends_cleanly(self, unit):
+        tokens = unit.tokens
+        if not len(tokens) or tokens.ends[-1] < len(unit.text):
+            return True  # Whitespace (or nothing) before the next unit
+        kind, last = tokens.type_at(len(tokens) - 1), unit.text[-1]
+        if kind == 'STRING':
+            return len(unit.text) - tokens.starts[-1] >= 2 and last == '"'  # Closed string
+        return not (last.isalnum() or last == '_')
+
+    # Method to parse every unit and build the state
+    def build(self, units):
+        last = len(units) - 1
+        for index, unit in enumerate(units):
+            self.validate(unit, index == last)
+        return ParseState(units)
+
+    # Method to parse a unit unless it has a result for its position (last or not) already
+    def validate(self, unit, is_last):
+        if is_last not in unit.results and unit.name is not None:
+            unit.results[is_last] = self.parse_unit(unit, is_last)
+
+    # Method to validate one unit; returns the SyntaxError Parser would report for it, or None
+    def parse_unit(self, unit, is_last):
+        self.parsed += 1
+        tokens = unit.tokens
+        if not is_last:  # The next unit starts with 'function', which no statement accepts
+            tokens = tokens.slice(0, len(tokens))
+            tokens.append('KEYWORD', 'function', len(unit.text), len(unit.text))
+        parser = UnitParser(tokens)
+        try:
+            parser.parse_function()
+        except (SyntaxError, IndexError, RecursionError) as error:
+            return parser.syntax_error(error).with_traceback(None)
+        return None
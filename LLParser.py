@@ -0,0 +1,446 @@
+from globals import LOGICAL_OPERATOR, PUNCTUATION, TOKEN_CODES
+from Parser import Parser, SyntaxError
+
+# Grammar symbols. Terminals that do not match fail through Parser.expect, so with the
+# same messages; 'take' symbols consume a token the table already chose; actions build
+# the AST on a value stack.
+#   ('t', type, value, keep, message, code)  expect(type, value); value may be a set of values,
+#                                            'message' replaces the error, 'code' is the kind code
+#   ('take', keys, keep)                     consume the current token; 'keys' are its FIRST set
+#   ('n', name)                              nonterminal
+#   ('a', function)                          semantic action: function(parser, values)
+# Lookahead keys are (type, value) pairs; (type, None) matches any value of that type.
+
+
+def T(token_type, value=None, keep=False, message=None):
+    return ('t', token_type, value, keep, message, TOKEN_CODES[token_type])
+
+
+def TAKE(*keys, keep=True):
+    return ('take', frozenset(keys), keep)
+
+
+def N(name):
+    return ('n', name)
+
+
+def A(function):
+    return ('a', function)
+
+
+IDENT, NUMBER, STRING = ('IDENTIFIER', None), ('NUMBER', None), ('STRING', None)
+
+
+def P(value):
+    return T('PUNCTUATION', value)
+
+
+# ---------------------------------------------------------------- actions
+# An action runs right after the last symbol of its construct, so the last token of
+# the construct is at parser.current_pos - 1; that gives the spans of the nodes.
+
+
+def push_list(parser, values):
+    values.append([])
+
+
+def push_none(parser, values):
+    values.append(None)
+
+
+def append(parser, values):
+    node = values.pop()
+    values[-1].append(node)
+
+
+def append_operand(parser, values):
+    token = values.pop()
+    values[-1].append(parser.operand(token))
+
+
+def operand(parser, values):
+    values[-1] = parser.operand(values[-1])
+
+
+def make_null(parser, values):
+    values[-1] = parser.make_node('Null', values[-1])
+
+
+def start_chain(parser, values):
+    # Operands and operators of 'a op b op c', and the index of its first token
+    values[-1] = ([parser.operand(values[-1])], [], parser.current_pos - 1)
+
+
+def extend_chain(parser, values):
+    token = values.pop()
+    operator = values.pop()
+    operands, operators, _ = values[-1]
+    operators.append(operator)
+    operands.append(parser.operand(token))
+
+
+def finish_chain(parser, values):
+    values[-1] = parser.build_arithmetic(*values[-1])
+
+
+def begin_statement(parser, values):
+    # The stack holds [... Statements, append, end_statement, Statement] here
+    parser.open_statements.append((len(parser.stack) - 3, len(values)))
+
+
+def end_statement(parser, values):
+    parser.open_statements.pop()
+
+
+def begin_block(parser, values):
+    values.append(parser.current_pos - 1)  # The '{' just matched
+    values.append([])
+
+
+def make_block(parser, values):
+    statements = values.pop()
+    first = values.pop()
+    values.append(parser.make_node('Block', children=statements, span=(first, parser.current_pos)))  # Up to its '}'
+
+
+def make_params(parser, values):
+    span = (values[-2].index + 1, parser.current_pos - 1)  # From the '(' after the name to the ')'
+    values[-1] = parser.make_node('Params', children=values[-1], span=span)
+
+
+def make_function(parser, values):
+    body = values.pop()
+    params = values.pop()
+    name = values.pop()
+    span = (name.index - 1, parser.current_pos - 1)
+    values.append(parser.make_node('Function', name, [params, body], name['value'], span))
+
+
+def make_return(parser, values):
+    value = values.pop()
+    keyword = values.pop()
+    values.append(parser.make_node('Return', keyword, [value], span=(keyword.index, parser.current_pos - 1)))
+
+
+def make_call(parser, values):
+    args = values.pop()
+    name = values.pop()
+    values.append(parser.make_node('Call', name, args, name['value'], (name.index, parser.current_pos - 1)))
+
+
+def make_assign(parser, values):
+    value = values.pop()
+    name = values.pop()
+    values.append(parser.make_node('Assign', name, [value], name['value'], (name.index, parser.current_pos - 1)))
+
+
+def make_declare(parser, values):
+    value = values.pop()
+    name = values.pop()
+    span = (name.index - 1, parser.current_pos - 1)  # From 'MANLO'
+    values.append(parser.make_node('Declare', name, [value], name['value'], span))
+
+
+def make_compare(parser, values):
+    right = values.pop()
+    operator = values.pop()
+    left = values.pop()
+    span = (operator.index - 1, operator.index + 1)  # Single-token operands; the ';' is not part of it
+    values.append(parser.make_node('Compare', operator, [left, right], operator['value'], span))
+
+
+def make_if(parser, values):
+    otherwise = values.pop()
+    block = values.pop()
+    condition = values.pop()
+    keyword = values.pop()
+    children = [condition, block] if otherwise is None else [condition, block, otherwise]
+    values.append(parser.make_node('If', keyword, children, span=(keyword.index, parser.current_pos - 1)))
+
+
+def make_while(parser, values):
+    block = values.pop()
+    condition = values.pop()
+    keyword = values.pop()
+    span = (keyword.index, parser.current_pos - 1)
+    values.append(parser.make_node('While', keyword, [condition, block], span=span))
+
+
+def make_for(parser, values):
+    block = values.pop()
+    update = values.pop()
+    condition = values.pop()
+    init = values.pop()
+    keyword = values.pop()
+    span = (keyword.index, parser.current_pos - 1)
+    values.append(parser.make_node('For', keyword, [init, condition, update, block], span=span))
+
+
+# ---------------------------------------------------------------- grammar
+
+# The language accepted by Parser, one list of alternatives per nonterminal
+GRAMMAR = {
+    'Function': [[
+        T('KEYWORD', 'function'), T('IDENTIFIER', keep=True), P('('), A(push_list), N('Params'),
+        P(')'), A(make_params), P('{'), N('Block'), P('}'), A(make_function),
+    ]],
+    'Params': [[TAKE(IDENT), A(append_operand), N('MoreParams')], []],
+    'MoreParams': [[TAKE(('PUNCTUATION', ','), keep=False), T('IDENTIFIER', keep=True), A(append_operand), N('MoreParams')], []],
+    'Block': [[A(begin_block), N('Statements'), A(make_block)]],
+    'Statements': [[N('Statement'), A(append), N('Statements')], []],
+    'Statement': [
+        [T('KEYWORD', 'return', keep=True), N('Expression'), P(';'), A(make_return)],
+        [T('KEYWORD', 'if', keep=True), P('('), N('Condition'), P(')'), P('{'), N('Block'), P('}'), N('Else'), A(make_if)],
+        [T('KEYWORD', 'while', keep=True), P('('), N('Condition'), P(')'), P('{'), N('Block'), P('}'), A(make_while)],
+        [T('KEYWORD', 'for', keep=True), P('('), N('Declaration'), N('Condition'), N('Assignment'), P(')'),
+         P('{'), N('Block'), P('}'), A(make_for)],
+        [N('Declaration')],
+        [T('IDENTIFIER', keep=True), N('AssignOrCall')],
+    ],
+    'AssignOrCall': [
+        [A(push_list), P('('), N('Arguments'), P(')'), P(';'), A(make_call)],
+        [T('OPERATOR', '='), N('Expression'), P(';'), A(make_assign)],
+    ],
+    'Arguments': [[TAKE(IDENT, NUMBER, STRING), A(append_operand), N('MoreArguments')], []],
+    'MoreArguments': [[TAKE(('PUNCTUATION', ','), keep=False), N('Argument'), N('MoreArguments')], []],
+    'Argument': [[TAKE(IDENT, NUMBER, STRING), A(append_operand)]],
+    'Declaration': [[
+        T('KEYWORD', 'MANLO', message="Invalid Declaration"), T('IDENTIFIER', keep=True), T('OPERATOR', '='),
+        N('Expression'), P(';'), A(make_declare),
+    ]],
+    'Assignment': [[T('IDENTIFIER', keep=True), T('OPERATOR', '='), N('Expression'), P(';'), A(make_assign)]],
+    'Else': [[TAKE(('KEYWORD', 'else'), keep=False), P('{'), N('Block'), P('}')], [A(push_none)]],
+    'Condition': [[N('ConditionOperand'), T('OPERATOR', LOGICAL_OPERATOR, keep=True), N('ConditionOperand'), P(';'), A(make_compare)]],
+    'ConditionOperand': [[TAKE(IDENT, NUMBER), A(operand)]],
+    'Expression': [
+        [TAKE(IDENT, NUMBER), A(start_chain), N('Chain'), A(finish_chain)],
+        [TAKE(STRING), A(operand)],
+        [TAKE(*(('PUNCTUATION', value) for value in sorted(PUNCTUATION))), A(make_null)],  # A lone punctuation token
+    ],
+    'Chain': [[TAKE(*(('OPERATOR', value) for value in '+-*/')), N('ChainOperand'), A(extend_chain), N('Chain')], []],
+    'ChainOperand': [[TAKE(IDENT, NUMBER)]],
+}
+
+# Entries the FIRST/FOLLOW sets cannot express, because Parser looks at the value of
+# these tokens only: a string "}" ends a block, a string "(" or "=" after an
+# identifier picks the call or assignment (and then fails to match).
+OVERRIDES = {
+    'Statements': {('STRING', '}'): 1},
+    'AssignOrCall': {('STRING', '('): 0, ('STRING', '='): 1},
+}
+
+
+# Errors raised when no entry matches, with the messages of Parser
+def statement_error(parser):
+    kind = 'keyword' if parser.current_type() == 'KEYWORD' else 'token'
+    raise SyntaxError(f"Unexpected {kind} '{parser.current_value()}'", parser.current_token())
+
+
+def error(message):
+    def raise_error(parser):
+        raise SyntaxError(message.format(value=parser.current_value()), parser.current_token())
+    return raise_error
+
+
+# What a nonterminal does for a lookahead without a table entry: use one of its
+# alternatives (as the recursive parser does in its 'else' branches) or fail
+DEFAULTS = {
+    'Function': 0, 'Params': 1, 'Block': 0, 'Statements': 0, 'Arguments': 1, 'Declaration': 0,
+    'Assignment': 0, 'Else': 1, 'Condition': 0, 'Chain': 1,
+    'MoreParams': error("Unexpected parameter syntax"),
+    'Statement': statement_error,
+    'AssignOrCall': error("Expected '(' or '=' after identifier"),
+    'MoreArguments': error("Unexpected token in function arguments. Expected ',' or ')', got '{value}'"),
+    'Argument': error(
+        "Unexpected token in function arguments. Expected 'IDENTIFIER', 'NUMBER', or 'STRING', got '{value}'"
+    ),
+    'ConditionOperand': error("Unexpected keyword"),
+    'Expression': error("Unexpected expression syntax"),
+    'ChainOperand': error("Expected identifier or number after operator"),
+}
+
+
+# Method to get the lookahead keys a grammar symbol can start with (None if it is transparent)
+def symbol_first(symbol, first):
+    kind = symbol[0]
+    if kind == 't':
+        token_type, value = symbol[1], symbol[2]
+        if isinstance(value, set):
+            return {(token_type, item) for item in value}
+        return {(token_type, value)}
+    if kind == 'take':
+        return set(symbol[1])
+    if kind == 'n':
+        return first[symbol[1]]
+    return None  # Actions consume nothing
+
+
+# Method to compute FIRST of a sequence of symbols; returns (keys, nullable)
+def sequence_first(symbols, first, nullable):
+    keys = set()
+    for symbol in symbols:
+        start = symbol_first(symbol, first)
+        if start is None:
+            continue
+        keys |= start
+        if symbol[0] != 'n' or symbol[1] not in nullable:
+            return keys, False
+    return keys, True
+
+
+# Method to compute the FIRST sets, the nullable nonterminals and the FOLLOW sets
+def first_follow(grammar):
+    first = {name: set() for name in grammar}
+    nullable = set()
+    changed = True
+    while changed:
+        changed = False
+        for name, alternatives in grammar.items():
+            for symbols in alternatives:
+                keys, empty = sequence_first(symbols, first, nullable)
+                if not keys <= first[name] or (empty and name not in nullable):
+                    first[name] |= keys
+                    if empty:
+                        nullable.add(name)
+                    changed = True
+    follow = {name: set() for name in grammar}
+    changed = True
+    while changed:
+        changed = False
+        for name, alternatives in grammar.items():
+            for symbols in alternatives:
+                for index, symbol in enumerate(symbols):
+                    if symbol[0] != 'n':
+                        continue
+                    keys, empty = sequence_first(symbols[index + 1:], first, nullable)
+                    if empty:
+                        keys = keys | follow[name]
+                    if not keys <= follow[symbol[1]]:
+                        follow[symbol[1]] |= keys
+                        changed = True
+    return first, nullable, follow
+
+
+# Method to build the parse table. A row maps a token kind code to the reversed
+# productions for specific values of that kind and the one for any other value.
+def build_table(grammar):
+    first, nullable, follow = first_follow(grammar)
+    table = {}
+    for name, alternatives in grammar.items():
+        entries = {}
+        for index, symbols in enumerate(alternatives):
+            keys, empty = sequence_first(symbols, first, nullable)
+            if empty:
+                keys = keys | follow[name]
+            for key in keys:
+                if key in entries and entries[key] != index:
+                    raise ValueError(f"LL(1) conflict in {name} on {key}")
+                entries[key] = index
+        entries.update(OVERRIDES.get(name, {}))
+        row = {}
+        for (token_type, value), index in entries.items():
+            by_value, generic = row.get(TOKEN_CODES[token_type], ({}, None))
+            production = tuple(reversed(alternatives[index]))
+            if value is None:
+                generic = production
+            else:
+                by_value[value] = production
+            row[TOKEN_CODES[token_type]] = (by_value, generic)
+        table[name] = row
+    return table
+
+
+# Method to get the default production (reversed) or error function per nonterminal
+def build_fallbacks(grammar):
+    return {
+        name: tuple(reversed(grammar[name][default])) if isinstance(default, int) else default
+        for name, default in DEFAULTS.items()
+    }
+
+
+# In recovery mode every statement records where it began, so that an error inside it
+# can drop what is left of it from both stacks
+RECOVERY_GRAMMAR = dict(GRAMMAR, Statements=[
+    [A(begin_statement), N('Statement'), A(end_statement), A(append), N('Statements')], [],
+])
+
+TABLE, FALLBACKS = build_table(GRAMMAR), build_fallbacks(GRAMMAR)
+RECOVERY_TABLE, RECOVERY_FALLBACKS = build_table(RECOVERY_GRAMMAR), build_fallbacks(RECOVERY_GRAMMAR)
+
+
+# Define the LLParser class: parses every function with the precomputed table and an
+# explicit stack, so nesting depth costs no Python stack. It accepts the same language
+# as Parser, builds the same AST and raises the same errors, also in recovery mode.
+class LLParser(Parser):
+    # Method to parse a function declaration from the current position
+    def parse_function(self):
+        if not self.recover:
+            stack, values = [('n', 'Function')], []
+            self.drive(stack, values, TABLE, FALLBACKS)
+            return values.pop()
+        self.stack = stack = [('n', 'Function')]  # Symbols still to match, top last
+        values = []  # Tokens and nodes of the constructs being built
+        self.open_statements = []  # (stack size, value count) to restore per statement being parsed
+        while True:
+            try:
+                self.drive(stack, values, RECOVERY_TABLE, RECOVERY_FALLBACKS)
+                return values.pop()
+            except (SyntaxError, IndexError) as error:
+                if not self.open_statements:
+                    raise  # Not inside a block: give up on this function
+                # Drop the failed statement, like the handler in Parser.parse_statements
+                stack_size, value_count = self.open_statements.pop()
+                del stack[stack_size:]
+                del values[value_count:]
+                error = self.record(error)
+                if not self.synchronize():
+                    raise error
+
+    # Method to run the parse table on the explicit stack until it is empty
+    def drive(self, stack, values, table, fallbacks):
+        kinds, refs, values_column = self.kinds, self.refs, self.values
+        while stack:
+            symbol = stack.pop()
+            kind = symbol[0]
+            if kind == 'n':
+                # One lookup picks the production for the current token
+                pos = self.current_pos
+                production = None
+                entry = table[symbol[1]].get(kinds[pos])
+                if entry is not None:
+                    production = entry[0].get(values_column[refs[pos]], entry[1])
+                if production is None:
+                    production = fallbacks[symbol[1]]
+                    if not isinstance(production, tuple):
+                        production(self)  # Raises the error
+                stack.extend(production)
+            elif kind == 't':
+                pos = self.current_pos
+                expected = symbol[2]
+                if kinds[pos] != symbol[5]:
+                    self.mismatch(symbol)  # Raises the error expect would raise
+                elif expected is not None:
+                    value = values_column[refs[pos]]
+                    if not (value in expected if isinstance(expected, set) else value == expected):
+                        self.mismatch(symbol)
+                self.current_pos = pos + 1
+                if symbol[3]:
+                    values.append(self.tokens[pos])
+            elif kind == 'take':
+                if symbol[2]:
+                    values.append(self.tokens[self.current_pos])
+                self.current_pos += 1
+            else:
+                symbol[1](self, values)
+
+    # Method to raise the error of a terminal that does not match the current token
+    def mismatch(self, symbol):
+        try:
+            if isinstance(symbol[2], set):
+                self.expect_multiple_values(symbol[1], symbol[2])
+            else:
+                self.expect(symbol[1], symbol[2])
+        except SyntaxError as e:
+            if symbol[4] is None:
+                raise
+            raise SyntaxError(symbol[4], e.token)
@@ -0,0 +1,78 @@
+from collections import deque
+from globals import BUILTINS, NODE_CODES
+from Parser import Parser, SyntaxError
+
+
+# Define the LazyParser class: parses only what an entry point can reach. The entry
+# function is parsed first and the call sites in its body ('add();') name the
+# functions to parse next, so bodies that are never called are never parsed and an
+# error in one of them goes unnoticed. Besides the AST of the reachable functions it
+# builds the call graph and lists the unreachable functions and the undefined callees.
+class LazyParser(Parser):
+    def __init__(self, tokens, entry='main', recover=False, max_errors=100):
+        self.entry = entry  # Name of the function parsing starts from
+        self.calls = {}  # Function name -> names it calls, in order of first call
+        self.undefined = {}  # Called name that is neither declared nor a builtin -> the call tokens
+        self.reached = []  # Names of the functions parsed, in the order they were reached
+        super().__init__(tokens, recover, max_errors)
+        self.declared = {fun['name'] for fun in self.funcs}  # Names of all detected functions
+        if entry not in self.declared and entry != 'main':  # A missing main is reported already
+            self.report(SyntaxError(f"No function '{entry}' detected"))
+
+    # Method to get the functions to parse: a worklist seeded with the entry point, to
+    # which parse_function adds the callees of every function it parses
+    def functions_to_parse(self):
+        by_name = {fun['name']: fun for fun in self.funcs}
+        pending = deque([self.entry] if self.entry in by_name else [])
+        queued = set(pending)
+        while pending:
+            name = pending.popleft()
+            self.reached.append(name)
+            yield by_name[name]
+            # The function has been parsed: queue the callees it declared
+            for callee in self.calls.get(name, ()):
+                if callee in by_name and callee not in queued:
+                    queued.add(callee)
+                    pending.append(callee)
+
+    # Method to parse a function declaration and record the calls in its body
+    def parse_function(self):
+        function = super().parse_function()
+        callees = {}  # Used as an ordered set
+        for name, token in self.call_sites(function):
+            callees[name] = None
+            if name not in self.declared and name not in BUILTINS:
+                self.undefined.setdefault(name, []).append(token)
+        self.calls[function.value if self.pool is None else self.pool.value(function)] = list(callees)
+        return function
+
+    # Generator over the (name, token) of the calls in a function, in pre-order. The
+    # function is a Node, or an index into the NodePool when parse_pool builds one.
+    def call_sites(self, function):
+        pool = self.pool
+        if pool is not None:
+            call = NODE_CODES['Call']
+            for index, _ in pool.preorder(function):
+                if pool.kinds[index] == call:
+                    yield pool.value(index), self.tokens[pool.token[index]]
+            return
+        nodes = [function]
+        while nodes:
+            node = nodes.pop()
+            if node.kind == 'Call':
+                yield node.value, node.token
+            nodes.extend(reversed(node.children))
+
+    # Method to parse the reachable functions; the Program lists them in source order
+    def parse(self):
+        program = super().parse()
+        if self.pool is None:
+            program.children.sort(key=lambda function: function.token.index)
+        else:
+            self.pool.sort_children(program, self.pool.token.__getitem__)
+        return program
+
+    # Method to get the names of the functions the entry point never reaches, in source order
+    def unreachable(self):
+        reached = set(self.reached)
+        return [fun['name'] for fun in self.funcs if fun['name'] not in reached]
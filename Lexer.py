@@ -1,5 +1,6 @@
 # Import the necessary constants from the 'globals' module
 from globals import KEYWORDS, OPERATORS, PUNCTUATION, TOKEN_TYPES
+from TokenStore import TokenStore
 
 # Define the Lexer class to tokenize a given source code into a list of tokens
 class Lexer:
@@ -7,6 +8,7 @@ class Lexer:
     def __init__(self, source_code):
         self.source_code = source_code  # The source code to be tokenized
         self.tokens = []  # A list to hold the generated tokens
+        self.spans = []  # (start, end) offsets of each token, the end excluded
         self.current_pos = 0  # Position of the current character in the source code
         self.current_char = source_code[0] if source_code else None  # Current character being processed
 
@@ -23,28 +25,41 @@ class Lexer:
     def tokenize(self):
         # Loop through all characters in the source code
         while self.current_char is not None:
+            start_pos = self.current_pos  # Where the next token starts
             if self.current_char.isspace():  # If the current character is a space
                 self.advance()  # Skip whitespace
+                continue
             elif self.current_char.isdigit():  # If it's a digit
-                self.tokens.append(self.read_number())  # Read the number token
+                token = self.read_number()  # Read the number token
             elif self.current_char.isalpha() or self.current_char == "_":  # If it's an identifier
-                self.tokens.append(self.read_identifier())  # Read the identifier or keyword
+                token = self.read_identifier()  # Read the identifier or keyword
             elif self.current_char == '"':  # If it's a double quote
-                self.tokens.append(self.read_string())  # Read the string literal
-            elif self.current_char in OPERATORS:  # If it's an operator
-                self.tokens.append(self.read_operator())  # Read the operator token
+                token = self.read_string()  # Read the string literal
+            elif (
+                self.current_char in OPERATORS  # If it's an operator
+                or self.source_code[self.current_pos:self.current_pos + 2] in OPERATORS  # or starts one like '!='
+            ):
+                token = self.read_operator()  # Read the operator token
             elif self.current_char in PUNCTUATION:  # If it's punctuation
-                self.tokens.append(self.read_punctuation())  # Read the punctuation token
+                token = self.read_punctuation()  # Read the punctuation token
             else:
                 # If it's an unknown character, create an 'unknown' token
-                self.tokens.append(
-                    {'type': TOKEN_TYPES['UNKNOWN'], 'value': self.current_char}
-                )
+                token = {'type': TOKEN_TYPES['UNKNOWN'], 'value': self.current_char}
                 self.advance()  # Move to the next character
-        
+            self.tokens.append(token)
+            # Record where the token starts and ends (an unterminated string ends with the source)
+            self.spans.append((start_pos, min(self.current_pos, len(self.source_code))))
+
         # Return the list of tokens once the source code has been fully tokenized
         return self.tokens
 
+    # Method to tokenize the source code into a compact TokenStore with source positions
+    def tokenize_store(self):
+        store = TokenStore(self.source_code)
+        for token, (start, end) in zip(self.tokenize(), self.spans):
+            store.append(token['type'], token['value'], start, end)
+        return store
+
     # Method to read a number from the source code
     def read_number(self):
         start_pos = self.current_pos  # Remember where the number starts
@@ -87,13 +102,12 @@ class Lexer:
 
     # Method to read an operator from the source code
     def read_operator(self):
-        # Check for the special case of '==' operator
-        if self.current_char == '=' and (
-            self.current_pos + 1 < len(self.source_code)  # Ensure within bounds
-            and self.source_code[self.current_pos + 1] == '='  # Next character is also '='
-        ):
-            self.advance()  # Advance past the first '='
         operator = self.current_char  # Capture the current character (operator)
+        # Check for the two-character operators '==', '!=', '>=' and '<='
+        pair = self.source_code[self.current_pos:self.current_pos + 2]
+        if pair in OPERATORS:
+            operator = pair  # Use the longer operator
+            self.advance()  # Advance past the first character
         self.advance()  # Move to the next character
         # Return a token with the operator's value
         return {
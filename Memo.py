@@ -0,0 +1,71 @@
+from collections import OrderedDict
+from globals import CALL, CALL_BUILTIN
+
+# Default number of results kept by a MemoCache
+MEMO_SIZE = 4096
+
+
+# Method to find the pure functions among compiled functions: those that call no
+# builtin (the only builtin, 'print', writes output) and only call pure functions.
+# Variables are always locals or parameters in YAH, so nothing else can leak out.
+# Returns the set of their indexes.
+def pure_functions(functions):
+    callees = []  # Index -> indexes of the functions it calls
+    impure = set()
+    for index, function in enumerate(functions):
+        code = function.code
+        called = set()
+        for pc in range(0, len(code), 2):
+            if code[pc] == CALL:
+                called.add(code[pc + 1])
+            elif code[pc] == CALL_BUILTIN:
+                impure.add(index)
+        callees.append(called)
+    # Callers of an impure function are impure; repeat until nothing changes
+    changed = True
+    while changed:
+        changed = False
+        for index, called in enumerate(callees):
+            if index not in impure and not called.isdisjoint(impure):
+                impure.add(index)
+                changed = True
+    return set(range(len(functions))) - impure
+
+
+# Define the MemoCache class: a bounded LRU map from (function index, arguments) to
+# the value the call returned, with hit and miss counts
+class MemoCache:
+    def __init__(self, size=MEMO_SIZE):
+        self.size = size  # Maximum number of results kept
+        self.results = OrderedDict()  # Key -> returned value, least recently used first
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # Method to look a call up; returns (True, value) on a hit, (False, None) on a miss
+    def lookup(self, key):
+        results = self.results
+        if key in results:
+            results.move_to_end(key)
+            self.hits += 1
+            return True, results[key]
+        self.misses += 1
+        return False, None
+
+    # Method to remember the value a call returned
+    def store(self, key, value):
+        results = self.results
+        results[key] = value
+        results.move_to_end(key)
+        if len(results) > self.size:
+            results.popitem(last=False)
+            self.evictions += 1
+
+    # Method to get the statistics as a dict, for reports
+    def stats(self):
+        calls = self.hits + self.misses
+        return {
+            'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+            'entries': len(self.results), 'size': self.size,
+            'hit_rate': self.hits / calls if calls else 0.0,
+        }
@@ -0,0 +1,224 @@
+import struct
+import sys
+from array import array
+from globals import NODE_CODES, NODE_KINDS
+from AST import Node
+
+# Kinds whose value is the value of their token (names, operators, literals)
+TOKEN_VALUED = {'Function', 'Declare', 'Assign', 'Call', 'Compare', 'BinOp', 'Name', 'String'}
+
+# Layout of a serialized pool: header | kinds (B) | first_child (i) | next_sibling (i) |
+# token (i) | starts (q) | ends (q)
+MAGIC = b'YAHN'
+HEADER = struct.Struct('=4sBBqq')  # magic, byte order, reserved, node count, root
+
+
+# Define the NodePool class: the AST as parallel typed arrays, one entry per node.
+# Children are linked through first_child and next_sibling (-1 for none); names,
+# operators and literals are not copied but read from the node's token in the
+# TokenStore. A node's span runs from the first to the last token the parser consumed
+# for it, as source offsets (-1 when unknown). A pool costs 29 bytes per node and no objects.
+class NodePool:
+    def __init__(self, tokens):
+        self.tokens = tokens  # TokenStore the token indexes refer to
+        self.kinds = array('B')  # Node kind codes (see NODE_KINDS)
+        self.first_child = array('i')  # Index of the first child, -1 for a leaf
+        self.next_sibling = array('i')  # Index of the next child of the same parent, -1 for the last
+        self.token = array('i')  # Index of the node's token, -1 if it has none
+        self.starts = array('q')  # Span start offset
+        self.ends = array('q')  # Span end offset
+        self.root = -1  # Index of the Program node once parsed
+
+    # Method to add a node; same signature as Node(), so that it can serve as
+    # Parser.make_node. 'children' are indexes of nodes added before; the value is
+    # not stored, as it is derived from the token. 'span' is the (first, last) index
+    # of the tokens of the construct; without it the node spans its own token.
+    # Returns the index of the node.
+    def add(self, kind, token=None, children=(), value=None, span=None):
+        index = len(self.kinds)
+        token_index = -1 if token is None else token.index
+        first, last = (token_index, token_index) if span is None else span
+        if 0 <= first <= last:
+            start, end = self.tokens.starts[first], self.tokens.ends[last]
+        else:
+            start = end = -1
+        first_child = -1
+        if children:
+            first_child = children[0]
+            next_sibling = self.next_sibling
+            for previous, child in zip(children, children[1:]):
+                next_sibling[previous] = child
+        self.kinds.append(NODE_CODES[kind])
+        self.first_child.append(first_child)
+        self.next_sibling.append(-1)
+        self.token.append(token_index)
+        self.starts.append(start)
+        self.ends.append(end)
+        return index
+
+    def __len__(self):
+        return len(self.kinds)
+
+    # Method to get the kind name of a node
+    def kind(self, index):
+        return NODE_KINDS[self.kinds[index]]
+
+    # Method to get the value of a node, as Node.value holds it
+    def value(self, index):
+        token = self.token[index]
+        kind = NODE_KINDS[self.kinds[index]]
+        if kind == 'Number':
+            text = self.tokens.value_at(token)
+            return int(text) if text.isdecimal() else text
+        if kind in TOKEN_VALUED:
+            return self.tokens.value_at(token)
+        return None
+
+    # Generator over the indexes of the children of a node
+    def children(self, index):
+        child = self.first_child[index]
+        next_sibling = self.next_sibling
+        while child != -1:
+            yield child
+            child = next_sibling[child]
+
+    # Method to relink the children of a node in the order of 'key' applied to their indexes
+    def sort_children(self, index, key):
+        children = sorted(self.children(index), key=key)
+        if not children:
+            return
+        self.first_child[index] = children[0]
+        for previous, child in zip(children, children[1:]):
+            self.next_sibling[previous] = child
+        self.next_sibling[children[-1]] = -1
+
+    # Generator over (index, depth) of a subtree in pre-order, without recursion
+    def preorder(self, index=None):
+        first_child, next_sibling = self.first_child, self.next_sibling
+        stack = [(self.root if index is None else index, 0)]
+        while stack:
+            index, depth = stack.pop()
+            yield index, depth
+            child = first_child[index]
+            if child != -1:
+                # Push the children last to first so the first is visited next
+                children = []
+                while child != -1:
+                    children.append(child)
+                    child = next_sibling[child]
+                stack.extend((child, depth + 1) for child in reversed(children))
+
+    # Method to get a cursor at a node (the root by default)
+    def cursor(self, index=None):
+        return Cursor(self, self.root if index is None else index)
+
+    # Method to convert a subtree (the whole program by default) into Node objects,
+    # for the passes that work on trees; only the nodes of the subtree are visited
+    def to_node(self, index=None):
+        index = self.root if index is None else index
+        tokens = self.tokens
+        built = []  # Nodes whose parent is not built yet, in pre-order
+        # Reversed pre-order meets every node after its children, so they are the
+        # nodes on top of 'built', last child on top
+        for current, _ in reversed(list(self.preorder(index))):
+            count = 0
+            child = self.first_child[current]
+            while child != -1:
+                count += 1
+                child = self.next_sibling[child]
+            children = built[len(built) - count:]
+            del built[len(built) - count:]
+            token = self.token[current]
+            built.append(Node(
+                NODE_KINDS[self.kinds[current]], None if token < 0 else tokens[token],
+                reversed(children), self.value(current),
+            ))
+        return built[0]
+
+    # Method to serialize the pool into bytes, for caching or sending to a worker
+    # process; the TokenStore is not included
+    def to_bytes(self):
+        header = HEADER.pack(MAGIC, sys.byteorder == 'big', 0, len(self), self.root)
+        return header + b''.join(column.tobytes() for column in (
+            self.kinds, self.first_child, self.next_sibling, self.token, self.starts, self.ends,
+        ))
+
+    # Method to rebuild a pool from to_bytes() output and the TokenStore it refers to
+    @classmethod
+    def from_bytes(cls, data, tokens):
+        magic, big_endian, _, count, root = HEADER.unpack_from(data)
+        if magic != MAGIC or big_endian != (sys.byteorder == 'big'):
+            raise ValueError("Not a node pool written by this machine")
+        pool = cls(tokens)
+        pool.root = root
+        offset = HEADER.size
+        for column in (pool.kinds, pool.first_child, pool.next_sibling, pool.token, pool.starts, pool.ends):
+            size = count * column.itemsize
+            column.frombytes(data[offset:offset + size])
+            offset += size
+        return pool
+
+
+# Define a cursor over a NodePool: moves between parent, children and siblings
+# without creating an object per node, like a tree-sitter TreeCursor
+class Cursor:
+    __slots__ = ('pool', 'index', 'parents')
+
+    def __init__(self, pool, index):
+        self.pool = pool
+        self.index = index  # Node the cursor is on
+        self.parents = []  # Indexes of the ancestors, innermost last
+
+    @property
+    def kind(self):
+        return self.pool.kind(self.index)
+
+    @property
+    def value(self):
+        return self.pool.value(self.index)
+
+    # Token of the node, or None
+    @property
+    def token(self):
+        token = self.pool.token[self.index]
+        return None if token < 0 else self.pool.tokens[token]
+
+    # Source offsets (start, end) covered by the node
+    @property
+    def span(self):
+        return self.pool.starts[self.index], self.pool.ends[self.index]
+
+    # Method to move to the first child; False (and no move) for a leaf
+    def goto_first_child(self):
+        child = self.pool.first_child[self.index]
+        if child == -1:
+            return False
+        self.parents.append(self.index)
+        self.index = child
+        return True
+
+    # Method to move to the next sibling; False (and no move) for the last child
+    def goto_next_sibling(self):
+        sibling = self.pool.next_sibling[self.index]
+        if sibling == -1 or not self.parents:
+            return False
+        self.index = sibling
+        return True
+
+    # Method to move to the parent; False (and no move) at the node the cursor started from
+    def goto_parent(self):
+        if not self.parents:
+            return False
+        self.index = self.parents.pop()
+        return True
+
+
+# Define a visitor over a NodePool, like ast.NodeVisitor: visit() calls the method
+# 'visit_<Kind>' for the node, or generic_visit, which visits the children
+class NodeVisitor:
+    def visit(self, pool, index):
+        return getattr(self, 'visit_' + NODE_KINDS[pool.kinds[index]], self.generic_visit)(pool, index)
+
+    def generic_visit(self, pool, index):
+        for child in pool.children(index):
+            self.visit(pool, child)
@@ -0,0 +1,306 @@
+from collections import Counter
+from AST import Node
+
+# Upper bound on simplify/propagate rounds per function; each round only shrinks the tree
+MAX_PASSES = 10
+
+# Python implementations of the comparison operators, for folding literal conditions
+COMPARISONS = {
+    '<': lambda a, b: a < b, '<=': lambda a, b: a <= b,
+    '>': lambda a, b: a > b, '>=': lambda a, b: a >= b,
+    '==': lambda a, b: a == b, '!=': lambda a, b: a != b,
+}
+
+
+# Define the Optimizer class: rewrites a copy of the AST of every function before it
+# is compiled.
+#   -O0  nothing
+#   -O1  constant folding, dead if/while branches, code after 'return'
+#   -O2  -O1 plus constant/copy propagation and dead MANLO store elimination
+# Every rewrite is counted in self.report. No pass recurses: nested blocks go on a
+# work list and expressions are walked with an explicit stack, so any nesting depth
+# the LLParser accepts can be optimized.
+class Optimizer:
+    def __init__(self, level=1):
+        self.level = level  # Optimization level, 0 to 2
+        self.report = {
+            'folded_constants': 0,  # Arithmetic nodes replaced by their value
+            'removed_branches': 0,  # if/while statements decided at compile time
+            'removed_unreachable': 0,  # Statements after a 'return'
+            'propagated_copies': 0,  # Variable reads replaced by a literal or another variable
+            'removed_stores': 0,  # MANLO/assignment statements whose variable is never read
+        }
+
+    # Main method: return an optimized copy of a Program node
+    def optimize(self, program):
+        program = self.clone(program)
+        if self.level <= 0:
+            return program
+        for function in program.children:
+            self.optimize_function(function)
+        return program
+
+    # Method to copy a tree; tokens are shared, nodes are not
+    def clone(self, node):
+        root = Node(node.kind, node.token, (), node.value)
+        nodes = [(node, root)]  # (original, copy) pairs whose children are still to copy
+        while nodes:
+            original, copy = nodes.pop()
+            for child in original.children:
+                copy.children.append(Node(child.kind, child.token, (), child.value))
+                nodes.append((child, copy.children[-1]))
+        return root
+
+    # Method to run the passes on one Function node until nothing changes
+    def optimize_function(self, function):
+        params, body = function.children
+        # Propagation reasons about names, so it needs every name declared only once
+        propagate = self.level >= 2 and self.has_unique_names(function)
+        for _ in range(MAX_PASSES):
+            changed = self.simplify_block(body)
+            if propagate:
+                changed = self.propagate(function) or changed
+                changed = self.remove_dead_stores(function) or changed
+            if not changed:
+                break
+
+    # ----------------------------------------------------------------- -O1
+
+    # Method to fold constants and drop dead code in a Block and the blocks nested in it;
+    # returns True if it changed
+    def simplify_block(self, block):
+        blocks, changed = [block], False
+        while blocks:
+            changed = self.simplify_statements(blocks.pop(), blocks) or changed
+        return changed
+
+    # Method to fold constants and drop dead code in the statements of one Block; the
+    # blocks nested in them are added to 'blocks'. Returns True if it changed.
+    def simplify_statements(self, block, blocks):
+        changed = False
+        statements = []
+        for statement in block.children:
+            kind = statement.kind
+            if kind in {'Declare', 'Assign', 'Return', 'Call'}:
+                folded = [self.fold(child) for child in statement.children]
+                changed = changed or any(new is not old for new, old in zip(folded, statement.children))
+                statement.children = folded
+            elif kind == 'For':
+                init, condition, update, loop_body = statement.children
+                for node in (init, update):
+                    folded = self.fold(node.children[0])
+                    changed = changed or folded is not node.children[0]
+                    node.children[0] = folded
+                blocks.append(loop_body)
+            elif kind == 'Block':
+                blocks.append(statement)
+            elif kind in {'If', 'While'}:
+                blocks.extend(statement.children[1:])  # A branch that is kept is simplified all the same
+                outcome = self.evaluate_condition(statement.children[0])
+                if outcome is not None and not (kind == 'While' and outcome):
+                    # The condition is known: keep the branch that runs, drop the test.
+                    # An endless while loop stays as written.
+                    self.report['removed_branches'] += 1
+                    changed = True
+                    if kind == 'If' and outcome:
+                        statements.append(statement.children[1])
+                    elif kind == 'If' and len(statement.children) == 3:
+                        statements.append(statement.children[2])
+                    continue
+            statements.append(statement)
+            if kind == 'Return' and len(statements) < len(block.children):
+                # Nothing after a 'return' in the same block can run
+                self.report['removed_unreachable'] += len(block.children) - len(statements)
+                changed = True
+                break
+        block.children = statements
+        return changed
+
+    # Method to evaluate a Compare node of two literals; None when it is not constant
+    def evaluate_condition(self, node):
+        left, right = node.children
+        if left.kind not in {'Number', 'String'} or right.kind not in {'Number', 'String'}:
+            return None
+        if not self.is_value(left) or not self.is_value(right):
+            return None
+        if node.value not in {'==', '!='} and type(left.value) is not type(right.value):
+            return None  # Ordering a number against a string fails at runtime; keep it
+        return COMPARISONS[node.value](left.value, right.value)
+
+    # True for literal nodes whose value the VM would use as is
+    def is_value(self, node):
+        return node.kind == 'String' or (node.kind == 'Number' and isinstance(node.value, int))
+
+    # Method to fold an arithmetic expression bottom-up; returns the (possibly new) node.
+    # The BinOps are listed parents first, then folded in reverse, children first.
+    def fold(self, node):
+        if node.kind != 'BinOp':
+            return node
+        operations, nodes = [], [node]
+        while nodes:
+            operation = nodes.pop()
+            if operation.kind == 'BinOp':
+                operations.append(operation)
+                nodes.extend(operation.children)
+        folded = {}  # id of a BinOp -> the node that replaces it
+        for operation in reversed(operations):
+            operation.children = [folded.get(id(child), child) for child in operation.children]
+            folded[id(operation)] = self.fold_operation(operation)
+        return folded[id(node)]
+
+    # Method to fold one BinOp whose operands are folded; returns the (possibly new) node
+    def fold_operation(self, node):
+        left, right = node.children
+        if not self.is_value(left) or not self.is_value(right) or type(left.value) is not type(right.value):
+            return node
+        a, b, op = left.value, right.value, node.value
+        if isinstance(a, str):
+            if op != '+':
+                return node  # Only '+' is defined on strings
+            result = a + b
+        elif op == '+':
+            result = a + b
+        elif op == '-':
+            result = a - b
+        elif op == '*':
+            result = a * b
+        elif b != 0:
+            result = a // b  # Integer division, as in the VM
+        else:
+            return node  # Division by zero is left for the VM to report
+        self.report['folded_constants'] += 1
+        return Node('String' if isinstance(result, str) else 'Number', node.token, value=result)
+
+    # ----------------------------------------------------------------- -O2
+
+    # Method to check that no variable name is declared twice in a function
+    def has_unique_names(self, function):
+        names = [param.value for param in function.children[0].children]
+        names += [node.value for node in self.walk(function.children[1]) if node.kind == 'Declare']
+        return len(names) == len(set(names))
+
+    # Generator over every node below 'node', in pre-order
+    def walk(self, node):
+        nodes = list(reversed(node.children))
+        while nodes:
+            node = nodes.pop()
+            yield node
+            nodes.extend(reversed(node.children))
+
+    # Method to find the Name and Assign nodes the Compiler resolves, i.e. those after the
+    # declaration of their variable and inside its scope; returns their ids. Names are
+    # unique, so a resolved node always refers to the one declaration of its name.
+    # Steps are taken from a stack in compile order: a node, None to end the innermost
+    # scope, or a name whose declaration takes effect there (after its value).
+    def resolved_nodes(self, function):
+        visible = {param.value for param in function.children[0].children}
+        scopes = []  # Names declared in each open scope, innermost last
+        resolved = set()
+        steps = [function.children[1]]
+        while steps:
+            node = steps.pop()
+            if node is None:
+                visible.difference_update(scopes.pop())
+            elif isinstance(node, str):
+                visible.add(node)
+                scopes[-1].append(node)
+            elif node.kind == 'Block':
+                scopes.append([])
+                steps.append(None)
+                steps.extend(reversed(node.children))
+            elif node.kind == 'For':
+                init, condition, update, body = node.children
+                scopes.append([])  # The loop variable lives in the loop's own scope
+                steps.extend((None, update, body, condition, init))
+            elif node.kind == 'Declare':
+                steps.extend((node.value, node.children[0]))  # The value cannot see the name
+            else:
+                if node.kind in {'Name', 'Assign'} and node.value in visible:
+                    resolved.add(id(node))
+                steps.extend(reversed(node.children))
+        return resolved
+
+    # Method to replace reads of variables that are written once with a literal or a copy.
+    # Only reads the Compiler resolves are replaced, so one that would be an undefined
+    # variable at -O0 still is.
+    def propagate(self, function):
+        params = {param.value for param in function.children[0].children}
+        nodes = list(self.walk(function.children[1]))
+        resolved = self.resolved_nodes(function)
+        writes = Counter(node.value for node in nodes if node.kind in {'Declare', 'Assign'})
+        replacements = {}
+        for node in nodes:
+            if node.kind != 'Declare' or writes[node.value] != 1:
+                continue
+            value = node.children[0]
+            if self.is_value(value):
+                replacements[node.value] = value  # MANLO x = <literal>;
+            elif (
+                value.kind == 'Name' and value.value != node.value and id(value) in resolved
+                and writes[value.value] == (0 if value.value in params else 1)
+            ):
+                replacements[node.value] = value  # MANLO x = y; with y never reassigned
+        if not replacements:
+            return False
+        changed = False
+        for node in [function.children[1]] + nodes:
+            for index, child in enumerate(node.children):
+                if child.kind == 'Name' and child.value in replacements and id(child) in resolved:
+                    source = replacements[child.value]
+                    node.children[index] = Node(source.kind, child.token, value=source.value)
+                    self.report['propagated_copies'] += 1
+                    changed = True
+        return changed
+
+    # Method to remove MANLO stores (and later assignments) of variables never read,
+    # when none of them can fail to compile or fail at runtime
+    def remove_dead_stores(self, function):
+        params = {param.value for param in function.children[0].children}
+        nodes = list(self.walk(function.children[1]))
+        resolved = self.resolved_nodes(function)
+        reads = Counter(node.value for node in nodes if node.kind == 'Name')
+        # The init and update of a for-loop are part of the loop, which keeps them
+        loop_variables = {
+            name for node in nodes if node.kind == 'For' for name in (node.children[0].value, node.children[2].value)
+        }
+        stores = {}
+        for node in nodes:
+            if node.kind in {'Declare', 'Assign'}:
+                stores.setdefault(node.value, []).append(node)
+        dead = {
+            name for name, writes in stores.items()
+            if not reads[name] and name not in params and name not in loop_variables
+            and all(self.is_safe_store(write, resolved) for write in writes)
+            and any(write.kind == 'Declare' for write in writes)
+        }
+        if not dead:
+            return False
+        self.remove_statements(function.children[1], dead)
+        return True
+
+    # True for a store that compiles and runs without error: an assignment to a declared
+    # variable of a literal, null or a declared variable
+    def is_safe_store(self, write, resolved):
+        value = write.children[0]
+        if write.kind == 'Assign' and id(write) not in resolved:
+            return False  # Undefined variable
+        if value.kind == 'Name':
+            return id(value) in resolved
+        return value.kind == 'Null' or self.is_value(value)  # Not an invalid number literal
+
+    # Method to drop Declare/Assign statements of the 'dead' variables from a Block tree
+    def remove_statements(self, block, dead):
+        blocks = [block]
+        while blocks:
+            block = blocks.pop()
+            kept = []
+            for statement in block.children:
+                if statement.kind in {'Declare', 'Assign'} and statement.value in dead:
+                    self.report['removed_stores'] += 1
+                    continue
+                if statement.kind == 'Block':
+                    blocks.append(statement)
+                else:
+                    blocks.extend(child for child in statement.children if child.kind == 'Block')
+                kept.append(statement)
+            block.children = kept
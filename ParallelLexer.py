@@ -0,0 +1,169 @@
+from array import array
+from itertools import accumulate
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from FastLexer import FastLexer
+from StreamLexer import StreamLexer
+from TokenStore import TokenStore
+from globals import TOKEN_NAMES
+
+# Sources shorter than this are lexed in-process: starting workers would cost more
+PARALLEL_THRESHOLD = 1 << 20
+# Smallest chunk handed to a worker, in characters
+MIN_CHUNK = 256 << 10
+# Chunks handed out per worker, so an unlucky split does not leave the others idle
+CHUNKS_PER_JOB = 4
+# TokenStore columns in a worker's output, in layout order, and their item sizes
+COLUMNS = ('kinds', 'starts', 'ends', 'refs')
+COLUMN_SIZES = tuple(getattr(TokenStore(), column).itemsize for column in COLUMNS)
+REF_SIZE = COLUMN_SIZES[-1]
+# Bytes per token in a worker's output, and the bytes per token before each column:
+# for 'count' tokens, a column starts at offset * count and spans size * count bytes
+TOKEN_BYTES = sum(COLUMN_SIZES)
+COLUMN_OFFSETS = tuple(accumulate(COLUMN_SIZES, initial=0))[:-1]
+REF_OFFSET = COLUMN_OFFSETS[-1]
+
+
+# Worker entry point: lex source bytes [byte_lo, byte_hi) of the shared memory block
+# 'name', a chunk that starts at character 'char_lo' of the source. The columns are
+# written to a new shared memory block, laid out as kinds | starts | ends | refs, with
+# offsets already global and refs into the chunk's own value table. Returns (block
+# name, token count, values).
+def lex_chunk(name, byte_lo, byte_hi, char_lo):
+    source = SharedMemory(name)
+    try:
+        with source.buf[byte_lo:byte_hi] as view:
+            text = str(view, 'utf-8', 'surrogatepass')
+    finally:
+        source.close()
+    store = TokenStore()
+    store.extend(FastLexer('').spans(text))
+    count = len(store)
+    output = SharedMemory(create=True, size=max(count * TOKEN_BYTES, 1))
+    try:
+        buffer = output.buf
+        columns = (
+            store.kinds, array(store.starts.typecode, map(char_lo.__add__, store.starts)),
+            array(store.ends.typecode, map(char_lo.__add__, store.ends)), store.refs,
+        )
+        for column, offset, size in zip(columns, COLUMN_OFFSETS, COLUMN_SIZES):
+            buffer[offset * count:(offset + size) * count] = column.tobytes()
+        del buffer
+        return output.name, count, store.values
+    finally:
+        output.close()
+
+
+# Worker entry point: renumber in place the refs column of the chunk output block
+# 'name' holding 'count' tokens, through 'mapping' (chunk ref -> store ref)
+def renumber_chunk(name, count, mapping):
+    output = SharedMemory(name)
+    try:
+        with output.buf[REF_OFFSET * count:(REF_OFFSET + REF_SIZE) * count] as buffer:
+            refs = array(TokenStore().refs.typecode)
+            refs.frombytes(buffer)
+            buffer[:] = array(refs.typecode, map(mapping.__getitem__, refs)).tobytes()
+    finally:
+        output.close()
+
+
+# Define the ParallelLexer class: lexes one large source in worker processes. The
+# source is cut at whitespace outside string literals (the only state that crosses a
+# token boundary), copied once into shared memory, and the chunks' tokens are stitched
+# back with global offsets. The result is identical to FastLexer's, value interning
+# order included, since chunks are merged in source order.
+class ParallelLexer:
+    def __init__(self, source_code, jobs=2):
+        self.source_code = source_code  # The source code to be tokenized
+        self.jobs = jobs  # Number of worker processes
+        self.tokens = []
+
+    # Main method to tokenize the source code into tokens, like Lexer.tokenize
+    def tokenize(self):
+        store = self.tokenize_store()
+        self.tokens = [
+            {'type': TOKEN_NAMES[kind], 'value': store.values[ref]} for kind, ref in zip(store.kinds, store.refs)
+        ]
+        return self.tokens
+
+    # Method to tokenize the source code into a TokenStore with source positions
+    def tokenize_store(self):
+        text = self.source_code
+        if self.jobs <= 1 or len(text) < PARALLEL_THRESHOLD:
+            return FastLexer(text).tokenize_store()
+        cuts = self.cuts()
+        if len(cuts) < 3:
+            return FastLexer(text).tokenize_store()  # No safe place to cut
+        pieces = [text[lo:hi].encode('utf-8', 'surrogatepass') for lo, hi in zip(cuts, cuts[1:])]
+        source = SharedMemory(create=True, size=max(sum(len(piece) for piece in pieces), 1))
+        results = []
+        try:
+            tasks, offset = [], 0
+            for piece, char_lo in zip(pieces, cuts):
+                source.buf[offset:offset + len(piece)] = piece
+                tasks.append((source.name, offset, offset + len(piece), char_lo))
+                offset += len(piece)
+            del pieces
+            with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+                results = list(executor.map(lex_chunk, *zip(*tasks)))
+                self.release(source)  # Not needed any more: free it before stitching
+                return self.stitch(results, executor)
+        finally:
+            self.release(source)
+            for name, _, _ in results:
+                self.release(SharedMemory(name))
+
+    # Method to choose the chunk boundaries: [0, cut, ..., len(text)]. Each cut is the
+    # last safe position before its target, so chunks are about the same size.
+    def cuts(self):
+        text = self.source_code
+        size = max(len(text) // (self.jobs * CHUNKS_PER_JOB), MIN_CHUNK)
+        cuts = [0]
+        target = size
+        while target < len(text):
+            cut = StreamLexer.safe_boundary(text, cuts[-1], target)
+            if cut > cuts[-1]:
+                cuts.append(cut)
+                target = cut + size
+            else:
+                target += size  # Inside a long string literal: try further on
+        cuts.append(len(text))
+        return cuts
+
+    # Method to concatenate the chunks' columns into one store. Every chunk's values are
+    # re-interned into the store's table in the order they first occur; the workers
+    # then renumber the chunks' refs in parallel, leaving plain copies to this process.
+    def stitch(self, results, executor):
+        store = TokenStore(self.source_code)
+        values, value_ids = store.values, store.value_ids
+        renumbered = []
+        for name, count, chunk_values in results:
+            mapping = []  # Chunk ref -> store ref
+            for value in chunk_values:
+                ref = value_ids.get(value)
+                if ref is None:
+                    ref = value_ids[value] = len(values)
+                    values.append(value)
+                mapping.append(ref)
+            if mapping != list(range(len(mapping))):  # The first chunk keeps its numbering
+                renumbered.append(executor.submit(renumber_chunk, name, count, mapping))
+        for future in renumbered:
+            future.result()
+        for name, count, _ in results:
+            output = SharedMemory(name)
+            try:
+                with output.buf[:count * TOKEN_BYTES] as buffer:
+                    for column, offset, size in zip(COLUMNS, COLUMN_OFFSETS, COLUMN_SIZES):
+                        getattr(store, column).frombytes(buffer[offset * count:(offset + size) * count])
+            finally:
+                output.close()
+        return store
+
+    # Method to free a shared memory block; freeing it twice is harmless
+    @staticmethod
+    def release(memory):
+        memory.close()
+        try:
+            memory.unlink()
+        except FileNotFoundError:
+            pass
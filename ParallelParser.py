@@ -0,0 +1,124 @@
+from concurrent.futures import ProcessPoolExecutor
+from Parser import Parser, SyntaxError
+from TokenStore import Token
+from AST import Node
+
+# Chunks handed out per worker, so a few large functions do not leave the others idle
+CHUNKS_PER_JOB = 4
+
+
+# Define the Parser used inside a worker: it parses functions of one token slice
+class ChunkParser(Parser):
+    def __init__(self, tokens):
+        self.tokens = tokens  # TokenStore slice of consecutive functions
+        self.kinds, self.refs, self.values = tokens.kinds, tokens.refs, tokens.values  # Token columns
+        self.current_pos = 0
+        self.funcs = []
+
+
+# Method to append 'node' and its subtree to 'out' in pre-order, one
+# (kind, value, token index or -1, child count) tuple per node; flat tuples of
+# plain values pickle far faster than a tree of Nodes
+def flatten(node, base, out):
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        token = -1 if node.token is None else base + node.token.index
+        out.append((node.kind, node.value, token, len(node.children)))
+        stack.extend(reversed(node.children))
+
+
+# Worker entry point: parse the functions starting at 'locs' in 'tokens', a slice that
+# begins at token 'base' of the file. Returns (nodes, error): the flattened functions
+# when 'build' is set, and the error as (message, token index or None). Like
+# Parser.parse, a chunk stops at its first error; only the last chunk can run out of
+# tokens, and its last token is the file's.
+def parse_chunk(tokens, base, locs, build):
+    parser = ChunkParser(tokens)
+    nodes = []
+    try:
+        for loc in locs:
+            parser.move_cursor(loc - base)
+            function = parser.parse_function()
+            if build:
+                flatten(function, base, nodes)
+    except (SyntaxError, IndexError, RecursionError) as e:
+        e = parser.syntax_error(e)
+        token = None if e.token is None else base + e.token.index
+        return nodes, (e.args[0], token)
+    return nodes, None
+
+
+# Define a Parser that parses the functions found by detect_funcs in a process pool.
+# Functions are independent, so consecutive ones are grouped into chunks and each
+# worker receives only the compact token slice of its chunk.
+class ParallelParser(Parser):
+    def __init__(self, tokens, jobs=2):
+        super().__init__(tokens)  # Detects functions and checks for main
+        self.jobs = jobs  # Number of worker processes
+
+    # Main parsing method: same Program, and same first error, as Parser.parse
+    def parse(self):
+        if self.jobs <= 1 or len(self.funcs) < 2:
+            return super().parse()
+        functions = []
+        for nodes, error in self.run_chunks(build=True):  # Chunks come back in source order
+            if error is not None:
+                raise self.rebuild_error(error)  # The first error in source order
+            functions.extend(self.unflatten(nodes))
+        return Node('Program', children=functions)
+
+    # Method to check the syntax in the workers without sending the AST back
+    def validate(self):
+        if self.jobs <= 1 or len(self.funcs) < 2:
+            return super().validate()
+        for _, error in self.run_chunks(build=False):
+            if error is not None:
+                raise self.rebuild_error(error)
+
+    # Method to parse every chunk in the process pool; returns the results in order
+    def run_chunks(self, build):
+        chunks = self.chunks()
+        with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+            return list(executor.map(parse_chunk, *zip(*chunks), [build] * len(chunks)))
+
+    # Method to group consecutive functions into chunks of about the same token count.
+    # Each chunk is (token slice, index of its first token, function locations); the
+    # slice runs one token past the chunk, as the parser sees the next 'function' there.
+    def chunks(self):
+        locs = [fun['loc'] for fun in self.funcs]
+        total = len(self.tokens)
+        target = max(1, (total - locs[0]) // (self.jobs * CHUNKS_PER_JOB))
+        chunks, first = [], 0
+        for index in range(1, len(locs) + 1):
+            end = locs[index] if index < len(locs) else total
+            if index < len(locs) and end - locs[first] < target:
+                continue
+            tokens = self.tokens.slice(locs[first], min(end + 1, total))
+            tokens.source_code = None  # Workers only need the token columns
+            chunks.append((tokens, locs[first], locs[first:index]))
+            first = index
+        return chunks
+
+    # Method to rebuild the Function nodes of a chunk from its pre-order tuples
+    def unflatten(self, nodes):
+        functions = []
+        pending = []  # (node, children still to attach) for the open ancestors
+        for kind, value, token, count in nodes:
+            node = Node(kind, None if token < 0 else Token(self.tokens, token), (), value)
+            if pending:
+                parent = pending[-1]
+                parent[0].children.append(node)
+                parent[1] -= 1
+                if not parent[1]:
+                    pending.pop()
+            else:
+                functions.append(node)
+            if count:
+                pending.append([node, count])
+        return functions
+
+    # Method to recreate the exception a worker reported
+    def rebuild_error(self, error):
+        message, token = error
+        return SyntaxError(message, None if token is None else self.tokens[token])
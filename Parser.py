@@ -1,4 +1,8 @@
-from globals import LOGICAL_OPERATOR
+from bisect import bisect_right
+from globals import LOGICAL_OPERATOR, TOKEN_CODES, TOKEN_NAMES
+from TokenStore import TokenStore
+from AST import Node
+from NodePool import NodePool
 
 # Define a custom exception for syntax errors
 class SyntaxError(Exception):
@@ -7,15 +11,34 @@ class SyntaxError(Exception):
         super().__init__(message)  # Call the base class constructor
         self.token = token  # Optionally, store the token where the error occurred
 
+    # Append the token's line and column to the message when they are known
+    def __str__(self):
+        message = super().__str__()
+        position = getattr(self.token, 'position', None)
+        if position is None:
+            return message
+        return f"{message} at line {position[0]}, column {position[1]}"
+
 
 # Define a Parser class for parsing a list of tokens into a meaningful structure
 class Parser:
-    def __init__(self, tokens):
-        self.tokens = tokens  # Store the list of tokens to be parsed
+    recover = False  # Collect every error and resynchronize instead of stopping at the first
+    # Builds every node: Node(kind, token, children, value, span), or NodePool.add. The span
+    # is the (first, last) index of the tokens the construct consumed; leaves span their token.
+    make_node = Node
+    pool = None  # The NodePool parse_pool is filling, if any
+
+    def __init__(self, tokens, recover=False, max_errors=100):
+        # Store the tokens to be parsed in a compact TokenStore
+        self.tokens = tokens if isinstance(tokens, TokenStore) else TokenStore.from_tokens(tokens)
+        self.kinds, self.refs, self.values = self.tokens.kinds, self.tokens.refs, self.tokens.values  # Token columns
         self.current_pos = 0  # Initialize the current token position
+        self.recover = recover
+        self.max_errors = max_errors  # In recovery mode, stop after this many errors
+        self.errors = []  # Errors collected in recovery mode, in source order after parse()
 
         # Detect functions in the token list
-        self.funcs = self.detect_funcs(tokens)
+        self.funcs = self.detect_funcs(self.tokens)
 
         # Check if there is a main function
         self.main_validity()
@@ -29,29 +52,31 @@ class Parser:
                 is_main = True
 
         if not is_main:  # If 'main' function is not found
-            raise SyntaxError("No Main Function detected")  # Raise a syntax error
+            self.report(SyntaxError("No Main Function detected"))  # Raise a syntax error
     
     # Method to detect functions in the list of tokens, ensuring unique function names
     def detect_funcs(self, tokens):
         funcs = []  # List to hold detected functions
         func_names = set()  # Set to track unique function names
-        
-        # Loop through the tokens to find function declarations
-        for i, token in enumerate(tokens):
-            if (
-                token['type'] == "KEYWORD"  # If the token is a keyword
-                and token['value'] == "function"  # and it's 'function'
-            ):
+
+        # The interned index of 'function'; without it there are no declarations
+        function_ref = tokens.value_ids.get("function")
+        if function_ref is None:
+            return funcs
+        keyword = TOKEN_CODES["KEYWORD"]
+
+        # Loop through the type and value columns to find function declarations
+        for i, (kind, ref) in enumerate(zip(tokens.kinds, tokens.refs)):
+            if ref == function_ref and kind == keyword:  # The keyword 'function'
+                if i + 1 == len(tokens):  # A trailing 'function' declares nothing
+                    self.report(SyntaxError("Expected function name", tokens[i]))
+                    break
                 func_name = tokens[i + 1]['value']  # Get the function name
                 
                 if func_name in func_names:
                     # If function name is already in the set, raise a SyntaxError
-                    raise SyntaxError(
-                        {
-                            "message": f"Duplicate function name '{func_name}' detected.",
-                            "token": token,
-                        }
-                    )
+                    self.report(SyntaxError(f"Duplicate function name '{func_name}' detected.", tokens[i]))
+                    continue  # In recovery mode the duplicate is skipped
                 
                 # Otherwise, add the function to the list and the name to the set
                 funcs.append({
@@ -64,10 +89,86 @@ class Parser:
         return funcs  # Return the list of detected functions
 
 
+    # Method to raise an error, or to record it in recovery mode
+    def report(self, error):
+        if not self.recover:
+            raise error
+        self.errors.append(error)
+
+    # Method to turn an exception raised while parsing into the SyntaxError it stands for:
+    # an IndexError means the tokens ran out in the middle of a construct, a RecursionError
+    # that blocks are nested deeper than recursive descent can follow
+    def syntax_error(self, error):
+        if isinstance(error, IndexError):
+            return SyntaxError("Unexpected end of input", self.last_token())
+        if isinstance(error, RecursionError):
+            return SyntaxError("Blocks nested too deeply for the recursive parser", self.current_token())
+        return error
+
+    # Method to get the last token, or None if there are none
+    def last_token(self):
+        return self.tokens[len(self.tokens) - 1] if len(self.tokens) else None
+
+    # Method to record an error caught during recovery once; returns the recorded error
+    def record(self, error):
+        error = self.syntax_error(error).with_traceback(None)  # Do not keep the parser frames alive
+        if not self.errors or self.errors[-1] is not error:
+            self.errors.append(error)
+        return error
+
+    # Method to check the error cap; errors found while detecting functions only count
+    # once parsing has reached them, so the cap keeps the first errors in source order
+    def too_many_errors(self):
+        reached = bisect_right(self.early_errors, self.current_pos)  # Early errors parsing has passed
+        return len(self.errors) - self.early_count + reached >= self.max_errors
+
+    # Method to skip the rest of a broken statement: past the next ';' or past a
+    # '{ ... }' block opened while skipping, or up to the '}' that closes the current
+    # block. Returns False when parsing of the function cannot resume: the next
+    # 'function' keyword or the end was reached, or there are too many errors.
+    def synchronize(self):
+        if self.too_many_errors():
+            return False
+        kinds, refs, value_ids = self.kinds, self.refs, self.tokens.value_ids
+        semicolon, opening, closing = value_ids.get(';'), value_ids.get('{'), value_ids.get('}')
+        function = value_ids.get('function')
+        punctuation, keyword = TOKEN_CODES['PUNCTUATION'], TOKEN_CODES['KEYWORD']
+        pos, end, depth = self.current_pos, len(kinds), 0
+        while pos < end:
+            kind, ref = kinds[pos], refs[pos]
+            if kind == punctuation:
+                if ref == semicolon and not depth:
+                    self.current_pos = pos + 1  # Resume after the ';'
+                    return True
+                if ref == opening:
+                    depth += 1
+                elif ref == closing:
+                    if not depth:
+                        self.current_pos = pos  # Let the block end at its '}'
+                        return True
+                    depth -= 1
+                    if not depth:
+                        self.current_pos = pos + 1  # Resume after the skipped block
+                        return True
+            elif kind == keyword and ref == function:
+                self.current_pos = pos
+                return False
+            pos += 1
+        self.current_pos = end
+        return False
+
     # Method to get the current token in the list
     def current_token(self):
         return self.tokens[self.current_pos]
 
+    # Method to get the type of the current token straight from the type column
+    def current_type(self):
+        return TOKEN_NAMES[self.kinds[self.current_pos]]
+
+    # Method to get the value of the current token straight from the value column
+    def current_value(self):
+        return self.values[self.refs[self.current_pos]]
+
     # Method to advance to the next token in the list
     def advance(self):
         self.current_pos += 1  # Increment the current position
@@ -82,279 +183,403 @@ class Parser:
 
     # Method to check if the current token matches an expected type and value
     def expect(self, token_type, expected_value=None):
-        token = self.current_token()  # Get the current token
-        # Check if it matches the expected type and value (if provided)
-        if token['type'] == token_type and (
-            expected_value is None or token['value'] == expected_value
+        pos = self.current_pos
+        # Check the type and value columns directly (value only if provided)
+        if self.current_type() == token_type and (
+            expected_value is None or self.current_value() == expected_value
         ):
-            self.advance()  # Advance to the next token
-            return token  # Return the current token
+            self.current_pos = pos + 1  # Advance to the next token
+            return self.tokens[pos]  # Return the current token
+        token = self.current_token()  # Get the offending token
         raise SyntaxError(  # Raise an error if the token doesn't match
-            {
-                "message": f"Expected {token_type} " + (f"'{expected_value}'" if expected_value else ""),
-                "token": token
-            }
+            f"Expected {token_type}" + (f" '{expected_value}'" if expected_value else "")
+            + f", got '{token['value']}'",
+            token,
         )
 
     # Method to check if the current token matches an expected type and one of the expected values
     def expect_multiple_values(self, token_type, expected_values):
-        token = self.current_token()  # Get the current token
+        pos = self.current_pos
 
         # Check if the token type matches and the value is one of the expected values
-        if token['type'] == token_type and token['value'] in expected_values:
-            self.advance()  # Advance to the next token
-            return token  # Return the current token
+        if self.current_type() == token_type and self.current_value() in expected_values:
+            self.current_pos = pos + 1  # Advance to the next token
+            return self.tokens[pos]  # Return the current token
 
         # If no match, raise a SyntaxError with a detailed message and the current token
+        token = self.current_token()
         raise SyntaxError(
-            {
-                "message": f"Expected {token_type} with one of values {expected_values}, got '{token['value']}'",
-                "token": token,
-            }
+            f"Expected {token_type} with one of values {expected_values}, got '{token['value']}'",
+            token,
         )
 
-    # Main parsing method to validate the syntax of the code
+    # Main parsing method to validate the syntax of the code and build its AST.
+    # In recovery mode it returns the functions that parsed and leaves the errors in self.errors.
     def parse(self):
+        functions = []
+        if self.recover:
+            # Token indexes of the errors found while detecting functions, for the error cap
+            self.early_errors = sorted(error.token.index for error in self.errors if error.token is not None)
+            self.early_count = len(self.errors)
         # Loop through the detected functions
-        for fun in self.funcs:
+        for fun in self.functions_to_parse():
             self.move_cursor(fun['loc'])  # Move to the function's location
-            self.parse_function()  # Parse the function declaration
+            if not self.recover:
+                try:
+                    functions.append(self.parse_function())  # Parse the function declaration
+                except (IndexError, RecursionError) as error:
+                    raise self.syntax_error(error) from None
+                continue
+            if self.too_many_errors():
+                break
+            try:
+                functions.append(self.parse_function())
+            except (SyntaxError, IndexError, RecursionError) as error:
+                self.record(error)  # Resume at the next function
+        if self.recover:
+            # Errors found while detecting functions come first; order them all by position
+            last = len(self.tokens)
+            self.errors.sort(key=lambda error: last if error.token is None else error.token.index)
+            del self.errors[self.max_errors:]
+        return self.make_node('Program', children=functions, span=(0, len(self.tokens) - 1))
+
+    # Method to parse into a NodePool instead of Node objects; the pool's root is the
+    # Program node. Nodes of functions abandoned in recovery mode stay in the pool unlinked.
+    def parse_pool(self):
+        pool = self.pool = NodePool(self.tokens)
+        self.make_node = pool.add
+        try:
+            pool.root = self.parse()
+        finally:
+            del self.make_node, self.pool
+        return pool
+
+    # Method to get the functions parse() goes through, in order; all of them by default
+    def functions_to_parse(self):
+        return self.funcs
+
+    # Method to check the syntax without keeping the AST
+    def validate(self):
+        self.parse()  # Raises SyntaxError if the syntax is invalid
 
     # Method to parse a function declaration
     def parse_function(self):
+        first = self.current_pos
         self.expect('KEYWORD', 'function')  # Expect 'function' keyword
-        self.expect('IDENTIFIER')  # Expect the function name
+        name = self.expect('IDENTIFIER')  # Expect the function name
         self.expect('PUNCTUATION', '(')  # Expect '(' for parameters
 
         # Check if there are parameters
-        if self.current_token()['type'] == 'IDENTIFIER':
-            self.parse_parameters()  # Parse the function parameters
+        params = []
+        if self.current_type() == 'IDENTIFIER':
+            params = self.parse_parameters()  # Parse the function parameters
 
         self.expect('PUNCTUATION', ')')  # Expect closing parenthesis
+        params = self.make_node('Params', children=params, span=(first + 2, self.current_pos - 1))  # '(' to ')'
         self.expect('PUNCTUATION', '{')  # Expect opening curly brace for function body
-        self.parse_statements()  # Parse the function body statements
+        body = self.parse_statements()  # Parse the function body statements
         self.expect('PUNCTUATION', '}')  # Expect closing curly brace
+        return self.make_node('Function', name, [params, body], name['value'], (first, self.current_pos - 1))
 
     # Method to parse function parameters (comma-separated identifiers)
     def parse_parameters(self):
+        params = []
         while True:
-            self.expect('IDENTIFIER')  # Expect parameter identifier
-            current_token = self.current_token()  # Get the current token
+            params.append(self.operand(self.expect('IDENTIFIER')))  # Expect parameter identifier
+            token_type, value = self.current_type(), self.current_value()  # Get the current token
             # Check if we're at the closing parenthesis for parameters
-            if current_token['type'] == 'PUNCTUATION' and current_token['value'] == ')':
+            if token_type == 'PUNCTUATION' and value == ')':
                 break  # End of parameters
-            elif current_token['type'] == 'PUNCTUATION' and current_token['value'] == ',':
+            elif token_type == 'PUNCTUATION' and value == ',':
                 self.advance()  # Move to the next parameter
             else:
-                raise SyntaxError("Unexpected parameter syntax")  # Raise error for invalid parameter
+                raise SyntaxError("Unexpected parameter syntax", self.current_token())  # Raise error for invalid parameter
+        return params
     
     # Method to parse function arguments (comma-separated identifiers, numbers, strings)
     def parse_arguments(self):
+        args = []
         # Continue parsing until the closing parenthesis or unexpected token
         while True:
-            token = self.current_token()  # Get the current token
-            
             # Determine valid expression types for function arguments
-            if token['type'] in {'IDENTIFIER', 'NUMBER', 'STRING'}:
+            if self.current_type() in {'IDENTIFIER', 'NUMBER', 'STRING'}:
+                args.append(self.operand(self.current_token()))
                 self.advance()  # Move past the valid argument token
                 
                 # Check for the end of the argument list
-                if self.current_token()['type'] == 'PUNCTUATION' and self.current_token()['value'] == ')':
+                if self.current_type() == 'PUNCTUATION' and self.current_value() == ')':
                     break  # End of the argument list
                 
                 # If there's a comma, it indicates more arguments to parse
-                if self.current_token()['type'] == 'PUNCTUATION' and self.current_token()['value'] == ',':
+                if self.current_type() == 'PUNCTUATION' and self.current_value() == ',':
                     self.advance()  # Move past the comma to the next argument
                 else:
                     # If it's not a comma or closing parenthesis, raise a SyntaxError
                     raise SyntaxError(
-                        {
-                            "message": f"Unexpected token in function arguments. Expected ',' or ')', got '{self.current_token()['value']}'",
-                            "token": self.current_token(),
-                        }
+                        f"Unexpected token in function arguments. Expected ',' or ')', got '{self.current_value()}'",
+                        self.current_token(),
                     )
             else:
                 # If an unexpected token is encountered, raise a SyntaxError
                 raise SyntaxError(
-                    {
-                        "message": f"Unexpected token in function arguments. Expected 'IDENTIFIER', 'NUMBER', or 'STRING', got '{token['value']}'",
-                        "token": token,
-                    }
+                    f"Unexpected token in function arguments. Expected 'IDENTIFIER', 'NUMBER', or 'STRING', got '{self.current_value()}'",
+                    self.current_token(),
                 )
+        return args
 
 
     # Method to parse statements within the function body
     def parse_statements(self):
+        first = self.current_pos - 1  # The '{' the caller matched
+        statements = []
         # Continue parsing until the closing curly brace of the function body
-        while self.current_token()['value'] != '}':
-            current_token = self.current_token()  # Get the current token
-
-            if current_token['type'] == 'KEYWORD':  # Handle keyword-based statements
-                if current_token['value'] == 'return':
-                    self.parse_return_statement()  # Parse 'return' statement
-                elif current_token['value'] == 'if':
-                    self.parse_if_statement()  # Parse 'if' statement
-                elif current_token['value'] == 'while':
-                    self.parse_while_statement()  # Parse 'while' statement
-                elif current_token['value'] == 'for':
-                    self.parse_for_statement()  # Parse 'for' statement
-                elif current_token['value'] == 'MANLO':
-                    self.parse_assignment(True)  # Parse Declaration statement
-                else:
-                    raise SyntaxError(f"Unexpected keyword '{current_token['value']}'")  # Invalid keyword
-            elif current_token['type'] == 'IDENTIFIER':  # Handle identifier-based statements
-                self.parse_assignment_or_function_call()  # Could be variable assignment or function call
+        while self.current_value() != '}':
+            try:
+                statements.append(self.parse_statement())
+            except (SyntaxError, IndexError) as error:
+                if not self.recover:
+                    raise
+                error = self.record(error)
+                if not self.synchronize():  # Give up on this function
+                    raise error
+        return self.make_node('Block', children=statements, span=(first, self.current_pos))  # Up to its '}'
+
+    # Method to parse one statement of a block
+    def parse_statement(self):
+        token_type, value = self.current_type(), self.current_value()  # Get the current token
+
+        if token_type == 'KEYWORD':  # Handle keyword-based statements
+            if value == 'return':
+                return self.parse_return_statement()  # Parse 'return' statement
+            elif value == 'if':
+                return self.parse_if_statement()  # Parse 'if' statement
+            elif value == 'while':
+                return self.parse_while_statement()  # Parse 'while' statement
+            elif value == 'for':
+                return self.parse_for_statement()  # Parse 'for' statement
+            elif value == 'MANLO':
+                return self.parse_assignment(True)  # Parse Declaration statement
             else:
-                raise SyntaxError(f"Unexpected token '{current_token['value']}'")  # Invalid token type
+                raise SyntaxError(f"Unexpected keyword '{value}'", self.current_token())  # Invalid keyword
+        elif token_type == 'IDENTIFIER':  # Handle identifier-based statements
+            return self.parse_assignment_or_function_call()  # Could be variable assignment or function call
+        else:
+            raise SyntaxError(f"Unexpected token '{value}'", self.current_token())  # Invalid token type
 
     # Method to parse a return statement
     def parse_return_statement(self):
-        self.expect('KEYWORD', 'return')  # Expect 'return' keyword
-        self.parse_expression()  # Parse the expression after 'return'
+        first = self.current_pos
+        keyword = self.expect('KEYWORD', 'return')  # Expect 'return' keyword
+        value = self.parse_expression()  # Parse the expression after 'return'
         self.expect('PUNCTUATION', ';')  # Expect semicolon at the end of 'return' statement
+        return self.make_node('Return', keyword, [value], span=(first, self.current_pos - 1))
+    # Method to build a Name or literal node from an operand token
+    def operand(self, token):
+        token_type, value = token['type'], token['value']
+        if token_type == 'NUMBER':
+            return self.make_node('Number', token, value=int(value) if value.isdecimal() else value)
+        if token_type == 'STRING':
+            return self.make_node('String', token, value=value)
+        return self.make_node('Name', token, value=value)
 
     # Method to parse an expression, which could include operations or function calls
     def parse_expression(self):
-        if self.current_token()['type'] in {'IDENTIFIER', 'NUMBER'}:
+        first = self.current_pos
+        if self.current_type() in {'IDENTIFIER', 'NUMBER'}:
+            operands = [self.operand(self.current_token())]
+            operators = []
             self.advance() # Move past the identifier or number
             # Handle operations in expressions
             while (
-                self.current_token()['type'] == 'OPERATOR'
-                and self.current_token()['value'] in {'+', '-', '*', '/'}
+                self.current_type() == 'OPERATOR'
+                and self.current_value() in {'+', '-', '*', '/'}
             ):
+                operators.append(self.current_token())
                 self.advance() # Move past the operator
                 # Expect another identifier or number after operator
-                if self.current_token()['type'] not in {'IDENTIFIER', 'NUMBER'}:
-                    raise SyntaxError("Expected identifier or number after operator")
+                if self.current_type() not in {'IDENTIFIER', 'NUMBER'}:
+                    raise SyntaxError("Expected identifier or number after operator", self.current_token())
+                operands.append(self.operand(self.current_token()))
                 self.advance()  # Move past the next identifier or number
+            return self.build_arithmetic(operands, operators, first)
 
-        elif self.current_token()['type'] == 'STRING':
+        elif self.current_type() == 'STRING':
+            node = self.operand(self.current_token())
             self.advance()  # Handle strings in expressions
-        elif self.current_token()['type'] == 'PUNCTUATION':
+            return node
+        elif self.current_type() == 'PUNCTUATION':
+            node = self.make_node('Null', self.current_token())
             self.advance()  # Handle strings in expressions
+            return node
         else:
-            raise SyntaxError({
-                "message": "Unexpected expression syntax",
-                "token": self.current_token()
-            })  # Raise error for invalid expression
+            raise SyntaxError(
+                "Unexpected expression syntax", self.current_token()
+            )  # Raise error for invalid expression
+
+    # Method to turn a flat 'a op b op c' chain into BinOp nodes, with '*' and '/'
+    # binding tighter than '+' and '-' and every operator associating to the left.
+    # Operands are single tokens between their operators, from token index 'first' on,
+    # which gives the spans: operand k is at first + 2k.
+    def build_arithmetic(self, operands, operators, first):
+        terms = [operands[0]]  # Products, separated by '+' or '-'
+        term_operators = []
+        ends = []  # Index of the last token of every term but the last
+        start = first  # First token of the current term
+        for position, (operator, operand) in enumerate(zip(operators, operands[1:]), 1):
+            last = first + 2 * position  # Token of 'operand'
+            if operator['value'] in {'*', '/'}:
+                terms[-1] = self.make_node('BinOp', operator, [terms[-1], operand], operator['value'], (start, last))
+            else:
+                term_operators.append(operator)
+                terms.append(operand)
+                ends.append(last - 2)
+                start = last
+        ends.append(first + 2 * len(operators))
+        node = terms[0]
+        # Each sum ends with the term it adds
+        for operator, term, last in zip(term_operators, terms[1:], ends[1:]):
+            node = self.make_node('BinOp', operator, [node, term], operator['value'], (first, last))
+        return node
 
     # Method to parse a variable assignment or function call
     def parse_assignment_or_function_call(self):
-        self.expect('IDENTIFIER')  # Get the variable/function name
+        first = self.current_pos
+        name = self.expect('IDENTIFIER')  # Get the variable/function name
 
-        if self.current_token()['value'] == '(':
-            self.parse_function_call()  # If it's a function call
-        elif self.current_token()['value'] == '=':
+        if self.current_value() == '(':
+            args = self.parse_function_call()  # If it's a function call
+            return self.make_node('Call', name, args, name['value'], (first, self.current_pos - 1))
+        elif self.current_value() == '=':
             # If it's a variable assignment
             self.expect('OPERATOR', '=')  # Expect assignment operator '='
-            self.parse_expression()  # Parse the value being assigned
+            value = self.parse_expression()  # Parse the value being assigned
             self.expect('PUNCTUATION', ';')  # Expect semicolon at the end of the assignment
+            return self.make_node('Assign', name, [value], name['value'], (first, self.current_pos - 1))
         else:
-            raise SyntaxError("Expected '(' or '=' after identifier")  # Invalid syntax
+            raise SyntaxError("Expected '(' or '=' after identifier", self.current_token())  # Invalid syntax
 
     # Method to parse a function call with a list of expressions
     def parse_function_call(self):
+        args = []
         self.expect('PUNCTUATION', '(')  # Opening parenthesis
         # Check if there are parameters
-        if self.current_token()['type'] == 'IDENTIFIER' or self.current_token()['type'] == 'NUMBER' or self.current_token()['type'] == 'STRING':
-            self.parse_arguments()  # Parse the function parameters
+        if self.current_type() == 'IDENTIFIER' or self.current_type() == 'NUMBER' or self.current_type() == 'STRING':
+            args = self.parse_arguments()  # Parse the function parameters
         self.expect('PUNCTUATION', ')')  # Closing parenthesis
         self.expect('PUNCTUATION', ';')  # Semicolon at the end of function call
+        return args
 
     # Method to parse a list of expressions (comma-separated)
     def parse_expression_list(self):
+        expressions = []
         while True:
-            self.parse_expression()  # Parse each expression in the list
+            expressions.append(self.parse_expression())  # Parse each expression in the list
             # Check if the list ends with a closing parenthesis
             if (
-                self.current_token()['type'] == 'PUNCTUATION' 
-                and self.current_token()['value'] == ')'
+                self.current_type() == 'PUNCTUATION' 
+                and self.current_value() == ')'
             ):
                 break
             elif (
-                self.current_token()['type'] == 'PUNCTUATION' 
-                and self.current_token()['value'] == ','
+                self.current_type() == 'PUNCTUATION' 
+                and self.current_value() == ','
             ):
                 self.advance()  # Move to the next expression
             else:
-                raise SyntaxError("Unexpected expression list syntax")  # Invalid expression list
+                raise SyntaxError("Unexpected expression list syntax", self.current_token())  # Invalid expression list
+        return expressions
 
     # Method to parse a variable assignment
     def parse_assignment(self, is_declaration=False):
+        first = self.current_pos
         if is_declaration: 
             try: 
                 self.expect('KEYWORD', 'MANLO')
             except SyntaxError as e:
-                raise SyntaxError("Invalid Declaration")
-        self.expect('IDENTIFIER')
+                raise SyntaxError("Invalid Declaration", e.token)
+        name = self.expect('IDENTIFIER')
         self.expect('OPERATOR', '=')  # Expect assignment operator '='
-        self.parse_expression()  # Parse the value being assigned
+        value = self.parse_expression()  # Parse the value being assigned
         self.expect('PUNCTUATION', ';')  # Expect semicolon at the end of the assignment
+        kind = 'Declare' if is_declaration else 'Assign'
+        return self.make_node(kind, name, [value], name['value'], (first, self.current_pos - 1))
 
     # Method to parse an 'if' or 'if-else' statement
     def parse_if_statement(self):
-        self.expect('KEYWORD', 'if')  # Expect 'if' keyword
+        first = self.current_pos
+        keyword = self.expect('KEYWORD', 'if')  # Expect 'if' keyword
         self.expect('PUNCTUATION', '(')  # Opening parenthesis for the condition
-        self.parse_logical_expression()  # Parse the 'if' condition
+        condition = self.parse_logical_expression()  # Parse the 'if' condition
         self.expect('PUNCTUATION', ')')  # Closing parenthesis
 
         # Parse the 'if' block statements
         self.expect('PUNCTUATION', '{')  # Opening curly brace
-        self.parse_statements()  # Parse statements inside the 'if' block
+        children = [condition, self.parse_statements()]  # Parse statements inside the 'if' block
         self.expect('PUNCTUATION', '}')  # Closing curly brace
 
         # Check if there's an 'else' block
         if (
-            self.current_token()['type'] == 'KEYWORD'
-            and self.current_token()['value'] == 'else'
+            self.current_type() == 'KEYWORD'
+            and self.current_value() == 'else'
         ):
             self.advance()  # Move to 'else'
             self.expect('PUNCTUATION', '{')  # Opening curly brace
-            self.parse_statements()  # Parse statements inside the 'else' block
+            children.append(self.parse_statements())  # Parse statements inside the 'else' block
             self.expect('PUNCTUATION', '}')  # Closing curly brace
+        return self.make_node('If', keyword, children, span=(first, self.current_pos - 1))
 
     # Method to parse a 'while' loop
     def parse_while_statement(self):
-        self.expect('KEYWORD', 'while')  # Expect 'while' keyword
+        first = self.current_pos
+        keyword = self.expect('KEYWORD', 'while')  # Expect 'while' keyword
         self.expect('PUNCTUATION', '(')  # Opening parenthesis for the condition
-        self.parse_logical_expression()  # Parse the loop condition
+        condition = self.parse_logical_expression()  # Parse the loop condition
         self.expect('PUNCTUATION', ')')  # Closing parenthesis
 
         # Parse the statements within the 'while' block
         self.expect('PUNCTUATION', '{')  # Opening curly brace
-        self.parse_statements()  # Parse statements within the 'while' block
+        body = self.parse_statements()  # Parse statements within the 'while' block
         self.expect('PUNCTUATION', '}')  # Closing curly brace
+        return self.make_node('While', keyword, [condition, body], span=(first, self.current_pos - 1))
 
     def parse_logical_expression(self):
-        if self.current_token()['type'] not in {'IDENTIFIER', 'NUMBER'}:
-            raise SyntaxError("Unexpected keyword")
+        if self.current_type() not in {'IDENTIFIER', 'NUMBER'}:
+            raise SyntaxError("Unexpected keyword", self.current_token())
         else:
+            left = self.operand(self.current_token())
             self.advance()
-        self.expect_multiple_values("OPERATOR", LOGICAL_OPERATOR)
-        if self.current_token()['type'] not in {'IDENTIFIER', 'NUMBER'}:
-            raise SyntaxError("Unexpected keyword")
+        first = self.current_pos - 1  # The left operand
+        operator = self.expect_multiple_values("OPERATOR", LOGICAL_OPERATOR)
+        if self.current_type() not in {'IDENTIFIER', 'NUMBER'}:
+            raise SyntaxError("Unexpected keyword", self.current_token())
         else:
+            right = self.operand(self.current_token())
             self.advance()
         self.expect("PUNCTUATION", ";")
+        span = (first, first + 2)  # Single-token operands; the ';' is not part of it
+        return self.make_node('Compare', operator, [left, right], operator['value'], span)
 
 
     # Method to parse a simple 'for' loop
     def parse_for_statement(self):
-        self.expect('KEYWORD', 'for')  # Expect 'for' keyword
+        first = self.current_pos
+        keyword = self.expect('KEYWORD', 'for')  # Expect 'for' keyword
         self.expect('PUNCTUATION', '(')  # Opening parenthesis
 
         # Parse the initialization expression in the 'for' loop
-        self.parse_assignment(True)  # e.g., variable initialization or assignment
+        init = self.parse_assignment(True)  # e.g., variable initialization or assignment
 
         # Parse the loop condition
-        self.parse_logical_expression()
+        condition = self.parse_logical_expression()
 
         # Parse the increment/decrement operation in the 'for' loop
-        self.parse_assignment()
+        update = self.parse_assignment()
 
         self.expect('PUNCTUATION', ')')  # Closing parenthesis
 
         # Parse the statements within the 'for' loop block
         self.expect('PUNCTUATION', '{')  # Opening curly brace
-        self.parse_statements()  # Parse statements in the 'for' block
+        body = self.parse_statements()  # Parse statements in the 'for' block
         self.expect('PUNCTUATION', '}')  # Closing curly brace
+        span = (first, self.current_pos - 1)
+        return self.make_node('For', keyword, [init, condition, update, body], span=span)
@@ -0,0 +1,147 @@
+import json
+import marshal
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from globals import TOKEN_NAMES
+
+# Parser methods whose calls are counted
+COUNTED_METHODS = ('expect', 'expect_multiple_values', 'fallback', 'move_cursor')
+# Parser methods timed as phases of their own
+PHASE_METHODS = ('detect_funcs', 'main_validity')
+
+
+# Define the Profiler class: opt-in timings and counters for one run.
+# Nothing in Lexer or Parser checks for it; when enabled it wraps the methods of the
+# one parser instance it builds, so a disabled profiler costs nothing on the hot path.
+class Profiler:
+    def __init__(self, enabled=True):
+        self.enabled = enabled  # When False every method is a no-op
+        self.phases = {}  # Phase name -> seconds, in the order the phases ran
+        self.counters = Counter()  # Calls of COUNTED_METHODS
+        self.token_types = Counter()  # Token type name -> count
+        self.functions = []  # {'name', 'loc', 'line', 'tokens', 'seconds'} per parsed function
+        self.source = None  # Program file, used to label the cProfile export
+
+    # Method to time a phase: 'with profiler.phase("lex"): ...'
+    def phase(self, name):
+        if not self.enabled:
+            return nullcontext()
+        return self.timed(name)
+
+    # Context manager adding the time spent in its block to phase 'name'
+    @contextmanager
+    def timed(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - started
+
+    # Method to count the tokens of a TokenStore by type
+    def count_tokens(self, tokens):
+        if self.enabled:
+            self.token_types.update({TOKEN_NAMES[kind]: count for kind, count in Counter(tokens.kinds).items()})
+
+    # Method to build parser_class(tokens, ...) with its methods instrumented
+    def make_parser(self, parser_class, tokens, *args, **kwargs):
+        if not self.enabled:
+            return parser_class(tokens, *args, **kwargs)
+        parser = parser_class.__new__(parser_class)
+        for name in COUNTED_METHODS:
+            setattr(parser, name, self.counted(name, getattr(parser, name)))
+        for name in PHASE_METHODS:
+            setattr(parser, name, self.phased(name, getattr(parser, name)))
+        parser.parse_function = self.per_function(parser, parser.parse_function)
+        parser.__init__(tokens, *args, **kwargs)  # detect_funcs and main_validity run here
+        return parser
+
+    # Method to wrap a bound method so that its calls are counted
+    def counted(self, name, method):
+        counters = self.counters
+
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            counters[name] += 1
+            return method(*args, **kwargs)
+        return wrapper
+
+    # Method to wrap a bound method so that it is timed as a phase
+    def phased(self, name, method):
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            with self.timed(name):
+                return method(*args, **kwargs)
+        return wrapper
+
+    # Method to wrap parse_function so that every function gets its time and token count
+    def per_function(self, parser, method):
+        @wraps(method)
+        def wrapper():
+            loc = parser.current_pos
+            started = time.perf_counter()
+            try:
+                return method()
+            finally:
+                position = parser.tokens[loc].position if loc < len(parser.tokens) else None
+                self.functions.append({
+                    'name': self.function_name(parser, loc), 'loc': loc, 'line': position[0] if position else 0,
+                    'tokens': parser.current_pos - loc,  # Tokens consumed, up to an error
+                    'seconds': time.perf_counter() - started,
+                })
+        return wrapper
+
+    # Method to get the name of the function declared at token 'loc'
+    def function_name(self, parser, loc):
+        for fun in parser.funcs:
+            if fun['loc'] == loc:
+                return fun['name']
+        return f"<token {loc}>"
+
+    # Method to get the 'count' slowest functions
+    def slowest(self, count=10):
+        return sorted(self.functions, key=lambda fun: fun['seconds'], reverse=True)[:count]
+
+    # Method to get everything measured as a JSON-ready dict
+    def to_dict(self):
+        return {
+            'source': self.source,
+            'phases_ms': {name: round(seconds * 1000, 3) for name, seconds in self.phases.items()},
+            'counters': dict(self.counters),
+            'token_types': dict(self.token_types),
+            'functions': [
+                {'name': fun['name'], 'loc': fun['loc'], 'line': fun['line'], 'tokens': fun['tokens'],
+                 'ms': round(fun['seconds'] * 1000, 3)}
+                for fun in self.functions
+            ],
+        }
+
+    # Method to convert the measurements into the dict that pstats.Stats loads: every
+    # phase and every parsed function is an entry; functions are called by 'parse'
+    def to_pstats(self):
+        source = self.source or '<yah>'
+        stats = {}
+        parse_key = (source, 0, 'parse')
+        for name, seconds in self.phases.items():
+            stats[(source, 0, name)] = (1, 1, seconds, seconds, {})
+        parse_total = sum(fun['seconds'] for fun in self.functions)
+        for fun in self.functions:
+            key = (source, fun['line'], f"parse_function:{fun['name']}")
+            seconds = fun['seconds']
+            stats[key] = (1, 1, seconds, seconds, {parse_key: (1, 1, seconds, seconds)})
+        if parse_key in stats:
+            # The functions' own time is part of 'parse'
+            calls, primitive, total, cumulative, callers = stats[parse_key]
+            stats[parse_key] = (calls, primitive, max(total - parse_total, 0.0), cumulative, callers)
+        return stats
+
+    # Method to write the measurements to 'path': JSON, or the marshal format of
+    # cProfile/pstats ('python -m pstats path') when 'form' is 'pstats'
+    def export(self, path, form='json'):
+        if form == 'pstats':
+            with open(path, 'wb') as file:
+                marshal.dump(self.to_pstats(), file)
+        else:
+            with open(path, 'w') as file:
+                json.dump(self.to_dict(), file, indent=2)
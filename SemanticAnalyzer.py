@@ -0,0 +1,171 @@
+from globals import BUILTINS
+from Parser import SyntaxError
+
+
+# Define a custom exception for the name errors found by the SemanticAnalyzer
+class SemanticError(SyntaxError):
+    """Custom exception for semantic errors."""
+
+
+# Define the SemanticAnalyzer class: one pass over the AST that resolves every variable
+# and call, with the scoping rules of the Compiler. Names live in one hash table that
+# maps a name to the stack of its visible declarations, so a lookup costs the same at
+# any nesting depth; leaving a scope pops the names it declared. A name not found when
+# it is read waits in its scope until the scope ends: if the scope declared it by then,
+# it was used before its declaration ('MANLO y = y + 1;'), else it moves to the
+# enclosing scope, and past the function's scope it is undefined. Nested blocks are
+# not analyzed by recursion: a statement schedules the blocks it holds as steps on a
+# stack, run in the order recursion would take, so any nesting depth can be analyzed.
+class SemanticAnalyzer:
+    def __init__(self, program, funcs=None):
+        self.program = program  # Program node built by Parser.parse
+        # Function name -> number of parameters; functions detected but not parsed
+        # (LazyParser) have None, and calls to them are not checked for arity
+        self.functions = {fun['name']: None for fun in funcs or ()}
+        for function in program.children:
+            self.functions[function.value] = len(function.children[0].children)
+        self.errors = []  # SemanticErrors, in source order after analyze()
+
+    # Main method: analyze every function and return the errors
+    def analyze(self):
+        for function in self.program.children:
+            self.analyze_function(function)
+        self.errors.sort(key=lambda error: error.token.index if error.token is not None else -1)
+        return self.errors
+
+    # Method to analyze one Function node
+    def analyze_function(self, node):
+        params, body = node.children
+        self.symbols = {}  # Name -> depths of the scopes declaring it, innermost last
+        self.scopes = []  # Per open scope: (names it declared, unresolved reads)
+        self.pending = []  # Steps still to run, as (method, arguments...), the next one last
+        self.enter()
+        for param in params.children:
+            if param.value in self.symbols:
+                self.report(f"Duplicate parameter '{param.value}'", param.token)
+            else:
+                self.declare(param.value)
+        self.analyze_block(body)
+        self.run()
+        for name, token in self.leave():
+            self.report(f"Undefined variable '{name}'", token)
+
+    # Method to schedule 'steps' to run next, in the order given
+    def schedule(self, *steps):
+        self.pending.extend(reversed(steps))
+
+    # Method to run the scheduled steps until none is left; a step may schedule more
+    def run(self):
+        pending = self.pending
+        while pending:
+            method, *arguments = pending.pop()
+            method(*arguments)
+
+    # Method to open a scope
+    def enter(self):
+        self.scopes.append(([], []))
+
+    # Method to close the innermost scope; the reads it leaves unresolved move to the
+    # enclosing scope, or are returned when it was the function's scope
+    def leave(self):
+        names, unresolved = self.scopes.pop()
+        for name in names:
+            depths = self.symbols[name]
+            depths.pop()
+            if not depths:
+                del self.symbols[name]
+        if not unresolved:
+            return unresolved
+        declared, pending = set(names), []
+        for name, token in unresolved:
+            if name in declared:
+                self.report(f"Variable '{name}' used before its declaration", token)
+            else:
+                pending.append((name, token))
+        if self.scopes:
+            self.scopes[-1][1].extend(pending)
+            return []
+        return pending
+
+    # Method to declare a name in the innermost scope
+    def declare(self, name):
+        names = self.scopes[-1][0]
+        depths = self.symbols.setdefault(name, [])
+        if not depths or depths[-1] != len(self.scopes):  # Redeclaring in the same scope reuses it
+            depths.append(len(self.scopes))
+            names.append(name)
+
+    # Method to resolve a variable read or assigned at 'token'
+    def resolve(self, name, token):
+        if name not in self.symbols:
+            self.scopes[-1][1].append((name, token))
+
+    # Method to record an error
+    def report(self, message, token):
+        self.errors.append(SemanticError(message, token))
+
+    # Method to analyze a Block node in a scope of its own: its statements are scheduled,
+    # then the end of the scope
+    def analyze_block(self, node):
+        self.enter()
+        steps = [(getattr(self, 'analyze_' + statement.kind), statement) for statement in node.children]
+        self.schedule(*steps, (self.leave,))
+
+    # A Block can also stand as a statement (the optimizer leaves one for a decided 'if')
+    def analyze_Block(self, node):
+        self.analyze_block(node)
+
+    # Method to analyze 'MANLO x = value;': the value is read before x exists
+    def analyze_Declare(self, node):
+        self.analyze_expression(node.children[0])
+        self.declare(node.value)
+
+    # Method to analyze 'x = value;'
+    def analyze_Assign(self, node):
+        self.analyze_expression(node.children[0])
+        self.resolve(node.value, node.token)
+
+    # Method to analyze a call statement against the function table
+    def analyze_Call(self, node):
+        for arg in node.children:
+            self.analyze_expression(arg)
+        if node.value in self.functions:
+            params = self.functions[node.value]
+            if params is not None and params != len(node.children):
+                self.report(
+                    f"Function '{node.value}' takes {params} argument(s), got {len(node.children)}", node.token
+                )
+        elif node.value not in BUILTINS:
+            self.report(f"Undefined function '{node.value}'", node.token)
+
+    # Method to analyze 'return value;'
+    def analyze_Return(self, node):
+        self.analyze_expression(node.children[0])
+
+    # Method to analyze 'if (...) {...} else {...}'
+    def analyze_If(self, node):
+        self.analyze_expression(node.children[0])
+        self.schedule(*[(self.analyze_block, block) for block in node.children[1:]])
+
+    # Method to analyze 'while (...) {...}'
+    def analyze_While(self, node):
+        self.analyze_expression(node.children[0])
+        self.schedule((self.analyze_block, node.children[1]))
+
+    # Method to analyze 'for (MANLO i = ...; cond; i = ...;) {...}'; i lives in the loop's scope
+    def analyze_For(self, node):
+        init, condition, update, body = node.children
+        self.enter()
+        self.analyze_Declare(init)
+        self.analyze_expression(condition)
+        self.schedule((self.analyze_block, body), (self.analyze_Assign, update), (self.leave,))
+
+    # Method to analyze an expression or condition, without recursion
+    def analyze_expression(self, node):
+        nodes = [node]
+        while nodes:
+            node = nodes.pop()
+            if node.kind == 'Name':
+                self.resolve(node.value, node.token)
+            else:
+                nodes.extend(node.children)
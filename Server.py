@@ -0,0 +1,311 @@
+import asyncio
+import json
+import sys
+from bisect import bisect_right
+from IncrementalParser import IncrementalParser
+
+# Seconds of quiet after an edit before a document is re-checked
+DEBOUNCE = 0.05
+# LSP constants
+SYMBOL_FUNCTION = 12  # SymbolKind.Function
+SEVERITY_ERROR = 1  # DiagnosticSeverity.Error
+SYNC_INCREMENTAL = 2  # TextDocumentSyncKind.Incremental
+METHOD_NOT_FOUND = -32601
+INTERNAL_ERROR = -32603
+SERVER_NOT_INITIALIZED = -32002
+
+
+# Method to get the length of a string in UTF-16 code units, the unit of LSP columns
+def utf16_length(text):
+    if text.isascii():
+        return len(text)
+    return len(text) + sum(1 for char in text if ord(char) > 0xFFFF)
+
+
+# Method to list the offsets just past every newline of 'text', shifted by 'base'
+def line_breaks(text, base=0):
+    breaks, find, pos = [], text.find, text.find('\n')
+    while pos != -1:
+        breaks.append(base + pos + 1)
+        pos = find('\n', pos + 1)
+    return breaks
+
+
+# Method to read one 'Content-Length' framed JSON-RPC message; None at the end of input
+async def read_message(reader):
+    length = None
+    while True:
+        line = await reader.readline()
+        if not line:
+            return None
+        line = line.strip()
+        if not line:
+            break  # End of the headers
+        name, _, value = line.decode('ascii').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    if length is None:
+        raise ValueError("Message without Content-Length")
+    return json.loads(await reader.readexactly(length))
+
+
+# Define an open document: its text, the line starts used to convert LSP positions,
+# the parse state of its last check and the edits made since
+class Document:
+    def __init__(self, uri, text, version):
+        self.uri = uri
+        self.text = text
+        self.version = version  # Version of the text, sent back with its diagnostics
+        self.line_starts = [0] + line_breaks(text)  # Offset of the first character of every line
+        self.state = None  # ParseState of the text as of the last check
+        self.dirty = None  # (start, end, delta): text[start:end] replaced state's text[start:end - delta]
+        self.timer = None  # Pending debounced check
+
+    # Method to convert an LSP position (line, UTF-16 column) to an offset in the text
+    def offset(self, position):
+        line = min(max(position['line'], 0), len(self.line_starts) - 1)
+        start = self.line_starts[line]
+        end = self.line_starts[line + 1] - 1 if line + 1 < len(self.line_starts) else len(self.text)
+        character = position['character']
+        if self.text[start:end].isascii():
+            return min(start + character, end)
+        offset, units = start, 0
+        while offset < end and units < character:
+            units += 2 if ord(self.text[offset]) > 0xFFFF else 1
+            offset += 1
+        return offset
+
+    # Method to convert an offset in the text to an LSP position
+    def position(self, offset):
+        offset = min(max(offset, 0), len(self.text))
+        line = bisect_right(self.line_starts, offset) - 1
+        return {'line': line, 'character': utf16_length(self.text[self.line_starts[line]:offset])}
+
+    # Method to get the LSP range of text[start:end]
+    def range(self, start, end):
+        return {'start': self.position(start), 'end': self.position(end)}
+
+    # Method to replace text[start:end] with 'new_text', keeping line starts and the
+    # region changed since the last check up to date
+    def replace(self, start, end, new_text):
+        delta = len(new_text) - (end - start)
+        self.text = self.text[:start] + new_text + self.text[end:]
+        first, last = bisect_right(self.line_starts, start), bisect_right(self.line_starts, end)
+        moved = [line_start + delta for line_start in self.line_starts[last:]]
+        self.line_starts[first:] = line_breaks(new_text, start) + moved
+        if self.dirty is None:
+            self.dirty = (start, start + len(new_text), delta)
+        else:
+            lo, hi, total = self.dirty
+            self.dirty = (min(lo, start), max(hi, end) + delta, total + delta)
+
+
+# Define the LanguageServer class: one client connection speaking a subset of LSP.
+# Documents stay lexed and parsed in memory; edits are re-checked through the
+# IncrementalParser, which only re-lexes and re-parses the functions they touch.
+class LanguageServer:
+    def __init__(self, reader, writer, parser=None, debounce=DEBOUNCE):
+        self.reader = reader
+        self.writer = writer
+        self.parser = parser or IncrementalParser()  # Unit cache, shared by all documents
+        self.debounce = debounce
+        self.documents = {}  # uri -> Document
+        self.initialized = False
+        self.shutdown_requested = False
+        self.handlers = {
+            'initialize': self.initialize,
+            'initialized': lambda params: None,
+            'shutdown': self.shutdown,
+            'textDocument/didOpen': self.did_open,
+            'textDocument/didChange': self.did_change,
+            'textDocument/didClose': self.did_close,
+            'textDocument/documentSymbol': self.document_symbol,
+        }
+
+    # Main method: serves messages until the client exits or disconnects; returns the
+    # exit code the LSP specification asks for
+    async def run(self):
+        while True:
+            try:
+                message = await read_message(self.reader)
+            except (ValueError, asyncio.IncompleteReadError) as e:
+                print(f"yah server: bad message: {e}", file=sys.stderr)
+                continue
+            if message is None or message.get('method') == 'exit':
+                break
+            self.dispatch(message)
+            await self.writer.drain()
+        for document in self.documents.values():
+            if document.timer is not None:
+                document.timer.cancel()
+        return 0 if self.shutdown_requested else 1
+
+    # Method to run the handler of one request or notification
+    def dispatch(self, message):
+        method, params = message.get('method'), message.get('params') or {}
+        is_request = 'id' in message
+        handler = self.handlers.get(method)
+        if handler is None:
+            if is_request:  # Unknown notifications, such as $/cancelRequest, are ignored
+                self.respond(message['id'], error={'code': METHOD_NOT_FOUND, 'message': f"Unknown method {method}"})
+            return
+        if not self.initialized and method != 'initialize':
+            if is_request:
+                self.respond(message['id'], error={'code': SERVER_NOT_INITIALIZED, 'message': "Not initialized"})
+            return
+        try:
+            result = handler(params)
+        except Exception as e:
+            print(f"yah server: {method} failed: {e!r}", file=sys.stderr)
+            if is_request:
+                self.respond(message['id'], error={'code': INTERNAL_ERROR, 'message': str(e)})
+            return
+        if is_request:
+            self.respond(message['id'], result)
+
+    # Method to send a message to the client
+    def send(self, message):
+        body = json.dumps(message, separators=(',', ':')).encode('utf-8')
+        self.writer.write(b'Content-Length: %d\r\n\r\n' % len(body) + body)
+
+    # Method to answer a request
+    def respond(self, request_id, result=None, error=None):
+        message = {'jsonrpc': '2.0', 'id': request_id}
+        if error is None:
+            message['result'] = result
+        else:
+            message['error'] = error
+        self.send(message)
+
+    # Method to handle 'initialize'
+    def initialize(self, params):
+        self.initialized = True
+        return {
+            'capabilities': {
+                'positionEncoding': 'utf-16',
+                'textDocumentSync': {'openClose': True, 'change': SYNC_INCREMENTAL},
+                'documentSymbolProvider': True,
+            },
+            'serverInfo': {'name': 'yah'},
+        }
+
+    # Method to handle 'shutdown'
+    def shutdown(self, params):
+        self.shutdown_requested = True
+        return None
+
+    # Method to handle 'textDocument/didOpen': the document is checked right away
+    def did_open(self, params):
+        item = params['textDocument']
+        document = Document(item['uri'], item['text'], item.get('version'))
+        self.documents[document.uri] = document
+        self.check(document)
+
+    # Method to handle 'textDocument/didChange': the edits are applied now, the check
+    # runs once the document has been quiet for self.debounce seconds
+    def did_change(self, params):
+        document = self.documents[params['textDocument']['uri']]
+        document.version = params['textDocument'].get('version')
+        for change in params['contentChanges']:
+            if 'range' in change:
+                start, end = document.offset(change['range']['start']), document.offset(change['range']['end'])
+                document.replace(start, max(start, end), change['text'])
+            else:
+                document.replace(0, len(document.text), change['text'])
+        if document.timer is not None:
+            document.timer.cancel()
+        document.timer = asyncio.get_running_loop().call_later(self.debounce, self.check, document)
+
+    # Method to handle 'textDocument/didClose': its diagnostics are cleared
+    def did_close(self, params):
+        document = self.documents.pop(params['textDocument']['uri'], None)
+        if document is not None:
+            if document.timer is not None:
+                document.timer.cancel()
+            self.send({
+                'jsonrpc': '2.0', 'method': 'textDocument/publishDiagnostics',
+                'params': {'uri': document.uri, 'diagnostics': []},
+            })
+
+    # Method to handle 'textDocument/documentSymbol': one symbol per declared function
+    def document_symbol(self, params):
+        document = self.documents[params['textDocument']['uri']]
+        self.refresh(document)
+        state, symbols = document.state, []
+        starts = state.starts  # Offsets of all the units, computed once
+        for index, unit in enumerate(state.units):
+            name = state.name_of(index)
+            if name is None or isinstance(name, Exception):
+                continue
+            start = starts[index]
+            end = start + len(unit.text.rstrip())
+            tokens = unit.tokens
+            if len(tokens) > 1:
+                selection = document.range(start + tokens.starts[1], start + tokens.ends[1])
+            else:
+                selection = document.range(start, start + tokens.ends[0])
+            symbols.append({
+                'name': name, 'kind': SYMBOL_FUNCTION, 'range': document.range(start, end),
+                'selectionRange': selection,
+            })
+        return symbols
+
+    # Method to bring the parse state of a document up to date with its text
+    def refresh(self, document):
+        if document.state is None:
+            document.state = self.parser.parse(document.text)
+        elif document.dirty is not None:
+            start, end, delta = document.dirty
+            document.state = self.parser.reparse(document.state, start, end - delta, document.text[start:end])
+        document.dirty = None
+
+    # Method to re-check a document and publish its diagnostics
+    def check(self, document):
+        document.timer = None
+        if self.documents.get(document.uri) is not document:
+            return  # Closed meanwhile
+        self.refresh(document)
+        self.send({
+            'jsonrpc': '2.0', 'method': 'textDocument/publishDiagnostics',
+            'params': {
+                'uri': document.uri, 'version': document.version,
+                'diagnostics': [self.diagnostic(document, error) for error in document.state.errors()],
+            },
+        })
+
+    # Method to convert a SyntaxError into an LSP diagnostic
+    def diagnostic(self, document, error):
+        token = error.token
+        position = getattr(token, 'position', None)
+        if position is None:
+            error_range = document.range(0, 0)
+        else:
+            line, column = position
+            start = document.line_starts[line - 1] + column - 1
+            inner = getattr(token, 'token', token)  # ShiftedToken wraps the unit's token
+            error_range = document.range(start, start + max(inner.end - inner.start, 0))
+        return {'range': error_range, 'severity': SEVERITY_ERROR, 'source': 'yah', 'message': error.args[0]}
+
+
+# Method to serve one client over stdin and stdout
+async def serve_stdio(debounce=DEBOUNCE):
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin.buffer)
+    transport, protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin, sys.stdout.buffer)
+    writer = asyncio.StreamWriter(transport, protocol, reader, loop)
+    return await LanguageServer(reader, writer, debounce=debounce).run()
+
+
+# Method to serve any number of clients on a local TCP port; they share one unit cache
+async def serve_tcp(port, host='127.0.0.1', debounce=DEBOUNCE):
+    parser = IncrementalParser()
+
+    async def client(reader, writer):
+        await LanguageServer(reader, writer, parser, debounce).run()
+        writer.close()
+
+    server = await asyncio.start_server(client, host, port)
+    print(f"yah server listening on {host}:{server.sockets[0].getsockname()[1]}", file=sys.stderr)
+    async with server:
+        await server.serve_forever()
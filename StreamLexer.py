@@ -0,0 +1,104 @@
+import codecs
+import io
+import mmap
+from FastLexer import FastLexer
+
+# Whitespace characters at which a chunk of source may be cut; none of them can occur
+# inside a token other than a string literal
+BOUNDARY_CHARS = (' ', '\n', '\t', '\r')
+
+
+# Define a token of the stream: a dict token like Lexer's whose 'position' attribute
+# holds its (line, column), both starting at 1, for error messages, like TokenStore's
+# Token. It has no __init__ of its own, which would double the cost of lexing a token.
+class StreamToken(dict):
+    __slots__ = ('position',)
+
+
+# Define the StreamLexer class to tokenize a program file lazily from a memory map,
+# holding at most one chunk of decoded source in memory at a time
+class StreamLexer:
+    # Initialize the StreamLexer with the path of the program and the chunk size in bytes
+    def __init__(self, path, chunk_size=1 << 20):
+        self.path = path  # The program file to be tokenized
+        self.chunk_size = chunk_size  # Bytes decoded per step
+        self.scanner = FastLexer('')  # Engine used to lex each chunk
+        self.line = 1  # Line at which the next chunk starts
+        self.line_start = 0  # Offset of that line's start, relative to the next chunk (<= 0)
+
+    # Main method: a generator yielding the same tokens as Lexer(text).tokenize(), as
+    # StreamTokens that also know their position
+    def tokenize(self):
+        self.line, self.line_start = 1, 0
+        # Decode UTF-8 and translate newlines the way open(path).read() does
+        decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder('utf-8')(), translate=True)
+        pending = []  # Decoded pieces not yet lexed; they hold no place to cut
+        inside = False  # True when the pending source ends inside a string literal
+        for chunk in self.read_chunks():
+            piece = decoder.decode(chunk)
+            # Only the new piece is searched, from where the open string closes if the
+            # pending source ends in one: a string, identifier or operator run spanning
+            # many chunks is not rescanned (and copied) for every chunk
+            start = piece.find('"') + 1 if inside else 0
+            cut = self.safe_boundary(piece, start) if start or not inside else 0
+            if cut > 0:
+                pending.append(piece[:cut])
+                yield from self.scan(''.join(pending))
+                piece, pending = piece[cut:], []
+                inside = piece.count('"') % 2 == 1
+            elif piece.count('"') % 2:
+                inside = not inside
+            pending.append(piece)
+        pending.append(decoder.decode(b'', final=True))
+        yield from self.scan(''.join(pending))
+
+    # Generator yielding the tokens of the next chunk of source with their positions;
+    # lines are counted between tokens only, so each character is looked at once
+    def scan(self, text):
+        count, rfind = text.count, text.rfind
+        line, line_start, last = self.line, self.line_start, 0
+        for token_type, value, start, _ in self.scanner.spans(text):
+            newlines = count('\n', last, start)
+            if newlines:
+                line += newlines
+                line_start = rfind('\n', last, start) + 1
+            last = start
+            token = StreamToken(type=token_type, value=value)
+            token.position = (line, start - line_start + 1)
+            yield token
+        newlines = count('\n', last)
+        if newlines:
+            line, line_start = line + newlines, rfind('\n', last) + 1
+        self.line, self.line_start = line, line_start - len(text)
+
+    # Generator yielding the raw bytes of the file through a read-only memory map. No
+    # 'with' block stays open across the yields: the map is closed when the generator is
+    # closed or dropped, and a generator dropped deep in the stack (after a
+    # RecursionError in the parser) must not have cleanup code to run there.
+    def read_chunks(self):
+        with open(self.path, 'rb') as file:
+            try:
+                mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # Empty files cannot be mapped
+                return
+        for start in range(0, len(mapped), self.chunk_size):  # The map keeps its own handle
+            yield mapped[start:start + self.chunk_size]
+
+    # Method to find the last position in 'text' where it can be split without cutting
+    # a token: a whitespace character preceded by an even number of double quotes.
+    # Returns 0 when no such position exists (e.g. inside a long string literal).
+    @staticmethod
+    def safe_boundary(text, lo=0, hi=None):
+        hi = len(text) if hi is None else hi
+        quotes = text.count('"', lo, hi)  # Quotes before 'hi'
+        while hi > lo:
+            quote = text.rfind('"', lo, hi)  # Last quote before 'hi'
+            if quotes % 2 == 0:  # Everything between that quote and 'hi' is outside a string
+                start = max(quote + 1, lo)
+                cut = max(text.rfind(char, start, hi) for char in BOUNDARY_CHARS)
+                if cut >= start:
+                    return cut
+            if quote < lo:
+                break
+            hi, quotes = quote, quotes - 1
+        return 0
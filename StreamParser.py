@@ -0,0 +1,120 @@
+from collections import deque
+from Parser import Parser, SyntaxError
+
+
+# Define a bounded, forward-only view over a token iterator that the Parser can index
+# like a list. Only the most recent 'capacity' tokens are kept in memory.
+class TokenWindow:
+    def __init__(self, tokens, capacity=64):
+        self.source = iter(tokens)  # Lazily produced tokens
+        self.buffer = deque()  # Tokens currently held in the window
+        self.base = 0  # Absolute index of buffer[0]
+        self.capacity = capacity  # Maximum number of tokens held
+
+    # Method to get the token at absolute index 'index', pulling tokens as needed
+    def __getitem__(self, index):
+        while index >= self.base + len(self.buffer):
+            token = next(self.source, None)
+            if token is None:
+                raise IndexError("token index out of range")
+            self.buffer.append(token)
+            if len(self.buffer) > self.capacity:
+                self.buffer.popleft()  # Drop the oldest token
+                self.base += 1
+        if index < self.base:
+            raise IndexError(f"token {index} already left the lookahead window")
+        return self.buffer[index - self.base]
+
+    # Method to get the type of the token at 'index', like TokenStore.type_at
+    def type_at(self, index):
+        return self[index]['type']
+
+    # Method to get the value of the token at 'index', like TokenStore.value_at
+    def value_at(self, index):
+        return self[index]['value']
+
+    # Method to close the token source, e.g. a StreamLexer generator and its memory map
+    def close(self):
+        close = getattr(self.source, 'close', None)
+        if close is not None:
+            close()
+
+    # Method to check whether a token exists at absolute index 'index'
+    def has(self, index):
+        try:
+            self[index]
+        except IndexError:
+            return False
+        return True
+
+
+# Define a Parser that validates a token stream in one forward pass, detecting
+# functions as it reaches them instead of scanning the whole token list up front.
+# Nothing of a function is kept once it is checked: no AST is built and there is no
+# function table, only the set of names that catches duplicates and a missing main.
+# 'on_function' is called with the name of every function as it is reached.
+class StreamParser(Parser):
+    def __init__(self, tokens, capacity=64, on_function=None):
+        self.tokens = TokenWindow(tokens, capacity)  # Bounded lookahead buffer
+        self.current_pos = 0  # Initialize the current token position
+        self.names = set()  # Names of the functions reached so far
+        self.on_function = on_function  # Called with each function name, if given
+
+    # A function is only checked, so the parsing methods build no nodes
+    @staticmethod
+    def make_node(kind, token=None, children=(), value=None, span=None):
+        return None
+
+    # Method to get the type of the current token from the window
+    def current_type(self):
+        return self.tokens.type_at(self.current_pos)
+
+    # Method to get the value of the current token from the window
+    def current_value(self):
+        return self.tokens.value_at(self.current_pos)
+
+    # Method to get the last token; once the stream ran out it is the newest one in the window
+    def last_token(self):
+        return self.tokens.buffer[-1] if self.tokens.buffer else None
+
+    # Method to turn an exception into its SyntaxError; a RecursionError may have broken
+    # the token source too, so the error is at the newest token in the window
+    def syntax_error(self, error):
+        if isinstance(error, RecursionError):
+            return SyntaxError("Blocks nested too deeply for the recursive parser", self.last_token())
+        return super().syntax_error(error)
+
+    # Main parsing method: functions are checked in source order, 'main' at the end. The
+    # token source is closed here, once an error has unwound the parser's frames.
+    def parse(self):
+        try:
+            self.parse_stream()
+        finally:
+            self.tokens.close()
+
+    # Method to check the functions of the stream one after the other
+    def parse_stream(self):
+        func_names = self.names
+        while self.tokens.has(self.current_pos):
+            token = self.current_token()
+            if token['type'] == "KEYWORD" and token['value'] == "function":
+                if not self.tokens.has(self.current_pos + 1):  # A trailing 'function' declares nothing
+                    raise SyntaxError("Expected function name", token)
+                func_name = self.tokens[self.current_pos + 1]['value']  # Get the function name
+                if func_name in func_names:
+                    raise SyntaxError(f"Duplicate function name '{func_name}' detected.", token)
+                func_names.add(func_name)
+                if self.on_function is not None:
+                    self.on_function(func_name)
+                try:
+                    self.parse_function()  # Consumes the function up to its closing '}'
+                except (IndexError, RecursionError) as error:
+                    raise self.syntax_error(error) from None
+            else:
+                self.advance()  # Tokens between functions are ignored, as in Parser.parse
+        self.main_validity()
+
+    # Method to check that a function named 'main' was reached
+    def main_validity(self):
+        if 'main' not in self.names:
+            self.report(SyntaxError("No Main Function detected"))
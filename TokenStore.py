@@ -0,0 +1,143 @@
+from array import array
+from bisect import bisect_right
+from globals import TOKEN_CODES, TOKEN_NAMES
+
+
+# Define a lightweight view of one token in a TokenStore. It supports the same
+# token['type'] / token['value'] access as the dict tokens produced by Lexer.
+class Token:
+    __slots__ = ('store', 'index')
+
+    def __init__(self, store, index):
+        self.store = store  # The TokenStore holding the token's columns
+        self.index = index  # Position of the token in the store
+
+    # Method to read the 'type' and 'value' fields like a dict token
+    def __getitem__(self, key):
+        if key == 'type':
+            return self.store.type_at(self.index)
+        if key == 'value':
+            return self.store.value_at(self.index)
+        raise KeyError(key)
+
+    @property
+    def start(self):
+        return self.store.starts[self.index]  # Offset of the first character
+
+    @property
+    def end(self):
+        return self.store.ends[self.index]  # Offset just past the last character
+
+    # (line, column) of the token, both starting at 1, or None when unknown
+    @property
+    def position(self):
+        return self.store.line_col(self.start)
+
+    def __repr__(self):
+        return f"{{'type': '{self['type']}', 'value': {self['value']!r}}}"
+
+
+# Define a compact, column-oriented token list: one byte for the type code, two
+# offsets and an index into a table of interned values per token
+class TokenStore:
+    def __init__(self, source_code=None):
+        self.source_code = source_code  # Source the offsets refer to, if known
+        self.kinds = array('B')  # Token type codes (see TOKEN_CODES)
+        self.starts = array('q')  # Start offsets, -1 when unknown
+        self.ends = array('q')  # End offsets, -1 when unknown
+        self.refs = array('L')  # Indexes into self.values
+        self.values = []  # Interned token values
+        self.value_ids = {}  # Value -> index in self.values
+        self.line_starts = None  # Offsets of line starts, built on first lookup
+
+    # Method to build a store from a list of dict tokens (no source positions)
+    @classmethod
+    def from_tokens(cls, tokens):
+        store = cls()
+        for token in tokens:
+            store.append(token['type'], token['value'])
+        return store
+
+    # Method to build a read-only store over existing columns (e.g. memory-mapped ones)
+    @classmethod
+    def from_columns(cls, source_code, kinds, starts, ends, refs, values):
+        store = cls(source_code)
+        store.kinds, store.starts, store.ends, store.refs = kinds, starts, ends, refs
+        store.values = values
+        store.value_ids = {value: ref for ref, value in enumerate(values)}
+        return store
+
+    # Method to add a token at the end of the store
+    def append(self, token_type, value, start=-1, end=-1):
+        ref = self.value_ids.get(value)
+        if ref is None:  # First occurrence: intern the value
+            ref = self.value_ids[value] = len(self.values)
+            self.values.append(value)
+        self.kinds.append(TOKEN_CODES[token_type])
+        self.starts.append(start)
+        self.ends.append(end)
+        self.refs.append(ref)
+
+    # Method to add many (type, value, start, end) tuples; the hot path of the lexers
+    def extend(self, spans):
+        kinds, starts, ends, refs = self.kinds.append, self.starts.append, self.ends.append, self.refs.append
+        values, value_ids, codes = self.values, self.value_ids, TOKEN_CODES
+        for token_type, value, start, end in spans:
+            ref = value_ids.get(value)
+            if ref is None:
+                ref = value_ids[value] = len(values)
+                values.append(value)
+            kinds(codes[token_type])
+            starts(start)
+            ends(end)
+            refs(ref)
+
+    # Method to copy the tokens [start, stop) into a new store; offsets are kept as they are.
+    # The copy is made of arrays even when the columns are memoryviews over a mapped cache
+    # entry, so it can be pickled to worker processes.
+    def slice(self, start, stop):
+        store = TokenStore(self.source_code)
+        for column in ('kinds', 'starts', 'ends'):
+            getattr(store, column).frombytes(memoryview(getattr(self, column))[start:stop].cast('B'))
+        values, value_ids, refs = store.values, store.value_ids, store.refs.append
+        for ref in self.refs[start:stop]:
+            value = self.values[ref]
+            new = value_ids.get(value)
+            if new is None:  # Re-intern so the new store only holds its own values
+                new = value_ids[value] = len(values)
+                values.append(value)
+            refs(new)
+        return store
+
+    def __len__(self):
+        return len(self.kinds)
+
+    # Method to get a Token view; raises IndexError past the end like a list
+    def __getitem__(self, index):
+        if 0 <= index < len(self.kinds):
+            return Token(self, index)
+        raise IndexError("token index out of range")
+
+    def __iter__(self):
+        return (Token(self, index) for index in range(len(self.kinds)))
+
+    # Method to get the type name of the token at 'index'
+    def type_at(self, index):
+        return TOKEN_NAMES[self.kinds[index]]
+
+    # Method to get the value of the token at 'index'
+    def value_at(self, index):
+        return self.values[self.refs[index]]
+
+    # Method to convert a source offset into a (line, column) pair in O(log n)
+    def line_col(self, offset):
+        if offset < 0 or self.source_code is None:
+            return None
+        if self.line_starts is None:
+            self.line_starts = array('q', [0])
+            find, pos = self.source_code.find, self.source_code.find('\n')
+            while pos != -1:
+                self.line_starts.append(pos + 1)
+                pos = find('\n', pos + 1)
+        line = bisect_right(self.line_starts, offset)
+        return line, offset - self.line_starts[line - 1] + 1
@@ -0,0 +1,161 @@
+import sys
+from globals import (
+    LOAD_LOCAL, LOAD_CONST, STORE_LOCAL, ADD, SUB, MUL, DIV,
+    JUMP_IF_LT, JUMP_IF_LE, JUMP_IF_GT, JUMP_IF_GE, JUMP_IF_NE,
+    JUMP, CALL, CALL_BUILTIN, POP, RETURN, VLOOP,
+)
+from Memo import pure_functions
+
+
+# Define a custom exception for errors raised while a program runs
+class RuntimeError(Exception):
+    """Custom exception for runtime errors."""
+    def __init__(self, message, token=None):
+        super().__init__(message)  # Call the base class constructor
+        self.token = token  # The token of the failing instruction, if known
+
+    # Append the token's line and column to the message when they are known
+    def __str__(self):
+        message = super().__str__()
+        position = getattr(self.token, 'position', None)
+        if position is None:
+            return message
+        return f"{message} at line {position[0]}, column {position[1]}"
+
+
+# Method to render a runtime value the way 'print' shows it
+def format_value(value):
+    return 'null' if value is None else str(value)
+
+
+# Define the VM class: a dispatch loop over the flat bytecode made by Compiler.
+# Calls push a frame on an explicit list, so YAH recursion does not use the Python stack.
+# With a MemoCache, calls to pure functions are looked up by argument values first and
+# a hit skips the call; a hit also skips the call depth check the call would have made.
+class VM:
+    def __init__(self, functions, output=None, max_depth=10000, memo=None):
+        self.functions = functions  # Compiled functions, indexed like CALL arguments
+        self.output = output or sys.stdout  # Stream written by 'print'
+        self.max_depth = max_depth  # Maximum number of nested calls
+        self.memo = memo  # MemoCache of pure function results, or None
+        self.pure = pure_functions(functions) if memo is not None else set()  # Indexes of memoized functions
+        self.builtins = {'print': self.builtin_print}
+
+    # Main method: run 'main' and return the value it returns
+    def run(self, entry='main'):
+        for index, function in enumerate(self.functions):
+            if function.name == entry:
+                if function.params:
+                    raise RuntimeError(f"Function '{entry}' must not take parameters")
+                return self.execute(index, [])
+        raise RuntimeError(f"No function '{entry}' to run")
+
+    # Builtin 'print': writes its arguments separated by spaces
+    def builtin_print(self, *values):
+        self.output.write(' '.join(format_value(value) for value in values) + '\n')
+
+    # Method to execute functions[index] with 'args' until it returns
+    def execute(self, index, args):
+        functions, builtins, max_depth = self.functions, self.builtins, self.max_depth
+        memo, pure = self.memo, self.pure
+        function = functions[index]
+        code, consts = function.code, function.consts
+        local = args + [None] * (function.locals - function.params)
+        stack = []
+        frames = []  # Saved (function, code, consts, locals, stack, pc, memo key) of the callers
+        key = None  # Memo key of the running call, None unless it is a memoized call
+        pc = 0
+        try:
+            while True:
+                op = code[pc]
+                arg = code[pc + 1]
+                pc += 2
+                if op == LOAD_LOCAL:
+                    stack.append(local[arg])
+                elif op == LOAD_CONST:
+                    stack.append(consts[arg])
+                elif op == STORE_LOCAL:
+                    local[arg] = stack.pop()
+                elif op == ADD:
+                    right = stack.pop()
+                    stack[-1] = stack[-1] + right  # int + int or str + str
+                elif JUMP_IF_LT <= op <= JUMP_IF_NE:  # One of the conditional jumps
+                    right = stack.pop()
+                    left = stack.pop()
+                    if op == JUMP_IF_GE:
+                        taken = left >= right
+                    elif op == JUMP_IF_LT:
+                        taken = left < right
+                    elif op == JUMP_IF_GT:
+                        taken = left > right
+                    elif op == JUMP_IF_LE:
+                        taken = left <= right
+                    elif op == JUMP_IF_NE:
+                        taken = left != right
+                    else:  # JUMP_IF_EQ, the one left in the range
+                        taken = left == right
+                    if taken:
+                        pc = arg
+                elif op == JUMP:
+                    pc = arg
+                elif op == SUB:
+                    right = stack.pop()
+                    stack[-1] = stack[-1] - right
+                elif op == MUL:
+                    right = stack.pop()
+                    if type(right) is str or type(stack[-1]) is str:  # No string repetition
+                        raise TypeError
+                    stack[-1] = stack[-1] * right
+                elif op == DIV:
+                    right = stack.pop()
+                    stack[-1] = stack[-1] // right  # Integer division
+                elif op == CALL:
+                    callee = functions[arg]
+                    count = callee.params
+                    if count:
+                        callee_args = stack[-count:]
+                        del stack[-count:]
+                    else:
+                        callee_args = []
+                    callee_key = None
+                    if arg in pure:
+                        callee_key = (arg, *callee_args)
+                        hit, value = memo.lookup(callee_key)
+                        if hit:
+                            stack.append(value)
+                            continue
+                    if len(frames) >= max_depth:
+                        raise RuntimeError("Maximum call depth exceeded", function.tokens[pc // 2 - 1])
+                    frames.append((function, code, consts, local, stack, pc, key))
+                    key = callee_key
+                    function, code, consts = callee, callee.code, callee.consts
+                    local = callee_args + [None] * (callee.locals - count)
+                    stack = []
+                    pc = 0
+                elif op == RETURN:
+                    value = stack.pop()
+                    if key is not None:
+                        memo.store(key, value)
+                    if not frames:
+                        return value
+                    function, code, consts, local, stack, pc, key = frames.pop()
+                    stack.append(value)
+                elif op == POP:
+                    stack.pop()
+                elif op == CALL_BUILTIN:
+                    name, count = consts[arg]
+                    values = stack[len(stack) - count:]
+                    del stack[len(stack) - count:]
+                    stack.append(builtins[name](*values))
+                elif op == VLOOP:
+                    plan = consts[arg]
+                    if plan.run(local):
+                        pc = plan.exit  # Done in one step; else the loop runs as compiled
+                else:
+                    raise RuntimeError(f"Unknown opcode {op}", function.tokens[pc // 2 - 1])
+        except TypeError:
+            raise RuntimeError(
+                f"Unsupported operand types in '{function.name}'", function.tokens[pc // 2 - 1]
+            ) from None
+        except ZeroDivisionError:
+            raise RuntimeError("Division by zero", function.tokens[pc // 2 - 1]) from None
@@ -0,0 +1,338 @@
+from math import comb
+from globals import (
+    LOAD_LOCAL, LOAD_CONST, STORE_LOCAL, ADD, SUB, MUL, DIV,
+    JUMP_IF_LT, JUMP_IF_LE, JUMP_IF_GT, JUMP_IF_GE, JUMP_IF_EQ, JUMP_IF_NE,
+)
+
+try:
+    import numpy
+except ImportError:  # Optional: without it only closed-form loops are vectorized
+    numpy = None
+
+# Comparison that keeps a loop running, by the jump compiled to leave it
+CONTINUE_WHILE = {
+    JUMP_IF_GE: '<', JUMP_IF_GT: '<=', JUMP_IF_LE: '>', JUMP_IF_LT: '>=', JUMP_IF_NE: '==', JUMP_IF_EQ: '!=',
+}
+# The same comparison with its operands swapped
+MIRRORED = {'<': '>', '<=': '>=', '>': '<', '>=': '<=', '==': '==', '!=': '!='}
+COMPARISONS = {
+    '<': lambda a, b: a < b, '<=': lambda a, b: a <= b,
+    '>': lambda a, b: a > b, '>=': lambda a, b: a >= b,
+    '==': lambda a, b: a == b, '!=': lambda a, b: a != b,
+}
+# Python implementations of the arithmetic opcodes, as the VM runs them on integers
+OPERATIONS = {
+    ADD: lambda a, b: a + b, SUB: lambda a, b: a - b,
+    MUL: lambda a, b: a * b, DIV: lambda a, b: a // b,
+}
+# Highest polynomial degree summed in closed form
+MAX_DEGREE = 16
+# Indexes evaluated per NumPy batch
+CHUNK = 1 << 16
+# Magnitude every int64 intermediate must stay below
+INT64_LIMIT = 1 << 63
+
+
+# Method to turn the bytecode [lo, hi) into symbolic statements: a list of (slot, tree)
+# for every STORE_LOCAL, where a tree is ('local', slot), ('const', int) or
+# (opcode, left, right). Returns (statements, trees left on the stack), or None when
+# the code does anything else than integer arithmetic on locals.
+def symbolic(code, consts, lo, hi):
+    statements, stack = [], []
+    for pc in range(lo, hi, 2):
+        op, arg = code[pc], code[pc + 1]
+        if op == LOAD_LOCAL:
+            stack.append(('local', arg))
+        elif op == LOAD_CONST:
+            if type(consts[arg]) is not int:
+                return None
+            stack.append(('const', consts[arg]))
+        elif op in OPERATIONS:
+            right = stack.pop()
+            stack.append((op, stack.pop(), right))
+        elif op == STORE_LOCAL and len(stack) == 1:
+            statements.append((arg, stack.pop()))
+        else:
+            return None
+    return statements, stack
+
+
+# Method to list the local slots a tree reads
+def slots(tree, found=None):
+    found = set() if found is None else found
+    if tree[0] == 'local':
+        found.add(tree[1])
+    elif tree[0] != 'const':
+        slots(tree[1], found)
+        slots(tree[2], found)
+    return found
+
+
+# Method to replace the locals of a tree that are keys of 'trees' by their tree
+def substitute(tree, trees):
+    if tree[0] == 'local':
+        return trees.get(tree[1], tree)
+    if tree[0] == 'const':
+        return tree
+    return tree[0], substitute(tree[1], trees), substitute(tree[2], trees)
+
+
+# Method to evaluate a tree on Python integers; 'index' is the value of the loop
+# variable's slot 'counter'
+def evaluate(tree, local, counter, index):
+    if tree[0] == 'local':
+        return index if tree[1] == counter else local[tree[1]]
+    if tree[0] == 'const':
+        return tree[1]
+    return OPERATIONS[tree[0]](evaluate(tree[1], local, counter, index), evaluate(tree[2], local, counter, index))
+
+
+# Method to turn a tree into the coefficients of a polynomial in the loop variable,
+# lowest degree first; None if it divides by something that depends on the index
+def polynomial(tree, local, counter):
+    if tree[0] == 'local':
+        return [0, 1] if tree[1] == counter else [local[tree[1]]]
+    if tree[0] == 'const':
+        return [tree[1]]
+    left, right = polynomial(tree[1], local, counter), polynomial(tree[2], local, counter)
+    if left is None or right is None:
+        return None
+    op = tree[0]
+    if op == DIV:
+        if len(left) > 1 or len(right) > 1:
+            return None
+        return [left[0] // right[0]]  # May raise ZeroDivisionError, as the loop would
+    if op == MUL:
+        product = [0] * (len(left) + len(right) - 1)
+        for i, a in enumerate(left):
+            for j, b in enumerate(right):
+                product[i + j] += a * b
+        return product
+    sign = 1 if op == ADD else -1
+    total = left + [0] * (len(right) - len(left))
+    for i, b in enumerate(right):
+        total[i] += sign * b
+    return total
+
+
+# Method to sum the polynomial 'coefficients' of i over i = start, start + step, ...
+# (count terms) exactly, with power sums of 0..count-1
+def sum_polynomial(coefficients, start, step, count):
+    # Rewrite p(start + step * j) as a polynomial in j
+    shifted = [0] * len(coefficients)
+    for degree, coefficient in enumerate(coefficients):
+        if coefficient:
+            for k in range(degree + 1):
+                shifted[k] += coefficient * comb(degree, k) * start ** (degree - k) * step ** k
+    # power[k] = sum of j**k for j in 0..count-1, from the binomial expansion of count**(k+1)
+    power = []
+    for k in range(len(shifted)):
+        rest = sum(comb(k + 1, m) * power[m] for m in range(k))
+        power.append((count ** (k + 1) - rest) // (k + 1))
+    return sum(coefficient * power[k] for k, coefficient in enumerate(shifted))
+
+
+# Method to bound the magnitude of every intermediate value of a tree, for an index of
+# magnitude at most 'index_bound'; the values NumPy computes in int64 must fit
+def magnitude(tree, local, counter, index_bound):
+    if tree[0] == 'local':
+        return index_bound if tree[1] == counter else abs(local[tree[1]])
+    if tree[0] == 'const':
+        return abs(tree[1])
+    left = magnitude(tree[1], local, counter, index_bound)
+    right = magnitude(tree[2], local, counter, index_bound)
+    if tree[0] == MUL:
+        bound = left * right
+    elif tree[0] == DIV:
+        bound = left  # Divisors are non-zero integers
+    else:
+        bound = left + right
+    return max(bound, left, right)
+
+
+# Method to evaluate a tree over an int64 array of indexes; None if it divides by zero
+def evaluate_array(tree, local, counter, indexes):
+    if tree[0] == 'local':
+        return indexes if tree[1] == counter else local[tree[1]]
+    if tree[0] == 'const':
+        return tree[1]
+    left = evaluate_array(tree[1], local, counter, indexes)
+    right = evaluate_array(tree[2], local, counter, indexes)
+    if left is None or right is None:
+        return None
+    if tree[0] == DIV:
+        if numpy.any(numpy.asarray(right) == 0):
+            return None
+        return numpy.floor_divide(left, right)  # Rounds toward minus infinity, like //
+    return OPERATIONS[tree[0]](left, right)
+
+
+# Define the VectorLoop class: the plan to run a counted 'for' loop in one step. It
+# applies to loops whose condition compares the loop variable with a value the body
+# does not change, whose update adds a constant step, and whose body is straight-line
+# integer arithmetic where every variable is either
+#   - recomputed from the index and loop invariants ('MANLO t = i * 2;'), so only its
+#     value in the last iteration survives, or
+#   - an accumulator ('s = s + t;', 's = s + i - t;') that only its own statement reads,
+#     so its final value is its start value plus a sum over the index range.
+# Sums of polynomials in the index are taken in closed form; other sums (divisions by
+# the index) are computed with NumPy in int64 when the values provably fit. Anything
+# else (other types, overflow risk, division by zero, a loop that never ends) makes
+# run() return False and the VM runs the loop one iteration at a time, so the results
+# are exactly those of the scalar loop.
+class VectorLoop:
+    def __init__(self, counter, compare, bound, step, statements, exit):
+        self.counter = counter  # Slot of the loop variable
+        self.compare = compare  # Comparison that keeps the loop running: counter <compare> bound
+        self.bound = bound  # Invariant tree compared with the loop variable
+        self.step = step  # Invariant tree added to the loop variable every iteration
+        self.statements = statements  # (slot, tree, accumulate): the tree is the increment of an accumulator
+        self.exit = exit  # Code offset just past the loop
+        self.invariants = set().union(
+            slots(bound), slots(step), *(slots(tree) for _, tree, _ in statements),
+        ) - {counter}  # Slots the loop reads but never writes
+
+    # Method to build the plan of the loop compiled at [top, exit) of 'function', with
+    # its condition jump at 'test', its body at [body, update) and its update at
+    # [update, exit - 2); returns None when the loop is not a counted straight-line loop
+    @classmethod
+    def build(cls, function, top, test, body, update, exit):
+        code, consts = function.code, function.consts
+        condition = symbolic(code, consts, top, test)
+        if condition is None or condition[0] or len(condition[1]) != 2 or code[test] not in CONTINUE_WHILE:
+            return None
+        left, right = condition[1]
+        compare = CONTINUE_WHILE[code[test]]
+        if right[0] == 'local' and left[0] != 'local':
+            left, right, compare = right, left, MIRRORED[compare]
+        if left[0] != 'local':
+            return None
+        counter = left[1]
+        increment = symbolic(code, consts, update, exit - 2)
+        statements = symbolic(code, consts, body, update)
+        if increment is None or statements is None or statements[1] or increment[1]:
+            return None
+        if len(increment[0]) != 1 or increment[0][0][0] != counter:
+            return None
+        step = cls.accumulated(increment[0][0][1], counter)
+        written = [slot for slot, _ in statements[0]]
+        if step is None or counter in written or len(set(written)) != len(written):
+            return None
+        if slots(right) & ({counter} | set(written)) or slots(step) & ({counter} | set(written)):
+            return None
+        plan = []
+        recomputed = {}  # Slot -> tree of the values recomputed every iteration so far
+        for slot, tree in statements[0]:
+            tree = substitute(tree, recomputed)
+            read = slots(tree) & set(written)
+            if not read:
+                recomputed[slot] = tree
+                plan.append((slot, tree, False))
+                continue
+            if read != {slot}:
+                return None  # Reads a value of the previous iteration
+            term = cls.accumulated(tree, slot)
+            if term is None:
+                return None
+            plan.append((slot, term, True))
+        return cls(counter, compare, right, step, plan, exit)
+
+    # Method to split 'slot = slot + a - b ...', where the slot itself is read once and
+    # only added, into the term its value grows by ('0 + a - b ...'); None otherwise
+    @classmethod
+    def accumulated(cls, tree, slot):
+        if tree == ('local', slot):
+            return ('const', 0)
+        if tree[0] not in (ADD, SUB):
+            return None
+        left, right = tree[1], tree[2]
+        if slot in slots(left) and slot not in slots(right):
+            term = cls.accumulated(left, slot)
+            return None if term is None else (tree[0], term, right)
+        if tree[0] == ADD and slot in slots(right) and slot not in slots(left):
+            term = cls.accumulated(right, slot)
+            return None if term is None else (ADD, left, term)
+        return None
+
+    # Method to run the loop on the frame's locals; returns False, with the locals
+    # untouched, when the loop must run one iteration at a time instead
+    def run(self, local):
+        counter = self.counter
+        start = local[counter]
+        if type(start) is not int or any(type(local[slot]) is not int for slot in self.invariants):
+            return False
+        try:
+            bound = evaluate(self.bound, local, counter, start)
+            step = evaluate(self.step, local, counter, start)
+        except ZeroDivisionError:
+            return False
+        indexes = self.iterations(start, bound, step)
+        if indexes is None:
+            return False
+        try:
+            count = len(indexes)
+        except OverflowError:
+            return False
+        if not count:
+            return True
+        results = []
+        for slot, tree, accumulate in self.statements:
+            if accumulate and type(local[slot]) is not int:
+                return False
+            value = self.reduce(tree, local, indexes, count, accumulate)
+            if value is None:
+                return False
+            results.append((slot, local[slot] + value if accumulate else value))
+        for slot, value in results:
+            local[slot] = value
+        local[counter] = indexes[-1] + step
+        return True
+
+    # Method to get the range of values the loop variable takes, or None if the loop
+    # does not end
+    def iterations(self, start, bound, step):
+        compare = self.compare
+        if not COMPARISONS[compare](start, bound):
+            return range(0)
+        if compare == '==':
+            return range(start, start + step, step) if step else None
+        if step > 0 and compare in ('<', '<='):
+            return range(start, bound + (compare == '<='), step)
+        if step < 0 and compare in ('>', '>='):
+            return range(start, bound - (compare == '>='), step)
+        if step and compare == '!=' and (bound - start) % step == 0 and (bound - start) // step > 0:
+            return range(start, bound, step)
+        return None
+
+    # Method to compute a statement over the index range: the sum of its values when
+    # 'total' is set, else its value in the last iteration. Every iteration's value is
+    # checked for division by zero. Returns None if this can not be done exactly.
+    def reduce(self, tree, local, indexes, count, total):
+        counter = self.counter
+        try:
+            coefficients = polynomial(tree, local, counter)
+        except ZeroDivisionError:
+            return None
+        if coefficients is not None:
+            if not total:
+                return evaluate(tree, local, counter, indexes[-1])
+            if len(coefficients) > MAX_DEGREE + 1:
+                return None
+            return sum_polynomial(coefficients, indexes[0], indexes.step, count)
+        # The index is a divisor somewhere: every iteration has to be computed
+        if numpy is None:
+            return None
+        index_bound = max(abs(indexes[0]), abs(indexes[-1]))
+        if magnitude(tree, local, counter, index_bound) * min(count, CHUNK) >= INT64_LIMIT:
+            return None
+        result = 0
+        for lo in range(0, count, CHUNK):
+            chunk = indexes[lo:lo + CHUNK]
+            values = evaluate_array(tree, local, counter, numpy.arange(
+                chunk.start, chunk.stop, chunk.step, dtype=numpy.int64,
+            ))
+            if values is None:
+                return None
+            if total:
+                result += int(numpy.sum(numpy.broadcast_to(values, (len(chunk),)), dtype=numpy.int64))
+        return result if total else evaluate(tree, local, counter, indexes[-1])
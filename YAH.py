@@ -1,25 +1,240 @@
-from Lexer import Lexer
+from StreamLexer import StreamLexer
 from Parser import Parser as parser, SyntaxError
-from Dashboard import Dashboard
+from StreamParser import StreamParser
+from ParallelParser import ParallelParser
+from ParallelLexer import ParallelLexer
+from LLParser import LLParser
+from LazyParser import LazyParser
+from Dashboard import Dashboard, FUNCTIONS_HEADER, RULE
+from Compiler import Compiler, CompileError
+from VM import VM, RuntimeError
+from Optimizer import Optimizer
+from SemanticAnalyzer import SemanticAnalyzer
+from Memo import MemoCache, MEMO_SIZE
+from Cache import CompileCache, CacheEntry
+from Batch import Batch, LEXERS  # LEXERS: engines selectable from the command line
+import argparse
 import sys
+import time
+from contextlib import nullcontext
 
-if(len(sys.argv) > 1):
-    file = open(sys.argv[1])
-    text = file.read()
-    lexer = Lexer(text)
-    tokens = lexer.tokenize()
+arg_parser = argparse.ArgumentParser(description="YAH Programming Language")
+arg_parser.add_argument('file', nargs='?', help="YAH program file")
+arg_parser.add_argument('--lexer', choices=sorted(LEXERS), default='fast', help="lexer engine to use")
+arg_parser.add_argument('--stream', action='store_true', help="lex and parse the memory-mapped file lazily in constant memory")
+arg_parser.add_argument('--run', action='store_true', help="compile the program to bytecode and run it from main")
+arg_parser.add_argument('-O', dest='opt_level', type=int, choices=[0, 1, 2], default=0, help="optimization level for --run")
+arg_parser.add_argument('--vectorize', action='store_true', help="with --run: run counted for-loops with straight-line arithmetic bodies in one step (closed form, or NumPy if installed)")
+arg_parser.add_argument('--memo', nargs='?', type=int, const=MEMO_SIZE, metavar='SIZE', help="with --run: cache the results of pure functions by argument values (LRU of SIZE entries, default %(const)s)")
+arg_parser.add_argument('--report', action='store_true', help="print what the optimizer removed and how long the run took")
+arg_parser.add_argument('--parser', choices=['recursive', 'll'], default='recursive', help="parser engine: recursive descent, or the table-driven LL(1) parser that handles any nesting depth")
+arg_parser.add_argument('--lazy', nargs='?', const='main', metavar='ENTRY', help="parse only the functions reachable from ENTRY (default: main); report unreachable and undefined functions")
+arg_parser.add_argument('--jobs', type=int, default=1, metavar='N', help="lex large files and parse functions (or --batch files) in N worker processes")
+arg_parser.add_argument('--batch', nargs='+', metavar='PATH', help="check files, directories and globs; one JSON line per file")
+arg_parser.add_argument('--recover', action='store_true', help="report every syntax error in one pass instead of stopping at the first")
+arg_parser.add_argument('--max-errors', type=int, default=100, metavar='N', help="stop --recover after N errors")
+arg_parser.add_argument('--server', action='store_true', help="run as a language server (LSP subset) on stdin/stdout")
+arg_parser.add_argument('--port', type=int, metavar='N', help="with --server: listen on 127.0.0.1:N instead, for several clients")
+arg_parser.add_argument('--no-cache', action='store_true', help="do not read or write the __yahcache__ directory")
+arg_parser.add_argument('--profile', nargs='?', const='', metavar='PATH', help="show phase timings, counters and per-function costs; export them to PATH")
+arg_parser.add_argument('--profile-format', choices=['json', 'pstats'], help="format of the --profile export (default: json for .json files, else pstats)")
+args = arg_parser.parse_args()
 
-    for i, token in enumerate(tokens):
+
+# Method to print what a LazyParser found out about the call graph
+def print_reachability(p):
+    unreachable = p.unreachable()
+    print(f"Reachable functions: {len(p.reached)} of {len(p.funcs)} from '{p.entry}'")
+    if unreachable:
+        print(f"Unreachable functions (not parsed): {', '.join(unreachable)}")
+    for name, calls in p.undefined.items():
+        for token in calls:
+            line, column = token.position
+            print(f"Undefined function '{name}' called at line {line}, column {column}")
+
+
+# Method to print the errors of the SemanticAnalyzer; returns True if there were any
+def print_semantic(errors):
+    for e in errors:
+        print(f"Semantic Error: {e}")
+    if errors:
+        print(f"{len(errors)} semantic error(s)")
+    return bool(errors)
+
+
+# Stand-in for a disabled Profiler: it does nothing, and Profiler is only imported
+# when --profile asks for it
+class NoProfiler:
+    enabled = False
+    source = None  # Program file, unused
+
+    # Method to time nothing
+    @staticmethod
+    def phase(name):
+        return nullcontext()
+
+    # Method to count nothing
+    @staticmethod
+    def count_tokens(tokens):
         pass
-        # print(f"{token['type']} {token['value']}")
 
-    # Parse the tokens to check syntax validity
-    p = parser(tokens)
-    d = Dashboard(p, text)
+    # Method to build parser_class(tokens, ...) as it is
+    @staticmethod
+    def make_parser(parser_class, tokens, *args, **kwargs):
+        return parser_class(tokens, *args, **kwargs)
+
+
+# Opt-in instrumentation. Modules only some options need are imported under them, so
+# a plain check starts without asyncio, the profiler or the vectorizer.
+if args.profile is not None:
+    from Profiler import Profiler
+    profiler = Profiler()
+else:
+    profiler = NoProfiler()
+
+if args.server:
+    # Documents stay parsed in memory between edits; exit code 0 after a clean shutdown
+    import asyncio
+    from Server import serve_stdio, serve_tcp
+    sys.exit(asyncio.run(serve_tcp(args.port) if args.port is not None else serve_stdio()))
+elif args.batch:
+    # Exit code: 0 all valid, 1 some file invalid, 2 some file could not be checked
+    sys.exit(Batch(args.batch + ([args.file] if args.file else []), args.lexer, args.jobs).run())
+elif args.file and args.stream:
+    # Tokens flow from the memory map through a bounded window; nothing is held whole,
+    # so the functions are listed as the parser reaches them
+    print(FUNCTIONS_HEADER)
+    p = StreamParser(StreamLexer(args.file).tokenize(), on_function=Dashboard.print_func)
     try:
-        p.parse()  # This will raise SyntaxError if the syntax is invalid
-        print("Syntax is valid")
+        p.parse()  # Functions are detected and checked in one pass
+        result = "Syntax is valid"
     except SyntaxError as e:
-        print(f"Syntax Error: {e}")
+        result = f"Syntax Error: {e}"
+    print(RULE)
+    print(result)
+elif args.file:
+    profiler.source = args.file
+    with profiler.phase('read'):
+        file = open(args.file)
+        text = file.read()
+
+    # A cache hit gives back the tokens, the function table and the outcome of the check.
+    # Profiling always lexes and parses, as a hit would skip what it measures.
+    # Lazy parsing skips unreachable functions, so its outcome is not the one cached
+    cache = None if args.no_cache or args.lazy else CompileCache.beside(args.file)
+    key = cache.key(text, args.lexer) if cache else None
+    entry = cache.load(key, text) if cache and not profiler.enabled else None
+    if entry is None:
+        with profiler.phase('lex'):
+            # Large files are lexed in chunks by worker processes with --jobs; the
+            # tokens are the same, so cache entries are shared with the fast lexer
+            if args.jobs > 1 and args.lexer == 'fast':
+                lexer = ParallelLexer(text, args.jobs)
+            else:
+                lexer = LEXERS[args.lexer](text)
+            tokens = lexer.tokenize_store()  # Compact tokens with source positions
+        profiler.count_tokens(tokens)
+    else:
+        tokens = entry.tokens
+
+    # Functions are parsed in worker processes with --jobs
+    if args.lazy:
+        engine, engine_args = LazyParser, (args.lazy,)
+    else:
+        engine, engine_args = LLParser if args.parser == 'll' else parser, ()
+    parser_class, parser_args = (ParallelParser, (args.jobs,)) if args.jobs > 1 and not args.lazy else (engine, engine_args)
+
+    if args.run:
+        p = None
+        try:
+            if entry is not None and entry.error is not None:
+                raise entry.error  # Known to be invalid
+            # Parse the tokens to build the AST
+            try:
+                p = profiler.make_parser(parser_class, tokens, *parser_args)
+                with profiler.phase('parse'):
+                    program = p.parse()
+            except SyntaxError as e:
+                if cache and entry is None:
+                    cache.store(key, tokens, [], e)
+                raise
+            with profiler.phase('semantic'):
+                semantic = SemanticAnalyzer(program, p.funcs).analyze()
+            if cache and entry is None:
+                cache.store(key, tokens, p.funcs, None, semantic)
+            if not print_semantic(semantic):  # Nothing runs when names do not resolve
+                with profiler.phase('compile'):
+                    functions = Compiler(program, args.vectorize).compile()  # Report errors in the code as written
+                optimizer = Optimizer(args.opt_level)
+                if args.opt_level:
+                    with profiler.phase('optimize'):
+                        functions = Compiler(optimizer.optimize(program), args.vectorize).compile()
+                memo = MemoCache(args.memo) if args.memo else None
+                started = time.perf_counter()
+                with profiler.phase('run'):
+                    VM(functions, memo=memo).run()  # Run main
+                elapsed = time.perf_counter() - started
+                if args.report:
+                    print(f"================ -O{args.opt_level} report ================")
+                    for name, count in optimizer.report.items():
+                        print(f"{name}: {count}")
+                    print(f"run time: {elapsed * 1000:.3f} ms")
+                    if memo is not None:
+                        stats = memo.stats()
+                        print(
+                            f"memo: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.1%}), "
+                            f"{stats['entries']} of {stats['size']} entries, {stats['evictions']} evictions"
+                        )
+        except CompileError as e:
+            print(f"Compile Error: {e}")
+        except SyntaxError as e:
+            print(f"Syntax Error: {e}")
+        except RuntimeError as e:
+            print(f"Runtime Error: {e}")
+        if profiler.enabled:
+            Dashboard(p if p is not None else CacheEntry(tokens, [], None), None, profiler)
+    elif args.recover:
+        # Collect every error in one pass; the cache only records the first one
+        p = profiler.make_parser(engine, tokens, *engine_args, recover=True, max_errors=args.max_errors)
+        with profiler.phase('parse'):
+            program = p.parse()
+        d = Dashboard(p, text, profiler)
+        for e in p.errors:
+            print(f"Syntax Error: {e}")
+        print("Syntax is valid" if not p.errors else f"{len(p.errors)} syntax error(s)")
+        if not p.errors:
+            with profiler.phase('semantic'):
+                print_semantic(SemanticAnalyzer(program, p.funcs).analyze())
+        if args.lazy:
+            print_reachability(p)
+    else:
+        if entry is None:
+            # Check the tokens and remember the outcome
+            p = None
+            semantic = []
+            try:
+                p = profiler.make_parser(parser_class, tokens, *parser_args)
+                with profiler.phase('parse'):
+                    program = p.parse()  # This will raise SyntaxError if the syntax is invalid
+                error = None
+                with profiler.phase('semantic'):
+                    semantic = SemanticAnalyzer(program, p.funcs).analyze()
+            except SyntaxError as e:
+                error = e
+            entry = CacheEntry(tokens, p.funcs if p else [], error, semantic=semantic)
+            if cache:
+                cache.store(key, tokens, entry.funcs, error, semantic)
+        d = Dashboard(entry, text, profiler)
+        if entry.error is None:
+            print("Syntax is valid")
+            print_semantic(entry.semantic)
+        else:
+            print(f"Syntax Error: {entry.error}")
+        if args.lazy and p is not None:
+            print_reachability(p)
+    if args.profile:
+        form = args.profile_format or ('json' if args.profile.endswith('.json') else 'pstats')
+        profiler.export(args.profile, form)
+        print(f"Profile written to {args.profile} ({form})")
 else:
     raise SystemError("No Program File Found")
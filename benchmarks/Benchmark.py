@@ -0,0 +1,169 @@
+import gc
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+from FastLexer import FastLexer
+from Lexer import Lexer
+from Parser import Parser
+from LLParser import LLParser
+from ParallelLexer import ParallelLexer
+from StreamLexer import StreamLexer
+from StreamParser import StreamParser
+from benchmarks.ProgramGenerator import ProgramGenerator
+
+# Phases that can be measured; each takes the scenario and returns nothing
+PHASES = ('lex', 'lex_classic', 'lex_parallel', 'parse', 'parse_ll', 'stream')
+# Percentiles reported for the latency of every phase
+PERCENTILES = (50, 90, 99)
+# Scenarios by name: generator settings plus the approximate size of the program in bytes
+SCENARIOS = {
+    'small': {'size': 10 << 10, 'depth': 2, 'expression_length': 3, 'string_density': 0.1},
+    'medium': {'size': 1 << 20, 'depth': 3, 'expression_length': 4, 'string_density': 0.1},
+    'large': {'size': 10 << 20, 'depth': 3, 'expression_length': 4, 'string_density': 0.1},
+    'deep': {'size': 1 << 20, 'depth': 8, 'expression_length': 2, 'string_density': 0.05},
+    'strings': {'size': 1 << 20, 'depth': 2, 'expression_length': 2, 'string_density': 0.8},
+}
+
+
+# Method to compute a nearest-rank percentile of a list of numbers
+def percentile(samples, rank):
+    ordered = sorted(samples)
+    return ordered[max(0, min(len(ordered) - 1, -(-rank * len(ordered) // 100) - 1))]
+
+
+# Define the Benchmark class: generates the program of every scenario once, times each
+# phase 'repeat' times and measures the peak traced memory of lexing plus parsing
+class Benchmark:
+    def __init__(self, scenarios, phases=PHASES, repeat=5, seed=0, directory=None):
+        self.scenarios = scenarios  # Scenario name -> settings, like SCENARIOS
+        self.phases = phases  # Phases to measure
+        self.repeat = repeat  # Timed runs per phase
+        self.seed = seed  # Seed of the program generator
+        self.directory = directory  # Where generated programs are written; a temporary directory if None
+
+    # Main method: returns the results as a JSON-ready dict
+    def run(self, log=None):
+        results = {'meta': self.meta(), 'scenarios': {}}
+        with tempfile.TemporaryDirectory() as temporary:
+            directory = self.directory or temporary
+            for name, settings in self.scenarios.items():
+                if log:
+                    log(f"scenario {name}: generating {settings['size']} bytes")
+                results['scenarios'][name] = self.run_scenario(name, settings, directory, log)
+        return results
+
+    # Method to describe the machine and the settings, stored with the results
+    def meta(self):
+        return {
+            'python': platform.python_version(), 'implementation': platform.python_implementation(),
+            'machine': platform.machine(), 'seed': self.seed, 'repeat': self.repeat,
+        }
+
+    # Method to measure one scenario
+    def run_scenario(self, name, settings, directory, log):
+        path = os.path.join(directory, f"{name}.YAH")
+        generator = ProgramGenerator(
+            self.seed, depth=settings['depth'], expression_length=settings['expression_length'],
+            string_density=settings['string_density'],
+        )
+        functions = generator.write(path, settings['size'])
+        # Programs of hundreds of MB only fit the stream phase: keep the text out of
+        # memory unless an in-memory phase needs it
+        text = None
+        if any(phase != 'stream' for phase in self.phases):
+            with open(path, encoding='utf-8') as file:
+                text = file.read()
+            tokens = len(FastLexer(text).tokenize_store())
+        else:
+            tokens = sum(1 for _ in StreamLexer(path).tokenize())
+        result = {'bytes': os.path.getsize(path), 'tokens': tokens, 'functions': functions, 'phases': {}}
+
+        runners = {
+            'lex': lambda: FastLexer(text).tokenize_store(),
+            'lex_classic': lambda: Lexer(text).tokenize(),
+            'lex_parallel': lambda: ParallelLexer(text, os.cpu_count() or 1).tokenize_store(),
+            'parse': lambda: None,
+            'parse_ll': lambda: None,
+            'stream': lambda: StreamParser(StreamLexer(path).tokenize()).parse(),
+        }
+        if 'parse' in self.phases:
+            runners['parse'] = self.parser_runner(text)
+        if 'parse_ll' in self.phases:
+            runners['parse_ll'] = self.parser_runner(text, LLParser)
+        for phase in self.phases:
+            if log:
+                log(f"  {phase}")
+            samples = self.time(runners[phase])
+            median = percentile(samples, 50)
+            result['phases'][phase] = {
+                **{f"p{rank}_ms": round(percentile(samples, rank) * 1000, 3) for rank in PERCENTILES},
+                'tokens_per_sec': round(tokens / median) if median else None,
+                'functions_per_sec': round(functions / median) if median else None,
+            }
+        result['peak_memory_bytes'] = self.peak_memory(text, path)
+        return result
+
+    # Method to make the parse phase runner; the tokens are lexed once, outside the timing
+    def parser_runner(self, text, parser_class=Parser):
+        tokens = FastLexer(text).tokenize_store()
+        return lambda: parser_class(tokens).parse()
+
+    # Method to time 'run' self.repeat times; returns the durations in seconds
+    def time(self, run):
+        samples = []
+        for _ in range(self.repeat):
+            gc.collect()
+            started = time.perf_counter()
+            run()
+            samples.append(time.perf_counter() - started)
+        return samples
+
+    # Method to measure the peak memory allocated while lexing and parsing 'text', or
+    # while streaming the file at 'path' when the text was not loaded
+    def peak_memory(self, text, path):
+        gc.collect()
+        tracemalloc.start()
+        try:
+            if text is None:
+                StreamParser(StreamLexer(path).tokenize()).parse()
+            else:
+                Parser(FastLexer(text).tokenize_store()).parse()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+
+# Method to compare results with a baseline; returns a list of regression messages.
+# A phase regresses when its median latency grows by more than 'tolerance' (0.2 = 20%),
+# a scenario when its peak memory grows by more than 'tolerance'. A scenario or phase
+# the baseline does not have is reported too, since it could never regress.
+def compare(results, baseline, tolerance=0.2):
+    regressions = []
+    for name, scenario in results['scenarios'].items():
+        old = baseline.get('scenarios', {}).get(name)
+        if old is None:
+            regressions.append(f"{name}: not in the baseline")
+            continue
+        for phase, current in scenario['phases'].items():
+            previous = old['phases'].get(phase)
+            if previous is None:
+                regressions.append(f"{name}/{phase}: not in the baseline")
+            elif previous['p50_ms'] and current['p50_ms'] > previous['p50_ms'] * (1 + tolerance):
+                regressions.append(
+                    f"{name}/{phase}: p50 {current['p50_ms']} ms, baseline {previous['p50_ms']} ms "
+                    f"(+{(current['p50_ms'] / previous['p50_ms'] - 1) * 100:.0f}%)"
+                )
+        if old.get('peak_memory_bytes') and scenario['peak_memory_bytes'] > old['peak_memory_bytes'] * (1 + tolerance):
+            regressions.append(
+                f"{name}/memory: peak {scenario['peak_memory_bytes']} bytes, baseline {old['peak_memory_bytes']} bytes"
+            )
+    return regressions
+
+
+# Method to read a baseline file
+def load_baseline(path):
+    with open(path) as file:
+        return json.load(file)
@@ -0,0 +1,175 @@
+import io
+import os
+import random
+import subprocess
+import sys
+import tempfile
+from FastLexer import FastLexer
+from Parser import Parser, SyntaxError
+from LLParser import LLParser
+from Compiler import Compiler, CompileError
+from Optimizer import Optimizer
+from VM import VM, RuntimeError
+from benchmarks.ProgramGenerator import ProgramGenerator
+
+# Words inserted or substituted by the mutations. The strings holding punctuation hit
+# the places where Parser looks at the value of a token and not at its type.
+FRAGMENTS = (
+    'function', 'main', 'x', '1', '"s"', '"}"', '"("', '"="', '(', ')', '{', '}', ';', ',', '.',
+    '=', '==', '<', '+', '*', 'MANLO', 'return', 'if', 'else', 'while', 'for', '@',
+)
+
+# Programs an optimization level once got wrong; every optimizer check runs them first
+REGRESSIONS = (
+    # The update of a for-loop writes a variable that is never read: -O2 removed its
+    # declaration and kept the update, which then failed to compile
+    'function main() { MANLO j = 0; for (MANLO i = 0; i < 3; j = i;) { i = i + 1; } }',
+    'function main() { MANLO j = 0; for (MANLO i = 0; i < 3; j = i;) { i = i + 1; } print(j); }',
+    # Reads before the declaration or outside the scope of a variable fail to compile;
+    # -O2 replaced them with its value
+    'function main() { print(x); MANLO x = 1; }',
+    'function main() { if (1 < 2;) { MANLO x = 1; } print(x); }',
+    'function main() { for (MANLO i = 0; i < 2; i = i + 1;) { MANLO k = i; } print(k); }',
+    # Dead stores that fail to compile: -O2 removed them
+    'function main() { MANLO y = z; }',
+    'function main() { x = 2; MANLO x = 1; }',
+)
+# Command line options of the end-to-end runs of Differential.deep, with the end of
+# the output each must print
+DEEP_RUNS = (
+    ((), "Syntax is valid\n"),
+    (('--run',), "1\n"),
+    (('--run', '-O2', '--vectorize'), "1\n"),
+)
+# The command line entry point, run as a separate process by the end-to-end checks
+YAH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'YAH.py')
+
+
+# Define the Differential class: feeds the same token streams to a reference parser
+# and a candidate and reports every program on which they disagree. Generated
+# programs are valid; their mutations are mostly not, so both the AST and the
+# error (message and token) are compared.
+class Differential:
+    def __init__(self, seed=0, mutations=4, reference=Parser, candidate=LLParser):
+        self.rng = random.Random(seed)  # All choices come from this generator
+        self.mutations = mutations  # Maximum edits applied to one program
+        self.reference = reference  # Parser class whose behaviour is the specification
+        self.candidate = candidate  # Parser class checked against it
+
+    # Main method: compares 'count' programs; returns the mismatches as
+    # (program, reference outcome, candidate outcome)
+    def run(self, count, log=None):
+        mismatches = []
+        for index in range(count):
+            text = self.program()
+            tokens = FastLexer(text).tokenize_store()
+            expected, got = self.outcome(self.reference, tokens), self.outcome(self.candidate, tokens)
+            if expected != got:
+                mismatches.append((text, expected, got))
+            if log and (index + 1) % 1000 == 0:
+                log(f"{index + 1} programs, {len(mismatches)} mismatches")
+        return mismatches
+
+    # Method to generate a small program and apply up to 'mutations' edits to its words
+    # (self.mutations by default); without edits the program is valid and runs
+    def program(self, mutations=None):
+        rng = self.rng
+        generator = ProgramGenerator(
+            rng.randrange(1 << 30), functions=rng.randint(0, 3), depth=rng.randint(0, 3),
+            expression_length=rng.randint(1, 4), statements=rng.randint(1, 4),
+        )
+        tokens = FastLexer(generator.generate()).tokenize_store()
+        words = [f'"{token["value"]}"' if token['type'] == 'STRING' else token['value'] for token in tokens]
+        for _ in range(rng.randint(0, self.mutations if mutations is None else mutations)):
+            index = rng.randint(0, len(words))
+            roll = rng.random()
+            if roll < 0.4:
+                words.insert(index, rng.choice(FRAGMENTS))
+            elif index < len(words):
+                if roll < 0.7:
+                    del words[index]
+                else:
+                    words[index] = rng.choice(FRAGMENTS)
+        return ' '.join(words)
+
+    # Method to run one parser; the outcome is the AST, or the error with its token
+    def outcome(self, parser_class, tokens):
+        try:
+            return ('valid', repr(parser_class(tokens).parse()))
+        except SyntaxError as e:
+            return ('invalid', str(e), getattr(e.token, 'index', None))
+
+    # Method to check that the candidate parses blocks nested 'depth' levels deep, past
+    # the recursion limit of the reference, and that the command line checks, compiles,
+    # optimizes and runs them with it; returns an error message or None
+    def deep(self, depth):
+        text = "function main() { MANLO x = 0;" + "while (x < 1;) {" * depth + "x = 1;" + "}" * depth + "print(x); }"
+        tokens = FastLexer(text).tokenize_store()
+        try:
+            node = self.candidate(tokens).parse().children[0].children[1].children[1]  # The outer While
+        except (SyntaxError, IndexError, RecursionError) as e:
+            return f"nesting {depth}: {type(e).__name__}: {e}"
+        for _ in range(depth - 1):
+            node = node.children[1].children[0]  # While -> its block -> the While in it
+        if node.children[1].children[0].kind != 'Assign':
+            return f"nesting {depth}: wrong AST"
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'deep.YAH')
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write(text)
+            for options, expected in DEEP_RUNS:
+                stdout, stderr, code = self.cli(path, '--no-cache', '--parser', 'll', *options)
+                if code or stderr or not stdout.endswith(expected):
+                    last = (stderr.strip() or stdout.strip()).splitlines()[-1:]
+                    return f"nesting {depth}, {' '.join(options) or 'check'}: {' '.join(last) or f'exit code {code}'}"
+        return None
+
+    # Method to check that every optimization level in 'levels' runs the REGRESSIONS and
+    # 'count' generated programs like -O0 does; returns the mismatches as
+    # (program, -O0 outcome, level, outcome at that level)
+    def optimizer(self, count, levels=(1, 2)):
+        mismatches = []
+        programs = list(REGRESSIONS) + [self.program(mutations=0) for _ in range(count)]
+        for text in programs:
+            expected = self.execute(text, 0)
+            for level in levels:
+                got = self.execute(text, level)
+                if got != expected:
+                    mismatches.append((text, expected, level, got))
+        return mismatches
+
+    # Method to compile and run a program at an optimization level; the outcome is what
+    # it printed and the kind of error that stopped it, if any
+    def execute(self, text, level):
+        output = io.StringIO()
+        try:
+            program = Parser(FastLexer(text).tokenize_store()).parse()
+            VM(Compiler(Optimizer(level).optimize(program)).compile(), output).run()
+        except (SyntaxError, CompileError, RuntimeError) as e:
+            return output.getvalue(), type(e).__name__
+        return output.getvalue(), None
+
+    # Method to check that a program runs the same from a cold and a warm cache with
+    # worker processes: a warm run parses tokens memory-mapped from the cache entry.
+    # Returns a list of problem messages.
+    def warm_cache(self, count=3, jobs=2):
+        problems = []
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'program.YAH')
+            for _ in range(count):
+                text = ProgramGenerator(self.rng.randrange(1 << 30), functions=3, depth=2).generate()
+                with open(path, 'w', encoding='utf-8') as file:
+                    file.write(text)
+                expected = self.execute(text, 0)[0]
+                for run in ('cold', 'warm'):
+                    got = self.cli(path, '--run', '--jobs', str(jobs))
+                    if got != (expected, '', 0):
+                        last = (got[1].strip() or got[0].strip()).splitlines()[-1:]  # The exception, for a traceback
+                        problems.append(f"{run} cache, --jobs {jobs}: {' '.join(last) or f'exit code {got[2]}'}")
+        return problems
+
+    # Method to run YAH.py on 'path' with 'options'; returns (stdout, stderr, exit code)
+    @staticmethod
+    def cli(path, *options):
+        done = subprocess.run([sys.executable, YAH, path, *options], capture_output=True, text=True)
+        return done.stdout, done.stderr, done.returncode
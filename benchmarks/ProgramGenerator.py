@@ -0,0 +1,150 @@
+import random
+
+# Comparison operators used in generated conditions
+COMPARISONS = ('<', '<=', '>', '>=', '==', '!=')
+# Arithmetic operators used in generated expressions; '/' only ever divides by a non-zero literal
+ARITHMETIC = ('+', '-', '*', '/')
+# Letters used in generated string literals
+LETTERS = 'abcdefghijklmnopqrstuvwxyz '
+
+
+# Define the ProgramGenerator class: produces valid YAH programs from a seed.
+# Every variable is declared before it is used, functions only call functions
+# declared before them (with the right number of arguments), loops are bounded and
+# nothing divides by zero, so the programs also compile and run.
+class ProgramGenerator:
+    def __init__(self, seed=0, functions=100, depth=3, expression_length=4,
+                 string_density=0.1, statements=6, max_params=3):
+        self.rng = random.Random(seed)  # All choices come from this generator
+        self.functions = functions  # Number of functions besides main
+        self.depth = depth  # Maximum nesting of if/while/for blocks
+        self.expression_length = expression_length  # Maximum operands per expression
+        self.string_density = string_density  # Share of literals that are strings
+        self.statements = statements  # Maximum statements per block
+        self.max_params = max_params  # Maximum parameters per function
+        self.signatures = []  # (name, parameter count) of the functions generated so far
+        self.counter = 0  # Suffix for fresh variable names
+
+    # Method to generate a whole program as one string
+    def generate(self):
+        return ''.join(self.iter_functions(self.functions))
+
+    # Method to write a program of about 'size' bytes to 'path' without holding it in
+    # memory; returns the number of functions written (main included)
+    def write(self, path, size):
+        written = count = 0
+        with open(path, 'w', encoding='utf-8') as file:
+            while written < size:
+                text = self.function(f"f{count}")
+                file.write(text)
+                written += len(text.encode('utf-8'))
+                count += 1
+            file.write(self.main())
+        return count + 1
+
+    # Generator over the source of 'count' functions followed by main
+    def iter_functions(self, count):
+        for index in range(count):
+            yield self.function(f"f{index}")
+        yield self.main()
+
+    # Method to generate one function and remember its signature
+    def function(self, name):
+        params = [f"p{index}" for index in range(self.rng.randint(0, self.max_params))]
+        body = self.block(list(params), 0)
+        body.append(f"return {self.expression(params)};")
+        self.signatures.append((name, len(params)))
+        return f"function {name}({', '.join(params)}) {{\n{self.indent(body, 1)}\n}}\n"
+
+    # Method to generate main
+    def main(self):
+        body = self.block([], 0)
+        return f"function main() {{\n{self.indent(body, 1)}\n}}\n"
+
+    # Method to indent the lines of a block
+    def indent(self, lines, level):
+        return '\n'.join('    ' * level + line for line in '\n'.join(lines).split('\n'))
+
+    # Method to make a fresh variable name
+    def fresh(self, prefix):
+        self.counter += 1
+        return f"{prefix}{self.counter}"
+
+    # Method to generate the statements of a block; 'names' are the variables in scope
+    def block(self, names, depth):
+        rng = self.rng
+        names = list(names)
+        lines = []
+        for _ in range(rng.randint(1, self.statements)):
+            roll = rng.random()
+            # Loop counters (i...) and strings (s...) are never reassigned
+            targets = [name for name in names[-8:] if name[0] not in 'is']
+            if roll < 0.3 or not targets:
+                if rng.random() < self.string_density:
+                    name = self.fresh('s')
+                    lines.append(f"MANLO {name} = {self.string()};")
+                else:
+                    name = self.fresh('v')
+                    lines.append(f"MANLO {name} = {self.expression(names)};")
+                names.append(name)
+            elif roll < 0.45:
+                lines.append(f"{rng.choice(targets)} = {self.expression(names)};")
+            elif roll < 0.55:
+                arguments = ', '.join(self.operand(names) for _ in range(rng.randint(1, 3)))
+                lines.append(f"print({arguments});")
+            elif roll < 0.65 and self.signatures:
+                name, params = rng.choice(self.signatures)
+                lines.append(f"{name}({', '.join(self.number_operand(names) for _ in range(params))});")
+            elif depth < self.depth:
+                lines.append(self.compound(names, depth))
+        return lines
+
+    # Method to generate an if, while or for statement
+    def compound(self, names, depth):
+        rng = self.rng
+        kind = rng.choice(('if', 'while', 'for'))
+        if kind == 'if':
+            text = f"if ({self.condition(names)}) {{\n{self.indent(self.block(names, depth + 1), 1)}\n}}"
+            if rng.random() < 0.5:
+                text += f" else {{\n{self.indent(self.block(names, depth + 1), 1)}\n}}"
+            return text
+        counter = self.fresh('i')  # The loop variable is never assigned by the body
+        limit = rng.randint(1, 4)
+        if kind == 'for':
+            return (f"for (MANLO {counter} = 0; {counter} < {limit}; {counter} = {counter} + 1;) {{\n"
+                    f"{self.indent(self.block(names + [counter], depth + 1), 1)}\n}}")
+        body = self.block(names + [counter], depth + 1) + [f"{counter} = {counter} + 1;"]
+        return (f"MANLO {counter} = 0;\nwhile ({counter} < {limit};) {{\n"
+                f"{self.indent(body, 1)}\n}}")
+
+    # Method to generate 'a op b;' for a condition
+    def condition(self, names):
+        return f"{self.number_operand(names)} {self.rng.choice(COMPARISONS)} {self.number_operand(names)};"
+
+    # Method to generate an arithmetic expression of up to expression_length operands
+    def expression(self, names):
+        rng = self.rng
+        text = self.number_operand(names)
+        for _ in range(rng.randint(0, self.expression_length - 1)):
+            operator = rng.choice(ARITHMETIC)
+            operand = str(rng.randint(1, 9)) if operator == '/' else self.number_operand(names)
+            text += f" {operator} {operand}"
+        return text
+
+    # Method to generate a print argument: a string, a string variable or a number
+    def operand(self, names):
+        if self.rng.random() < self.string_density:
+            strings = [name for name in names[-8:] if name[0] == 's']
+            return self.rng.choice(strings) if strings and self.rng.random() < 0.5 else self.string()
+        return self.number_operand(names)
+
+    # Method to generate a number or a numeric variable
+    def number_operand(self, names):
+        numeric = [name for name in names[-8:] if name[0] != 's']
+        if numeric and self.rng.random() < 0.6:
+            return self.rng.choice(numeric)
+        return str(self.rng.randint(0, 99))
+
+    # Method to generate a string literal
+    def string(self):
+        return '"' + ''.join(self.rng.choice(LETTERS) for _ in range(self.rng.randint(0, 24))) + '"'
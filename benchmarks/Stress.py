@@ -0,0 +1,206 @@
+import gc
+import math
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from FastLexer import FastLexer
+from Lexer import Lexer
+from Parser import Parser, SyntaxError
+from LLParser import LLParser
+from StreamLexer import StreamLexer
+from StreamParser import StreamParser
+from benchmarks.ProgramGenerator import ProgramGenerator
+
+# Phases that can be measured on every input
+PHASES = ('lex', 'lex_classic', 'stream', 'parse', 'parse_ll')
+# Chunk size of the stream phase: small, so that the inputs span many chunks
+STREAM_CHUNK = 64 << 10
+# Largest growth exponent accepted for time and memory: 1 is linear, plus noise
+LINEAR_LIMIT = 1.3
+# Below these, a phase is too fast or too small for its growth to be measured
+MIN_SECONDS = 0.005
+MIN_BYTES = 64 << 10
+# Sizes measured per input, as fractions of the largest one
+STEPS = 5
+
+
+# Inputs with no place to cut: one string, identifier or operator run of 'size' characters
+def unterminated_string(size):
+    return 'function main() { MANLO s = "' + 'a' * size
+
+
+def long_identifier(size):
+    return 'function main() { MANLO ' + 'x' * size + ' = 1; }'
+
+
+def operator_run(size):
+    return 'function main() { MANLO x = 1 ' + '+-*/' * (size // 4) + ' 1; }'
+
+
+# A valid expression of about size / 4 operands
+def long_expression(size):
+    return 'function main() { MANLO x = 1' + ' + 1' * (size // 4) + '; }'
+
+
+# Many small functions: the function table and one parse per function
+def many_functions(size):
+    function = 'function f{0}(a) {{ MANLO x = a + 1; }}\n'
+    return ''.join(function.format(index) for index in range(size // 40)) + 'function main() { }'
+
+
+# Blocks nested size / 16 levels deep, closed or not
+def deep_nesting(size):
+    depth = size // 16
+    return 'function main() {' + 'while (x < 1;) {' * depth + 'x = 1;' + '}' * depth + '}'
+
+
+def unclosed_nesting(size):
+    return 'function main() {' + 'if (x < 1;) {' * (size // 13)
+
+
+# A generated program whose last function is cut in half
+def truncated(size):
+    generator = ProgramGenerator(0)
+    parts, length = ['function main() { }\n'], 0
+    while length < size:
+        parts.append(generator.function(f"f{len(parts)}"))
+        length += len(parts[-1])
+    parts[-1] = parts[-1][:len(parts[-1]) // 2]
+    return ''.join(parts)
+
+
+# A valid program followed by a 'function' keyword with nothing after it
+def trailing_function(size):
+    return many_functions(size) + '\nfunction'
+
+
+# Inputs by name; each takes the size in characters of its pathological part
+CASES = {
+    'unterminated_string': unterminated_string, 'long_identifier': long_identifier,
+    'operator_run': operator_run, 'long_expression': long_expression,
+    'many_functions': many_functions, 'deep_nesting': deep_nesting, 'unclosed_nesting': unclosed_nesting,
+    'truncated': truncated, 'trailing_function': trailing_function,
+}
+
+
+# Method to fit 'values' = c * sizes ** k by least squares on a log-log scale; returns k
+def growth(sizes, values):
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(max(value, 1e-9)) for value in values]
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    spread = sum((x - mean_x) ** 2 for x in xs)
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / spread
+
+
+# Define the Stress class: runs every phase on every pathological input at sizes that
+# double up to 'size', fits how time and peak memory grow with the input and checks
+# that the growth is linear and that every failure is a SyntaxError
+class Stress:
+    def __init__(self, cases=CASES, phases=PHASES, size=256 << 10, repeat=3, limit=LINEAR_LIMIT):
+        self.cases = cases  # Input name -> function building the input of a size
+        self.phases = phases  # Phases to measure
+        self.sizes = [size >> step for step in reversed(range(STEPS))]  # Sizes measured, smallest first
+        self.repeat = repeat  # Timed runs per phase and size; the fastest counts
+        self.limit = limit  # Largest growth exponent accepted
+
+    # Main method: returns the results as a JSON-ready dict
+    def run(self, log=None):
+        results = {'sizes': self.sizes, 'limit': self.limit, 'cases': {}}
+        with tempfile.TemporaryDirectory() as directory:
+            for name, build in self.cases.items():
+                if log:
+                    log(f"case {name}")
+                results['cases'][name] = self.run_case(build, os.path.join(directory, f"{name}.YAH"))
+        return results
+
+    # Method to measure one input at every size
+    def run_case(self, build, path):
+        samples = {phase: {'seconds': [], 'memory': [], 'outcomes': set()} for phase in self.phases}
+        for size in self.sizes:
+            text = build(size)
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write(text)
+            tokens = FastLexer(text).tokenize_store()
+            runners = {
+                'lex': lambda: FastLexer(text).tokenize_store(),
+                'lex_classic': lambda: Lexer(text).tokenize(),
+                'stream': lambda: StreamParser(StreamLexer(path, STREAM_CHUNK).tokenize()).parse(),
+                'parse': lambda: Parser(tokens).parse(),
+                'parse_ll': lambda: LLParser(tokens).parse(),
+            }
+            for phase in self.phases:
+                seconds, memory, outcome = self.measure(runners[phase])
+                samples[phase]['seconds'].append(seconds)
+                samples[phase]['memory'].append(memory)
+                samples[phase]['outcomes'].add(outcome)
+        return {phase: self.summarize(sample) for phase, sample in samples.items()}
+
+    # Method to run a phase: the fastest of self.repeat timed runs, then one traced run
+    # for the peak memory. Returns (seconds, peak bytes, outcome).
+    def measure(self, run):
+        best = math.inf
+        for _ in range(self.repeat):
+            gc.collect()
+            started = time.perf_counter()
+            outcome = self.outcome(run)
+            best = min(best, time.perf_counter() - started)
+        gc.collect()
+        tracemalloc.start()
+        try:
+            self.outcome(run)
+            return best, tracemalloc.get_traced_memory()[1], outcome
+        finally:
+            tracemalloc.stop()
+
+    # Method to run a phase and classify how it ended: 'valid', 'SyntaxError', or the
+    # name of any other exception, which is a crash. An exception that could not be
+    # raised (in a finalizer, say) is a crash too, named 'unraisable <exception>'; the
+    # hook recording it is a C method, as it may be called at the recursion limit.
+    @staticmethod
+    def outcome(run):
+        unraisable = []
+        hook, sys.unraisablehook = sys.unraisablehook, unraisable.append
+        try:
+            try:
+                run()
+            finally:
+                gc.collect()  # Finalize what the run left behind while the hook is set
+        except SyntaxError:
+            result = 'SyntaxError'
+        except Exception as e:
+            result = type(e).__name__
+        else:
+            result = 'valid'
+        finally:
+            sys.unraisablehook = hook
+        if unraisable:
+            return f"unraisable {unraisable[0].exc_type.__name__}"
+        return result
+
+    # Method to fit the growth of a phase; an exponent is None when the phase stays too
+    # fast or too small at every size to be measured
+    def summarize(self, sample):
+        seconds, memory = sample['seconds'], sample['memory']
+        return {
+            'seconds': [round(value, 6) for value in seconds], 'memory_bytes': memory,
+            'time_exponent': round(growth(self.sizes, seconds), 2) if max(seconds) >= MIN_SECONDS else None,
+            'memory_exponent': round(growth(self.sizes, memory), 2) if max(memory) >= MIN_BYTES else None,
+            'outcomes': sorted(sample['outcomes']),
+        }
+
+
+# Method to check results; returns a list of failure messages: growth beyond the limit,
+# or a phase ending in anything but a result or a SyntaxError
+def failures(results):
+    problems = []
+    for name, case in results['cases'].items():
+        for phase, stats in case.items():
+            for key in ('time_exponent', 'memory_exponent'):
+                if stats[key] is not None and stats[key] > results['limit']:
+                    problems.append(f"{name}/{phase}: {key.replace('_', ' ')} {stats[key]} > {results['limit']}")
+            crashes = [outcome for outcome in stats['outcomes'] if outcome not in ('valid', 'SyntaxError')]
+            if crashes:
+                problems.append(f"{name}/{phase}: raised {', '.join(crashes)}")
+    return problems
@@ -0,0 +1,3 @@
+# Benchmarks for the YAH lexers and parsers: a seeded program generator and a
+# runner that measures every phase and compares the results with a stored baseline.
+# Run from the repository root: python -m benchmarks --help
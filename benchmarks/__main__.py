@@ -0,0 +1,134 @@
+import argparse
+import json
+import sys
+from benchmarks.Benchmark import Benchmark, PHASES, SCENARIOS, compare, load_baseline
+from benchmarks.Differential import Differential
+from benchmarks.ProgramGenerator import ProgramGenerator
+from benchmarks.Stress import CASES, PHASES as STRESS_PHASES, Stress, failures
+
+# Units accepted by --size
+UNITS = {'': 1, 'B': 1, 'KB': 1 << 10, 'MB': 1 << 20, 'GB': 1 << 30}
+
+
+# Method to parse sizes such as '64KB' or '200MB'
+def size(text):
+    text = text.strip().upper()
+    digits = text.rstrip('KMGB')
+    if not digits.isdigit() or text[len(digits):] not in UNITS:
+        raise argparse.ArgumentTypeError(f"invalid size '{text}'")
+    return int(digits) * UNITS[text[len(digits):]]
+
+
+arg_parser = argparse.ArgumentParser(
+    prog='python -m benchmarks', description="Benchmark the YAH lexers and parsers",
+    epilog="Timings depend on the machine, so no baseline is shipped: record one with "
+           "--save-baseline baseline.json before a change, then check the change with --baseline baseline.json.",
+)
+arg_parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS), help="scenario to run (repeatable; default: small and medium)")
+arg_parser.add_argument('--size', type=size, help="run one custom scenario of this size, e.g. 200MB")
+arg_parser.add_argument('--depth', type=int, default=3, help="nesting depth of the custom scenario")
+arg_parser.add_argument('--expression-length', type=int, default=4, help="operands per expression of the custom scenario")
+arg_parser.add_argument('--string-density', type=float, default=0.1, help="share of string literals in the custom scenario")
+arg_parser.add_argument('--phase', action='append', choices=PHASES, help="phase to measure (repeatable; default: all)")
+arg_parser.add_argument('--repeat', type=int, default=5, help="timed runs per phase")
+arg_parser.add_argument('--seed', type=int, default=0, help="seed of the program generator")
+arg_parser.add_argument('--baseline', help="baseline JSON written by --save-baseline to compare with; regressions, and scenarios or phases it lacks, exit with status 1")
+arg_parser.add_argument('--tolerance', type=float, default=0.2, help="allowed slowdown or memory growth, 0.2 = 20%%")
+arg_parser.add_argument('--save-baseline', metavar='PATH', help="write the results as the new baseline")
+arg_parser.add_argument('--generate', metavar='PATH', help="only write a generated program of --size bytes to PATH")
+arg_parser.add_argument('--differential', type=int, metavar='COUNT', help="only check LLParser against Parser on COUNT mutated programs, -O1/-O2 against -O0 on COUNT valid ones, and run programs from a warm cache")
+arg_parser.add_argument('--stress', action='store_true', help="only check that time and memory grow linearly on pathological inputs of up to --size bytes (default 256KB); failures exit with status 1")
+arg_parser.add_argument('--case', action='append', choices=sorted(CASES), help="pathological input of --stress (repeatable; default: all)")
+args = arg_parser.parse_args()
+
+# Read the baseline before measuring anything, so a missing one fails at once
+baseline = None
+if args.baseline:
+    try:
+        baseline = load_baseline(args.baseline)
+    except (OSError, ValueError) as error:
+        arg_parser.error(f"cannot read the baseline ({error}); record it first with --save-baseline {args.baseline}")
+
+if args.differential is not None:
+    differential = Differential(args.seed)
+    mismatches = differential.run(args.differential, log=lambda message: print(message, file=sys.stderr))
+    for text, expected, got in mismatches[:10]:
+        print(f"MISMATCH\n  program:   {text}\n  Parser:    {expected}\n  LLParser:  {got}")
+    for depth in (10, 1000, 10000):
+        problem = differential.deep(depth)
+        if problem:
+            mismatches.append(problem)
+            print(f"MISMATCH {problem}")
+    print(f"{args.differential} programs and 3 nesting depths parsed, checked and run, {len(mismatches)} mismatches")
+    # The optimizer levels must not change what valid programs do
+    optimized = differential.optimizer(args.differential)
+    for text, expected, level, got in optimized[:10]:
+        print(f"MISMATCH\n  program:   {text}\n  -O0:       {expected}\n  -O{level}:       {got}")
+    print(f"{args.differential} valid programs checked at -O1 and -O2, {len(optimized)} mismatches")
+    # Tokens memory-mapped from a cache entry must reach the worker processes too
+    cached = differential.warm_cache()
+    for problem in cached:
+        print(f"FAILURE {problem}")
+    print(f"3 programs run from a cold and a warm cache, {len(cached)} failures")
+    sys.exit(1 if mismatches or optimized or cached else 0)
+
+if args.stress:
+    stress = Stress(
+        {name: CASES[name] for name in args.case or CASES},
+        tuple(phase for phase in args.phase or STRESS_PHASES if phase in STRESS_PHASES),
+        args.size or 256 << 10, args.repeat,
+    )
+    results = stress.run(log=lambda message: print(message, file=sys.stderr))
+    print(f"{'case/phase':<32}{'time exp':>10}{'memory exp':>12}{'max ms':>10}{'peak MB':>10}  outcomes")
+    for name, case in results['cases'].items():
+        for phase, stats in case.items():
+            time_exponent, memory_exponent = stats['time_exponent'], stats['memory_exponent']
+            print(f"{name + '/' + phase:<32}{'-' if time_exponent is None else time_exponent:>10}"
+                  f"{'-' if memory_exponent is None else memory_exponent:>12}{max(stats['seconds']) * 1000:>10.1f}"
+                  f"{max(stats['memory_bytes']) / (1 << 20):>10.1f}  {', '.join(stats['outcomes'])}")
+    problems = failures(results)
+    for problem in problems:
+        print(f"FAILURE {problem}")
+    print(f"{len(results['cases'])} inputs at sizes {results['sizes']}, {len(problems)} failures")
+    sys.exit(1 if problems else 0)
+
+if args.generate:
+    generator = ProgramGenerator(
+        args.seed, depth=args.depth, expression_length=args.expression_length, string_density=args.string_density,
+    )
+    count = generator.write(args.generate, args.size or SCENARIOS['medium']['size'])
+    print(f"wrote {count} functions to {args.generate}")
+    sys.exit(0)
+
+if args.size:
+    scenarios = {'custom': {
+        'size': args.size, 'depth': args.depth, 'expression_length': args.expression_length,
+        'string_density': args.string_density,
+    }}
+else:
+    scenarios = {name: SCENARIOS[name] for name in (args.scenario or ['small', 'medium'])}
+
+benchmark = Benchmark(scenarios, tuple(args.phase or PHASES), args.repeat, args.seed)
+results = benchmark.run(log=lambda message: print(message, file=sys.stderr))
+
+# Summary table
+print(f"{'scenario/phase':<24}{'p50 ms':>12}{'p90 ms':>12}{'p99 ms':>12}{'tokens/s':>14}{'functions/s':>14}")
+for name, scenario in results['scenarios'].items():
+    for phase, stats in scenario['phases'].items():
+        print(f"{name + '/' + phase:<24}{stats['p50_ms']:>12}{stats['p90_ms']:>12}{stats['p99_ms']:>12}"
+              f"{stats['tokens_per_sec']:>14}{stats['functions_per_sec']:>14}")
+    print(f"{name + '/peak memory':<24}{scenario['peak_memory_bytes'] / (1 << 20):>11.1f}M"
+          f"   ({scenario['tokens']} tokens, {scenario['functions']} functions, {scenario['bytes']} bytes)")
+
+if args.save_baseline:
+    with open(args.save_baseline, 'w') as file:
+        json.dump(results, file, indent=2)
+    print(f"baseline saved to {args.save_baseline}")
+
+if baseline is not None:
+    regressions = compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        sys.exit(1)
+    print("no regressions against the baseline")
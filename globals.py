@@ -16,4 +16,45 @@ OPERATORS = {'+', '-', '*', '/', '=', '==', '!=', '>', '<', '>=', '<='}
 ARITHEMATIC_OPERATOR = {'+', '-', '*', '/'}
 LOGICAL_OPERATOR = {'==', '!=', '>', '<', '>=', '<='}
 ASSIGNMENT_OPERATOR = {'='}
-PUNCTUATION = {'(', ')', '{', '}', ';', ',', '.'}
\ No newline at end of file
+PUNCTUATION = {'(', ')', '{', '}', ';', ',', '.'}
+
+# Small integer codes for token types, used by the compact TokenStore
+TOKEN_NAMES = tuple(TOKEN_TYPES.values())
+TOKEN_CODES = {name: code for code, name in enumerate(TOKEN_NAMES)}
+
+# Kinds of AST nodes (see AST.py); their index is the kind code of a NodePool
+NODE_KINDS = (
+    'Program', 'Function', 'Params', 'Block', 'Declare', 'Assign', 'Call', 'Return', 'If', 'While', 'For',
+    'Compare', 'BinOp', 'Name', 'Number', 'String', 'Null',
+)
+NODE_CODES = {name: code for code, name in enumerate(NODE_KINDS)}
+
+# Opcodes of the YAH virtual machine. Every instruction is an (opcode, argument) pair
+# stored flat in an array; instructions without an argument carry 0.
+OPCODES = (
+    'LOAD_LOCAL',     # push locals[arg]
+    'LOAD_CONST',     # push consts[arg]
+    'STORE_LOCAL',    # locals[arg] = pop()
+    'ADD', 'SUB', 'MUL', 'DIV',  # replace the top two values with the result
+    'JUMP_IF_LT', 'JUMP_IF_LE', 'JUMP_IF_GT', 'JUMP_IF_GE', 'JUMP_IF_EQ', 'JUMP_IF_NE',  # pop two, jump to arg if true
+    'JUMP',           # continue at code offset arg
+    'CALL',           # call functions[arg] with its parameters taken from the stack
+    'CALL_BUILTIN',   # call the builtin described by consts[arg] = (name, argc)
+    'POP',            # discard the top value
+    'RETURN',         # return pop() to the caller
+    'VLOOP',          # run the counted loop planned in consts[arg] (a VectorLoop) at once, if it can
+)
+(
+    LOAD_LOCAL, LOAD_CONST, STORE_LOCAL,
+    ADD, SUB, MUL, DIV,
+    JUMP_IF_LT, JUMP_IF_LE, JUMP_IF_GT, JUMP_IF_GE, JUMP_IF_EQ, JUMP_IF_NE,
+    JUMP, CALL, CALL_BUILTIN, POP, RETURN, VLOOP,
+) = range(len(OPCODES))
+
+# Functions provided by the runtime rather than declared in the program
+BUILTINS = {'print'}
+
+# Versions of the token stream and of the grammar; bump them whenever a change to the
+# lexers or the parser could change tokens or results, so cached compiles are dropped
+LEXER_VERSION = 2
+GRAMMAR_VERSION = 2